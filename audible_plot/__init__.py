@@ -0,0 +1,25 @@
+"""Audible-Plot: plot simple data series as audible speech and tones."""
+from . import instrument
+from .artifactcache import ArtifactCache
+from .document import PlotDocument
+from .gnuplot import GnuplotPool, GnuplotWorker
+from .liveplotdata import LivePlotData
+from .output import AudioOutput, NullStream, RingBuffer
+from .pipeline import PlotPipeline
+from .pitch import Pitch, PitchArray
+from .player import Coalesce, Player
+from .prefetch import Prefetcher
+from .plotaudio import PlotAudio
+from .plotdata import Decimation, PlotData
+from .plotvisual import FileType, PlotVisual, Transport
+from .speech import SpeechBank
+from .synth import Oscillator, Synth, WavetableBank, WavetableOscillator, Waveform
+from .tonecache import ToneCache
+
+__all__ = ["Pitch", "PitchArray", "PlotData", "Oscillator", "Synth", "Waveform",
+           "WavetableBank", "WavetableOscillator", "ToneCache",
+           "AudioOutput", "RingBuffer", "PlotAudio", "Decimation",
+           "LivePlotData", "PlotVisual", "FileType", "GnuplotPool", "GnuplotWorker",
+           "Transport", "ArtifactCache", "SpeechBank", "PlotPipeline",
+           "PlotDocument", "instrument", "Player", "NullStream",
+           "Prefetcher", "Coalesce"]
@@ -0,0 +1,253 @@
+"""On-disk, content-addressed cache of rendered plot artifacts."""
+import contextlib
+import functools
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from typing import IO, Any, Callable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+# Module Constants
+CACHE_BYTES: int = 256 * 2**20  # most bytes of artifacts kept
+CACHE_VERSION: int = 1  # part of every key, bumped when rendering changes
+CACHE_ENV: str = "AUDIBLE_PLOT_CACHE"  # environment variable naming the directory
+TEMP_SUFFIX: str = ".tmp"
+LOCK_DIR: str = "locks"
+LOCK_POLL: float = 0.01  # seconds between tries of a lock without flock
+
+
+class ArtifactCache(object):
+    """Directory of artifact files named by a hash of what they were
+    rendered from, evicted least recently used first above `max_bytes`.
+
+    Files appear by atomic rename, each key is made under a file lock so
+    that concurrent processes make it once, and use is recorded in the
+    file modification time, so several processes can share the cache.
+    Files are locked with flock, or msvcrt on Windows, or not at all
+    where neither is available."""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = CACHE_BYTES) -> None:
+        """Initialize a cache in `directory`, by default from the
+        environment or the user cache directory."""
+        if directory is None:
+            directory = os.environ.get(CACHE_ENV) or os.path.join(
+                os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "audible-plot")
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        os.makedirs(os.path.join(directory, LOCK_DIR), exist_ok=True)
+
+    @property
+    def directory(self) -> str:
+        """Directory of the artifact files."""
+        return self._directory
+
+    @property
+    def max_bytes(self) -> int:
+        """Most bytes of artifacts kept."""
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, n: int) -> None:
+        self._max_bytes = n
+        self.evict()
+
+    @property
+    def hits(self) -> int:
+        """Number of artifacts found by this cache object."""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """Number of artifacts made by this cache object."""
+        return self._misses
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of artifacts in the cache."""
+        return sum(size for _, size, _ in self._entries())
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """Get the key of an artifact made from `parts`, which must have
+        a repr that is the same from run to run, as a hex digest."""
+        return hashlib.sha256(repr((CACHE_VERSION,) + parts).encode()).hexdigest()
+
+    def path(self, key: str, suffix: str) -> str:
+        """Get the filename of an artifact."""
+        return os.path.join(self._directory, key + suffix)
+
+    def get(self, key: str, suffix: str) -> Optional[str]:
+        """Get the filename of a cached artifact, marking it recently
+        used, or None if it is not cached."""
+        path = self.path(key, suffix)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        self._hits += 1
+        return path
+
+    @contextlib.contextmanager
+    def hold(self, key: str, suffix: str, make: Callable[[str], None]) -> Iterator[str]:
+        """Hold the filename of a cached artifact, first calling `make`
+        with a filename to write it to if it is not cached. The artifact
+        is not evicted while held."""
+        with self._lock(key):
+            path = self.get(key, suffix)
+            made = path is None
+            if made:
+                fd, temp = tempfile.mkstemp(suffix=suffix + TEMP_SUFFIX, dir=self._directory)
+                os.close(fd)
+                try:
+                    make(temp)
+                    path = self.path(key, suffix)
+                    os.replace(temp, path)
+                finally:
+                    if os.path.exists(temp):
+                        os.remove(temp)
+                self._misses += 1
+            yield path
+        if made:
+            self.evict()
+
+    def fetch(self, key: str, suffix: str, make: Callable[[str], None]) -> str:
+        """Get the filename of a cached artifact, first calling `make`
+        with a filename to write it to if it is not cached. Another
+        process may evict it, so `hold` or `copy` it to use it."""
+        with self.hold(key, suffix, make) as path:
+            return path
+
+    def copy(self, key: str, suffix: str, make: Callable[[str], None], filename: str) -> str:
+        """Copy a cached artifact to `filename`, first calling `make`
+        with a filename to write it to if it is not cached. Return
+        `filename`."""
+        with self.hold(key, suffix, make) as path:
+            shutil.copyfile(path, filename)
+        return filename
+
+    def put(self, key: str, suffix: str, filename: str) -> str:
+        """Cache a copy of an artifact file. Return its cached filename."""
+        return self.fetch(key, suffix, functools.partial(shutil.copyfile, filename))
+
+    def evict(self) -> None:
+        """Remove the least recently used artifacts until at most
+        `max_bytes` remain, always keeping the most recent one and
+        those held."""
+        with self._lock(LOCK_DIR):
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries[:-1]:
+                if total <= self._max_bytes:
+                    break
+                if self._remove(path, blocking=False):
+                    total -= size
+
+    def clear(self) -> None:
+        """Remove all artifacts."""
+        with self._lock(LOCK_DIR):
+            for _, _, path in self._entries():
+                self._remove(path)
+
+    def _remove(self, path: str, blocking: bool = True) -> bool:
+        """Remove an artifact and its lock file, under its lock. Return
+        False if not `blocking` and it is held."""
+        key = os.path.basename(path).split(".", 1)[0]
+        with self._lock(key, blocking) as locked:
+            if not locked:
+                return False
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            with contextlib.suppress(FileNotFoundError, PermissionError):
+                os.remove(self._lock_path(key))
+        return True
+
+    def _entries(self) -> Iterator[tuple[float, int, str]]:
+        """Yield (last use, bytes, filename) of each artifact."""
+        with os.scandir(self._directory) as it:
+            for entry in it:
+                if entry.name.endswith(TEMP_SUFFIX) or not entry.is_file():
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield (st.st_mtime, st.st_size, entry.path)
+
+    def _lock_path(self, name: str) -> str:
+        """Get the filename of a lock."""
+        return os.path.join(self._directory, LOCK_DIR, name + ".lock")
+
+    @contextlib.contextmanager
+    def _lock(self, name: str, blocking: bool = True) -> Iterator[bool]:
+        """Hold an exclusive lock, shared with other processes, by name.
+        Yield False instead if not `blocking` and it is held."""
+        path = self._lock_path(name)
+        while True:
+            with open(path, "a") as f:
+                if not _lock_file(f, blocking):
+                    yield False
+                    return
+                try:
+                    if _same_file(f, path):  # else removed while waiting for it
+                        yield True
+                        return
+                finally:
+                    _unlock_file(f)
+
+
+def _lock_file(f: IO, blocking: bool) -> bool:
+    """Lock an open file exclusively. Return False if not `blocking` and
+    it is locked."""
+    if fcntl is not None:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            return False
+    elif msvcrt is not None:
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if not blocking:
+                    return False
+                time.sleep(LOCK_POLL)
+    return True
+
+
+def _unlock_file(f: IO) -> None:
+    """Unlock a file locked by `_lock_file`."""
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _same_file(f: IO, path: str) -> bool:
+    """Check that an open file is still the file at `path`."""
+    try:
+        return os.path.samestat(os.fstat(f.fileno()), os.stat(path))
+    except FileNotFoundError:
+        return False
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache() -> ArtifactCache:
+    """Get the shared default ArtifactCache."""
+    return ArtifactCache()
+
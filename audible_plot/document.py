@@ -0,0 +1,201 @@
+"""PlotDocument to collect many plots into one document."""
+import concurrent.futures
+import json
+import os
+import shutil
+import subprocess
+import time
+import urllib.request
+from typing import Optional, Sequence
+
+from . import instrument
+from .artifactcache import ArtifactCache, get_cache
+from .gnuplot import GnuplotPool, get_pool
+from .pipeline import DOC_TYPES, PANDOC, describe
+from .plotaudio import PlotAudio
+from .plotdata import Decimation, PlotData
+from .plotvisual import PlotVisual
+from .speech import find_engine
+from .synth import SAMPLE_RATE
+
+
+# Module Constants
+TABLE_ROWS: int = 20  # most rows of the data table of each plot
+ASSET_WORKERS: int = 4  # assets made at once
+PANDOC_SERVER_FORMATS: tuple[str, ...] = ("html",)  # formats a pandoc server can return
+
+
+class PlotDocument(object):
+    """Class to collect many plots, each with its figure, tone and
+    speech audio, data table and description, into one markdown
+    document converted by one pandoc run per format.
+
+    Each distinct asset is made once, from the ArtifactCache if it was
+    made before, and all of them are made at once, so plots that are
+    the same share their files."""
+
+    def __init__(self, output: str = "plots", formats: Sequence[str] = ("html",),
+                 pool: Optional[GnuplotPool] = None, cache: Optional[ArtifactCache] = None,
+                 speech: Optional[Sequence[str]] = None, pandoc: str = PANDOC,
+                 server: Optional[str] = None) -> None:
+        """Initialize an empty document writing files named from `output`,
+        in the `formats`, with gnuplot from `pool`, artifacts from
+        `cache`, speech from the `speech` engine command, and the
+        `pandoc` executable, or the pandoc server at the `server` URL
+        for the formats it can return. Defaults are shared or installed."""
+        for doctype in formats:
+            if doctype not in DOC_TYPES:
+                raise ValueError(f"Document type must be one of {DOC_TYPES}, not {doctype}.")
+        self._output = output
+        self._formats = tuple(formats)
+        self._pool = pool if pool is not None else get_pool()
+        self._cache = cache if cache is not None else get_cache()
+        self._speech = tuple(speech) if speech is not None else find_engine()
+        self._pandoc = pandoc
+        self._server = server
+        self._plots: list[PlotData] = []
+        self._timings: dict[str, float] = {}
+
+    @property
+    def plots(self) -> list[PlotData]:
+        """PlotData of the plots in the document, in order."""
+        return self._plots
+
+    @property
+    def timings(self) -> dict[str, float]:
+        """Wall seconds of each step of the last build, and in total."""
+        return self._timings
+
+    def add(self, pd: PlotData) -> None:
+        """Add a plot to the end of the document."""
+        self._plots.append(pd)
+
+    def md_filename(self) -> str:
+        """Get the markdown document filename from `output` and `.md`."""
+        return self._output + ".md"
+
+    def doc_filename(self, doctype: str) -> str:
+        """Get a document filename from `output` and the `doctype`."""
+        return self._output + "." + doctype
+
+    def assets_dir(self) -> str:
+        """Get the directory of the asset files from `output` and `_files`."""
+        return self._output + "_files"
+
+    def build(self) -> dict[str, float]:
+        """Make the assets, write the markdown document and convert it to
+        each format. Return the `timings`."""
+        self._timings = {}
+        start = time.perf_counter()
+        os.makedirs(self.assets_dir(), exist_ok=True)
+        assets = [self._assets(pd) for pd in self._plots]
+        jobs = {name: job for plot in assets for name, job in plot.values()}
+        with concurrent.futures.ThreadPoolExecutor(ASSET_WORKERS) as pool:
+            list(pool.map(lambda name: self._make(name, jobs[name]), jobs))
+        self._timings["assets"] = time.perf_counter() - start
+
+        t = time.perf_counter()
+        with open(self.md_filename(), "w") as f:
+            f.write(self.markdown(assets))
+        self._timings["markdown"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        self.convert()
+        self._timings["pandoc"] = time.perf_counter() - t
+        self._timings["total"] = time.perf_counter() - start
+        return self._timings
+
+    @instrument.timed("pandoc.convert")
+    def convert(self) -> None:
+        """Convert the markdown document to every format at once, each by
+        the pandoc server if it can, else by one pandoc process."""
+        directory = os.path.dirname(self.md_filename()) or None
+        processes = []
+        for doctype in self._formats:
+            if self._server is not None and doctype in PANDOC_SERVER_FORMATS:
+                self._convert_server(doctype)
+                continue
+            processes.append((doctype, subprocess.Popen(
+                [self._pandoc, os.path.basename(self.md_filename()), "--standalone",
+                 "-o", os.path.basename(self.doc_filename(doctype))],
+                cwd=directory, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)))
+        for doctype, process in processes:
+            out, _ = process.communicate()
+            if process.returncode != 0:
+                raise RuntimeError(f"pandoc failed to write {doctype}, exited with "
+                                   f"{process.returncode}:\n{out}")
+
+    def markdown(self, assets: list[dict[str, tuple[str, tuple]]]) -> str:
+        """Get the markdown document of the plots, with their assets."""
+        sections = []
+        for pd, plot in zip(self._plots, assets):
+            def link(kind: str) -> str:
+                return os.path.basename(self.assets_dir()) + "/" + plot[kind][0]
+            section = f"## {pd.title}\n\n"
+            if pd.description:
+                section += pd.description + "\n\n"
+            section += (f"![{pd.title}]({link('image')})\n\n"
+                        f"- [Plot tones]({link('tones')})\n"
+                        f"- [Spoken description]({link('speech')})\n\n"
+                        f"{describe(pd)}\n\n{self.table(pd)}\n")
+            sections.append(section)
+        return "\n".join(sections)
+
+    @staticmethod
+    def table(pd: PlotData, rows: int = TABLE_ROWS) -> str:
+        """Get a markdown pipe table of the points, downsampled to at most
+        `rows` rows that keep the shape of the lines."""
+        points = pd.decimate(rows, Decimation.LTTB).points
+        header = [pd.xlabel] + pd.line_labels
+        lines = ["| " + " | ".join(header) + " |", "|" + "---:|" * len(header)]
+        lines += ["| " + " | ".join(f"{v:g}" for v in row) + " |" for row in points]
+        return "\n".join(lines) + "\n"
+
+    def _assets(self, pd: PlotData) -> dict[str, tuple[str, tuple]]:
+        """Get the asset filename and job of the image, tones and speech
+        of a plot, named by their cache keys so equal assets are one."""
+        pv, pa = PlotVisual(pd), PlotAudio(pd)
+        text = describe(pd)
+        speech_key = ArtifactCache.key("speech", self._speech, SAMPLE_RATE, text)
+        return {"image": (pv.cache_key()[:16] + "." + pv.filetype, ("image", pv)),
+                "tones": (pa.cache_key()[:16] + ".wav", ("tones", pa)),
+                "speech": (speech_key[:16] + "-speech.wav", ("speech", speech_key, text))}
+
+    def _make(self, name: str, job: tuple) -> None:
+        """Make an asset file in the assets directory."""
+        path = os.path.join(self.assets_dir(), name)
+        with instrument.span("document." + job[0]):
+            self._make_file(path, job)
+
+    def _make_file(self, path: str, job: tuple) -> None:
+        """Make an asset file at `path` from its job."""
+        if job[0] == "image":
+            pv = job[1]
+            pv.output = os.path.splitext(path)[0]
+            pv.plot_cached(self._cache, self._pool)
+        elif job[0] == "tones":
+            pa = job[1]
+            pa.output = os.path.splitext(path)[0]
+            pa.write_wav_cached(self._cache)
+        else:
+            _, key, text = job
+            self._cache.copy(key, ".wav", lambda f: self._speak(text, f), path)
+
+    @instrument.timed("speech.engine")
+    def _speak(self, text: str, filename: str) -> None:
+        """Speak `text` to a `.wav` file with the speech engine."""
+        if self._speech is None:
+            raise FileNotFoundError("Speech requires espeak-ng, espeak or say. Install one.")
+        subprocess.run([arg.format(wav=filename, rate=SAMPLE_RATE, text=text)
+                        for arg in self._speech], check=True, capture_output=True)
+
+    def _convert_server(self, doctype: str) -> None:
+        """Convert the markdown document with the pandoc server."""
+        with open(self.md_filename()) as f:
+            body = json.dumps({"text": f.read(), "from": "markdown", "to": doctype,
+                               "standalone": True}).encode()
+        request = urllib.request.Request(self._server, data=body, headers={
+            "Content-Type": "application/json", "Accept": "text/plain"})
+        with urllib.request.urlopen(request) as response:
+            with open(self.doc_filename(doctype), "wb") as f:
+                shutil.copyfileobj(response, f)
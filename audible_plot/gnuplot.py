@@ -0,0 +1,212 @@
+"""Pool of long-lived gnuplot processes driven over pipes."""
+import atexit
+import concurrent.futures
+import functools
+import itertools
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from typing import Any, Iterable, Optional
+
+from . import instrument
+
+
+# Module Constants
+GNUPLOT: str = "gnuplot"
+GNUPLOT_WORKERS: int = 2
+GNUPLOT_TIMEOUT: float = 60.0  # seconds a job may take before gnuplot is killed
+SENTINEL: str = "audible-plot-done-"  # printed by gnuplot after each job
+
+
+def quote(s: str) -> str:
+    """Quote a string for a gnuplot command, escaping `\\` and `"`."""
+    return '"' + s.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class GnuplotWorker(object):
+    """A gnuplot process reading commands from a pipe, restarted if it exits.
+
+    After each job the worker closes the output file and has gnuplot
+    print a numbered sentinel line, so the job is known to be complete
+    when the line is read back. A thread reads the lines into a queue,
+    so a job that hangs past `timeout` seconds can kill the process."""
+
+    def __init__(self, executable: str = GNUPLOT, timeout: float = GNUPLOT_TIMEOUT) -> None:
+        """Initialize the worker. The process starts on the first job."""
+        self._executable = executable
+        self._timeout = timeout
+        self._process: Optional[subprocess.Popen] = None
+        self._lines: queue.Queue = queue.Queue()
+        self._reader: Optional[threading.Thread] = None
+        self._jobs = itertools.count(1)
+        self._starts = 0
+
+    @property
+    def executable(self) -> str:
+        """Name or path of the gnuplot program."""
+        return self._executable
+
+    @property
+    def timeout(self) -> float:
+        """Seconds a job may take before the process is killed."""
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, t: float) -> None:
+        self._timeout = t
+
+    @property
+    def starts(self) -> int:
+        """Number of times the process was started."""
+        return self._starts
+
+    @property
+    def running(self) -> bool:
+        """True if the process is running."""
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> None:
+        """Start the gnuplot process if not running."""
+        if self.running:
+            return
+        if shutil.which(self._executable) is None:
+            raise FileNotFoundError("Plotting requires gnuplot. Install it from\n"
+                                    "http://gnuplot.info")
+        self._process = subprocess.Popen(
+            [self._executable], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, text=True, bufsize=1)
+        self._lines = queue.Queue()  # a new queue, so no line of an old process is read
+        self._reader = threading.Thread(target=self._read, args=(self._process, self._lines),
+                                        daemon=True)
+        self._reader.start()
+        self._starts += 1
+        instrument.count("gnuplot.starts")
+
+    @instrument.timed("gnuplot.run")
+    def run(self, commands: str) -> str:
+        """Run gnuplot commands, then close the output file and wait for
+        the sentinel. Return the messages gnuplot printed meanwhile.
+        If gnuplot exits instead, raise RuntimeError with its messages,
+        or if it takes over `timeout` seconds, kill it and raise
+        TimeoutError; the next job starts a new process."""
+        self.start()
+        assert self._process is not None and self._process.stdin
+        sentinel = SENTINEL + str(next(self._jobs))
+        messages: list[str] = []
+        deadline = time.monotonic() + self._timeout
+        try:
+            self._process.stdin.write(commands.rstrip("\n") + "\nunset output\nset print \"-\"\n"
+                                      + "print " + quote(sentinel) + "\n")
+            self._process.stdin.flush()
+            while True:
+                line = self._lines.get(timeout=max(deadline - time.monotonic(), 0.0))
+                if line is None:  # end of output
+                    break
+                if line.strip() == sentinel:
+                    return "".join(messages)
+                messages.append(line)
+        except BrokenPipeError:
+            pass
+        except queue.Empty:
+            self._process.kill()
+            self.close()
+            instrument.count("gnuplot.timeouts")
+            raise TimeoutError(f"gnuplot took over {self._timeout:g} seconds and was killed:\n"
+                               + "".join(messages)) from None
+        self.close()
+        raise RuntimeError("gnuplot exited during the job:\n" + "".join(messages))
+
+    def close(self) -> None:
+        """End the gnuplot process."""
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        try:
+            process.stdin.close()  # type: ignore[union-attr]
+            process.wait(timeout=5)
+        except (BrokenPipeError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+        if self._reader is not None:
+            self._reader.join(5)
+            self._reader = None
+        process.stdout.close()  # type: ignore[union-attr]
+
+    @staticmethod
+    def _read(process: subprocess.Popen, lines: queue.Queue) -> None:
+        """Put each line gnuplot prints on `lines`, then None at the end."""
+        try:
+            for line in process.stdout:  # type: ignore[union-attr]
+                lines.put(line)
+        except (OSError, ValueError):  # closed meanwhile
+            pass
+        lines.put(None)
+
+
+class GnuplotPool(object):
+    """Pool of GnuplotWorkers, each `reset` between jobs, so plots never
+    wait for gnuplot to start. Safe to use from several threads."""
+
+    def __init__(self, size: int = GNUPLOT_WORKERS, executable: str = GNUPLOT,
+                 timeout: float = GNUPLOT_TIMEOUT) -> None:
+        """Initialize a pool of `size` workers, each killing a job that
+        takes over `timeout` seconds. Processes start on demand."""
+        if size < 1:
+            raise ValueError("Pool size must be 1 or more.")
+        self._workers = [GnuplotWorker(executable, timeout) for _ in range(size)]
+        self._idle: queue.Queue = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    @property
+    def size(self) -> int:
+        """Number of workers."""
+        return len(self._workers)
+
+    @property
+    def workers(self) -> list[GnuplotWorker]:
+        """The workers of the pool."""
+        return self._workers
+
+    def run(self, commands: str) -> str:
+        """Run gnuplot commands on the next idle worker. Return its messages."""
+        worker = self._idle.get()
+        try:
+            return worker.run("reset\n" + commands)
+        finally:
+            self._idle.put(worker)
+
+    def plot(self, gp_filename: str) -> str:
+        """Run a `.gp` commands file from its own directory, so it can
+        name its data and output files relative to it. Return when the
+        output file is complete."""
+        path = os.path.abspath(gp_filename)
+        return self.run("cd " + quote(os.path.dirname(path)) + "\n"
+                        + "load " + quote(os.path.basename(path)) + "\n")
+
+    def plot_all(self, gp_filenames: Iterable[str]) -> list[str]:
+        """Plot `.gp` commands files on all workers at once. Return their messages."""
+        with concurrent.futures.ThreadPoolExecutor(self.size) as pool:
+            return list(pool.map(self.plot, gp_filenames))
+
+    def close(self) -> None:
+        """End the gnuplot processes."""
+        for worker in self._workers:
+            worker.close()
+
+    def __enter__(self) -> "GnuplotPool":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+@functools.lru_cache(maxsize=None)
+def get_pool(size: int = GNUPLOT_WORKERS, executable: str = GNUPLOT) -> GnuplotPool:
+    """Get the shared GnuplotPool of a size and executable, closed at exit."""
+    pool = GnuplotPool(size, executable)
+    atexit.register(pool.close)
+    return pool
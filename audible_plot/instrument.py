@@ -0,0 +1,195 @@
+"""Lightweight named spans and counters to time the stages of a run.
+
+Instrumentation is off unless `enable` is called or the environment
+variable `AUDIBLE_PLOT_TRACE` is set when the module is imported: to
+`1` to record, or to a filename to also export there at exit, as a
+Chrome trace if it ends with `.trace.json`, else as JSON statistics.
+When off, a span costs one flag test and records nothing."""
+import atexit
+import collections
+import functools
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+# Module Constants
+TRACE_ENV: str = "AUDIBLE_PLOT_TRACE"
+CHROME_SUFFIX: str = ".trace.json"
+
+Event = tuple[str, int, int, int, int]  # (name, start ns, duration ns, pid, thread id)
+
+_enabled: bool = False
+_lock = threading.Lock()
+_local = threading.local()
+_states: list[tuple[list, collections.Counter]] = []  # (events, counters) of each thread
+_merged: tuple[list, collections.Counter] = ([], collections.Counter())  # from other processes
+
+
+def enable(on: bool = True) -> None:
+    """Turn recording of spans and counters on or off."""
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    """Get True if recording is on."""
+    return _enabled
+
+
+def _state() -> tuple[list, collections.Counter]:
+    """Get the (events, counters) of this thread, written by it alone."""
+    try:
+        return _local.state
+    except AttributeError:
+        state = _local.state = ([], collections.Counter())
+        with _lock:
+            _states.append(state)
+        return state
+
+
+class _Span(object):
+    """Context manager recording the wall time of a named span."""
+
+    __slots__ = ("_name", "_start")
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    def __enter__(self) -> "_Span":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        end = time.perf_counter_ns()
+        _state()[0].append((self._name, self._start, end - self._start,
+                            os.getpid(), threading.get_ident()))
+
+
+class _NoSpan(object):
+    """Context manager that does nothing, used while recording is off."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str) -> Any:
+    """Get a context manager that records the wall time of its block as
+    a span of `name`, if recording is on."""
+    return _Span(name) if _enabled else _NO_SPAN
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """Decorate a function to record each call as a span of `name`."""
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add `n` to the counter of `name`, if recording is on."""
+    if _enabled:
+        _state()[1][name] += n
+
+
+def _collect() -> tuple[list[Event], collections.Counter]:
+    """Get all events and counter totals of all threads and merged processes."""
+    with _lock:
+        states = list(_states) + [_merged]
+    events: list[Event] = []
+    counters: collections.Counter = collections.Counter()
+    for e, c in states:
+        events.extend(list(e))
+        counters.update(dict(c))
+    return events, counters
+
+
+def drain() -> dict[str, Any]:
+    """Get and remove the events and counters recorded in this process,
+    to pass to `merge` in another process."""
+    events, counters = _collect()
+    reset()
+    return {"events": events, "counters": dict(counters)}
+
+
+def merge(data: dict[str, Any]) -> None:
+    """Add the events and counters drained from another process."""
+    with _lock:
+        _merged[0].extend(tuple(e) for e in data["events"])
+        _merged[1].update(data["counters"])
+
+
+def reset() -> None:
+    """Discard all recorded events and counters."""
+    with _lock:
+        for events, counters in _states + [_merged]:
+            events.clear()
+            counters.clear()
+
+
+def stats() -> dict[str, Any]:
+    """Get the count, total, min, mean and max seconds of each span, with
+    a histogram of counts by power-of-two microseconds, and the counters."""
+    events, counters = _collect()
+    durations: dict[str, list[int]] = collections.defaultdict(list)
+    for name, _, ns, _, _ in events:
+        durations[name].append(ns)
+    spans = {}
+    for name, ns in sorted(durations.items()):
+        histogram: collections.Counter = collections.Counter(
+            (n // 1000).bit_length() for n in ns)
+        spans[name] = {
+            "count": len(ns), "total_s": sum(ns) / 1e9, "min_s": min(ns) / 1e9,
+            "mean_s": sum(ns) / len(ns) / 1e9, "max_s": max(ns) / 1e9,
+            "histogram_us": {f"<{2**b}": histogram[b] for b in sorted(histogram)}}
+    return {"spans": spans, "counters": dict(sorted(counters.items()))}
+
+
+def chrome_trace() -> dict[str, Any]:
+    """Get the spans and counters in Chrome trace event format, for
+    chrome://tracing or Perfetto."""
+    events, counters = _collect()
+    trace: list[dict[str, Any]] = [
+        {"name": name, "ph": "X", "ts": start / 1000, "dur": ns / 1000, "pid": pid, "tid": tid}
+        for name, start, ns, pid, tid in sorted(events, key=lambda e: e[1])]
+    end = max((e[1] + e[2] for e in events), default=time.perf_counter_ns())
+    trace += [{"name": name, "ph": "C", "ts": end / 1000, "pid": os.getpid(),
+               "args": {name: n}} for name, n in sorted(counters.items())]
+    return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+
+def export(filename: str, chrome: Optional[bool] = None) -> None:
+    """Write the statistics as JSON, or a Chrome trace if `chrome`, by
+    default if the filename ends with `.trace.json`."""
+    if chrome is None:
+        chrome = filename.endswith(CHROME_SUFFIX)
+    with open(filename, "w") as f:
+        json.dump(chrome_trace() if chrome else stats(), f, indent=1)
+
+
+def _from_env() -> None:
+    """Turn recording on from the environment variable, and export at exit."""
+    value = os.environ.get(TRACE_ENV, "")
+    if value and value != "0":
+        enable()
+        if value != "1":
+            atexit.register(export, value)
+
+
+_from_env()
@@ -0,0 +1,151 @@
+"""LivePlotData class to hold a sliding window of streaming points."""
+import collections
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from .plotdata import PlotData
+
+
+# Module Constants
+LIVE_WINDOW: int = 1000  # rows in the window by default
+DESCRIPTORS: tuple[str, ...] = ("_xlabel", "_ylabel", "_xdescr", "_ydescr", "_title",
+                                "_description", "_line_labels", "_line_descrs")
+
+
+class LivePlotData(PlotData):
+    """PlotData of the latest `window` rows of a stream of points.
+
+    One producer thread appends rows to a preallocated circular buffer
+    in O(1) per row, keeping the min and max of each column over the
+    window with monotonic deques. Readers take no lock: `points` is a
+    view of the window, and `snapshot` copies a consistent PlotData.
+    Each row is written twice, `capacity` rows apart, so the window is
+    always one contiguous slice of the buffer."""
+
+    def __init__(self, columns: int, window: int = LIVE_WINDOW,
+                 capacity: Optional[int] = None) -> None:
+        """Initialize an empty live plot of `columns`, x first, showing
+        the latest `window` rows, in a buffer of `capacity` rows, twice
+        `window` by default. The rows beyond the window give readers
+        time to copy a snapshot before the producer reuses them."""
+        capacity = 2 * window if capacity is None else capacity
+        if columns < 2:
+            raise ValueError("Columns must be 2 or more.")
+        if not 0 < window < capacity:
+            raise ValueError("Window must be more than 0 and less than capacity.")
+        self._window = window
+        self._capacity = capacity
+        self._buffer = np.full((2 * capacity, columns), np.nan)
+        self._count = 0  # rows appended, advanced by the producer only
+        self._lows: list[collections.deque] = [collections.deque() for _ in range(columns)]
+        self._highs: list[collections.deque] = [collections.deque() for _ in range(columns)]
+        empty = np.full(columns, np.nan)
+        self._published = (0, empty, empty)  # (count, mins, maxs), replaced whole
+        super().__init__(self._buffer[:0], (empty, empty))
+
+    @property
+    def points(self) -> np.ndarray:
+        """View of the rows in the window, oldest first. It may change
+        under the reader as rows arrive. Use `snapshot` for a copy."""
+        return self._points
+
+    @points.setter
+    def points(self, p: np.ndarray) -> None:
+        """Replace the stream with the rows of `p`, keeping the latest `window`."""
+        self.clear()
+        self.extend(p)
+
+    @property
+    def window(self) -> int:
+        """Most rows in the window."""
+        return self._window
+
+    @property
+    def capacity(self) -> int:
+        """Rows of the circular buffer."""
+        return self._capacity
+
+    @property
+    def count(self) -> int:
+        """Rows appended since the stream started."""
+        return self._published[0]
+
+    def append(self, row: Union[Iterable[float], np.ndarray]) -> None:
+        """Append a row of points, x first. Call from the producer only."""
+        self._push(np.asarray(row, dtype=np.float64))
+        self._publish()
+
+    def extend(self, rows: np.ndarray) -> None:
+        """Append rows of points, publishing them together. Call from
+        the producer only."""
+        for row in np.atleast_2d(np.asarray(rows, dtype=np.float64)):
+            self._push(row)
+        self._publish()
+
+    def clear(self) -> None:
+        """Discard all rows. Call from the producer only."""
+        self._count = 0
+        for d in self._lows + self._highs:
+            d.clear()
+        self._publish()
+
+    def update_points(self, rows: Union[int, slice, np.ndarray], values: np.ndarray) -> None:
+        """Rows of a live plot are only appended, never updated, as
+        readers copy them without a lock."""
+        raise TypeError("LivePlotData is append-only. Use append or extend.")
+
+    def snapshot(self) -> PlotData:
+        """Get a PlotData copy of the window and its limits, consistent
+        with each other, without locking out the producer. Retry the
+        copy if the producer reused any of its rows meanwhile."""
+        while True:
+            count, mins, maxs = self._published
+            n = min(count, self._window)
+            start = (count - n) % self._capacity
+            rows = self._buffer[start:start + n].copy()
+            if self._count < count - n + self._capacity:  # no row copied was rewritten
+                break
+        pd = PlotData(rows, (mins, maxs))
+        for name in DESCRIPTORS:
+            setattr(pd, name, getattr(self, name))
+        if not self._auto_xrange:
+            pd.xrange = self._xrange
+        if not self._auto_yrange:
+            pd.yrange = self._yrange
+        return pd
+
+    def _push(self, row: np.ndarray) -> None:
+        """Write a row into the buffer and the running min and max of
+        each column, without publishing it."""
+        k = self._count
+        slot = k % self._capacity
+        self._buffer[slot] = row
+        self._buffer[slot + self._capacity] = row
+        oldest = k - self._window  # row leaving the window
+        for low, high, v in zip(self._lows, self._highs, row.tolist()):
+            if v == v:  # NaN is left out of the limits
+                while low and low[-1][1] >= v:
+                    low.pop()
+                low.append((k, v))
+                while high and high[-1][1] <= v:
+                    high.pop()
+                high.append((k, v))
+            if low and low[0][0] <= oldest:
+                low.popleft()
+            if high and high[0][0] <= oldest:
+                high.popleft()
+        self._count = k + 1
+
+    def _publish(self) -> None:
+        """Show readers the rows pushed so far: the window view, the
+        limits and ranges, and the snapshot state in one assignment."""
+        count = self._count
+        n = min(count, self._window)
+        start = (count - n) % self._capacity
+        mins = np.array([low[0][1] if low else np.nan for low in self._lows])
+        maxs = np.array([high[0][1] if high else np.nan for high in self._highs])
+        self._points = self._buffer[start:start + n]
+        self._version += 1
+        self.limits = (mins, maxs)
+        self._published = (count, mins, maxs)
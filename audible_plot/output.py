@@ -0,0 +1,303 @@
+"""Persistent low-latency audio output that mixes queued clips and streams."""
+import collections
+import itertools
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from . import instrument
+from .synth import SAMPLE_RATE, sd, tone_samples
+
+
+# Module Constants
+OUTPUT_BLOCK_SIZE: int = 256
+RING_SECONDS: float = 2.0
+
+
+class RingBuffer(object):
+    """Single-producer, single-consumer ring of float32 sample frames.
+
+    The producer only advances the write count and the consumer only
+    advances the read count, so neither side takes a lock."""
+
+    def __init__(self, capacity: int, channels: int = 1) -> None:
+        """Initialize an empty ring holding up to `capacity` frames."""
+        self._buffer = np.zeros((capacity, channels), dtype=np.float32)
+        self._capacity = capacity
+        self._written = 0  # total frames written, advanced by the producer only
+        self._read = 0  # total frames read, advanced by the consumer only
+
+    @property
+    def capacity(self) -> int:
+        """Most frames the ring can hold."""
+        return self._capacity
+
+    @property
+    def available(self) -> int:
+        """Frames written and not yet read."""
+        return self._written - self._read
+
+    @property
+    def space(self) -> int:
+        """Frames that can be written without overwriting unread frames."""
+        return self._capacity - self.available
+
+    def write(self, samples: np.ndarray) -> int:
+        """Write as many frames as fit, without blocking. Return the count."""
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.ndim == 1:
+            samples = samples[:, np.newaxis]
+        n = min(len(samples), self.space)
+        start = self._written % self._capacity
+        first = min(n, self._capacity - start)
+        self._buffer[start:start + first] = samples[:first]
+        self._buffer[:n - first] = samples[first:n]
+        self._written += n
+        return n
+
+    def read(self, out: np.ndarray) -> int:
+        """Add up to len(out) frames into `out`. Return the count."""
+        n = min(len(out), self.available)
+        start = self._read % self._capacity
+        first = min(n, self._capacity - start)
+        out[:first] += self._buffer[start:start + first]
+        out[first:n] += self._buffer[:n - first]
+        self._read += n
+        return n
+
+    def clear(self) -> None:
+        """Discard the unread frames. Call from the consumer side only."""
+        self._read = self._written
+
+
+class AudioOutput(object):
+    """Long-lived output stream whose callback mixes queued clips and
+    a streaming RingBuffer, so callers never wait for playback.
+
+    Clips are queued as commands on a deque and started by the
+    callback, which lets a new clip interrupt the playing ones, cut at
+    once or faded out."""
+
+    def __init__(self, rate: int = SAMPLE_RATE, channels: int = 1,
+                 block_size: int = OUTPUT_BLOCK_SIZE, device: Any = None) -> None:
+        """Initialize the output. The stream opens on `start`."""
+        self._rate = rate
+        self._channels = channels
+        self._block_size = block_size
+        self._device = device
+        self._stream: Any = None
+        self._ring = RingBuffer(int(RING_SECONDS * rate), channels)
+        self._commands: collections.deque = collections.deque()
+        # id: [clip, position, gain, fade left, fade], callback side only
+        self._voices: dict[int, list] = {}
+        self._ids = itertools.count(1)
+        self._mix = np.zeros((block_size, channels), dtype=np.float32)
+        self._ring_playing = False
+        self._underruns = 0
+        self._latency: Optional[float] = None
+        self._frames = 0
+
+    @property
+    def rate(self) -> int:
+        """Sample rate in samples per second."""
+        return self._rate
+
+    @property
+    def channels(self) -> int:
+        """Number of output channels."""
+        return self._channels
+
+    @property
+    def ring(self) -> RingBuffer:
+        """RingBuffer of streamed frames mixed into the output."""
+        return self._ring
+
+    @property
+    def underruns(self) -> int:
+        """Number of callbacks that ran short of device or streamed frames."""
+        return self._underruns
+
+    @property
+    def frames(self) -> int:
+        """Number of frames output since the output was created."""
+        return self._frames
+
+    @property
+    def latency(self) -> float:
+        """Output latency in seconds, as measured by the last callback,
+        or else as reported by the device."""
+        if self._latency is not None:
+            return self._latency
+        if self._stream is not None:
+            return float(self._stream.latency)
+        return self._block_size / self._rate
+
+    @property
+    def playing(self) -> int:
+        """Number of clips playing."""
+        return len(self._voices)
+
+    def start(self) -> None:
+        """Open and start the device stream."""
+        if sd is None:
+            raise ImportError("Audio output requires sounddevice. Use\npip install sounddevice")
+        if self._stream is None:
+            self._stream = sd.OutputStream(
+                samplerate=self._rate, channels=self._channels, blocksize=self._block_size,
+                dtype="float32", latency="low", device=self._device, callback=self.callback)
+            self._stream.start()
+
+    def close(self) -> None:
+        """Stop and close the device stream."""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def __enter__(self) -> "AudioOutput":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def play(self, clip: np.ndarray, gain: float = 1.0, interrupt: bool = False,
+             fade: float = 0.0) -> int:
+        """Queue a clip of samples (frames, or frames by channels) to mix
+        into the output, stopping the playing clips if `interrupt`, faded
+        out over `fade` milliseconds. Return the id of the clip."""
+        clip = np.asarray(clip, dtype=np.float32)
+        if clip.ndim == 1:
+            clip = clip[:, np.newaxis]
+        voice = next(self._ids)
+        self._commands.append(("play", voice, clip, gain, interrupt,
+                               tone_samples(fade, self._rate)))
+        return voice
+
+    def stop(self, voice: Optional[int] = None, fade: float = 0.0) -> None:
+        """Stop a clip by id, or all clips and the streamed frames, with
+        the clips faded out over `fade` milliseconds."""
+        self._commands.append(("stop", voice, tone_samples(fade, self._rate)))
+
+    def write(self, samples: np.ndarray) -> int:
+        """Write streamed samples to the ring without blocking. Return the count."""
+        return self._ring.write(samples)
+
+    @instrument.timed("audio.callback")
+    def callback(self, outdata: np.ndarray, frames: int, time_info: Any, status: Any) -> None:
+        """Fill `outdata` with the next frames. Called by the device stream."""
+        if status is not None and status.output_underflow:
+            self._underruns += 1
+            instrument.count("audio.underruns")
+        if time_info is not None:
+            self._latency = time_info.outputBufferDacTime - time_info.currentTime
+        while self._commands:
+            self._command(self._commands.popleft())
+
+        if len(self._mix) < frames:
+            self._mix = np.zeros((frames, self._channels), dtype=np.float32)
+        mix = self._mix[:frames]
+        mix.fill(0.0)
+        n = self._ring.read(mix)
+        if n:
+            self._ring_playing = True
+        if self._ring_playing and n < frames:
+            self._ring_playing = False
+            if n:
+                self._underruns += 1
+                instrument.count("audio.underruns")
+
+        for voice, v in list(self._voices.items()):
+            clip, pos, gain, left, fade = v
+            k = min(frames, len(clip) - pos)
+            if left is None:
+                mix[:k] += clip[pos:pos + k] * gain
+            else:
+                k = min(k, left)
+                ramp = (left - np.arange(k, dtype=np.float32)) * np.float32(gain / fade)
+                mix[:k] += clip[pos:pos + k] * ramp[:, np.newaxis]
+                v[3] = left - k
+            v[1] = pos + k
+            if v[1] >= len(clip) or v[3] == 0:
+                del self._voices[voice]
+
+        np.clip(mix, -1.0, 1.0, out=outdata)
+        self._frames += frames
+
+    def _command(self, cmd: tuple) -> None:
+        """Apply a queued command on the callback side."""
+        if cmd[0] == "play":
+            _, voice, clip, gain, interrupt, fade = cmd
+            if interrupt:
+                for v in list(self._voices):
+                    self._cut(v, fade)
+            self._voices[voice] = [clip, 0, gain, None, 0]
+        else:
+            _, voice, fade = cmd
+            if voice is None:
+                for v in list(self._voices):
+                    self._cut(v, fade)
+                self._ring.clear()
+            elif voice in self._voices:
+                self._cut(voice, fade)
+
+    def _cut(self, voice: int, fade: int) -> None:
+        """Stop a playing clip at once, or fade it out over `fade` frames."""
+        v = self._voices[voice]
+        if not fade:
+            del self._voices[voice]
+        elif v[3] is None:
+            v[3] = v[4] = fade
+        elif v[3] > fade:  # fading already: end sooner from the same level
+            v[3], v[4] = fade, fade * v[4] / v[3]
+
+
+class NullStream(object):
+    """Stand-in for the device stream of an AudioOutput, which calls
+    its callback from a thread at the pace of real playback and passes
+    each block of frames to `sink`, or discards it. Use it to run and
+    time the output without an audio device."""
+
+    def __init__(self, output: AudioOutput, block_size: int = OUTPUT_BLOCK_SIZE,
+                 sink: Optional[Callable[[np.ndarray, float], None]] = None) -> None:
+        """Initialize a stream of `output` in blocks of `block_size` frames,
+        each passed to `sink` with the `time.perf_counter` of its callback."""
+        self._output = output
+        self._block_size = block_size
+        self._sink = sink
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start calling back in a thread."""
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        """Stop calling back."""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "NullStream":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        """Call back once per block period until closed."""
+        outdata = np.empty((self._block_size, self._output.channels), dtype=np.float32)
+        period = self._block_size / self._output.rate
+        due = time.perf_counter()
+        while not self._stopped.is_set():
+            self._output.callback(outdata, self._block_size, None, None)
+            if self._sink is not None:
+                self._sink(outdata, time.perf_counter())
+            due += period
+            self._stopped.wait(max(0.0, due - time.perf_counter()))
@@ -0,0 +1,142 @@
+"""Parallel rendering of plot audio in worker processes over shared memory."""
+import concurrent.futures
+from multiprocessing import shared_memory
+from typing import Any, Optional
+
+import numpy as np
+
+from . import instrument
+
+
+# Module Constants
+TASKS_PER_PROCESS: int = 2
+
+ArraySpec = tuple  # ("shm", name, shape, dtype) or ("file", filename, offset, shape, dtype)
+
+
+class SharedArray(object):
+    """NumPy array in a block of shared memory, unlinked on close."""
+
+    def __init__(self, shape: tuple, dtype: Any) -> None:
+        """Create a zeroed shared array."""
+        dtype = np.dtype(dtype)
+        nbytes = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._array = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf)
+
+    @property
+    def array(self) -> np.ndarray:
+        """The shared array."""
+        return self._array
+
+    def spec(self) -> ArraySpec:
+        """Get the picklable spec to attach to the array in a worker."""
+        return ("shm", self._shm.name, self._array.shape, self._array.dtype.str)
+
+    def close(self) -> None:
+        """Release and unlink the shared memory."""
+        del self._array
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedArray":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def attach(spec: ArraySpec) -> tuple[np.ndarray, Optional[shared_memory.SharedMemory]]:
+    """Attach to a shared array or memory-mapped file from its spec.
+    Return the array and the shared memory to close after use, if any."""
+    if spec[0] == "file":
+        _, filename, offset, shape, dtype = spec
+        return np.memmap(filename, dtype=dtype, mode="r+", offset=offset, shape=shape), None
+    _, name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf), shm
+
+
+def render_task(pa_type: type, settings: dict, pd_type: type, pd_state: dict,
+                points: ArraySpec, out: ArraySpec, line: int, first: int,
+                last: int) -> Optional[dict]:
+    """Render points `first` to before `last` of a line in a worker
+    process, writing straight into the shared output. Return the
+    instrument spans and counters recorded meanwhile, if recording."""
+    point_array, point_handle = attach(points)
+    out_array, out_handle = attach(out)
+    try:
+        with instrument.span("parallel.render_task"):
+            _render_points(pa_type, settings, pd_type, pd_state, point_array, out_array,
+                           line, first, last)
+        if isinstance(out_array, np.memmap):
+            out_array.flush()
+    finally:
+        del point_array, out_array
+        for handle in (point_handle, out_handle):
+            if handle is not None:
+                handle.close()
+    return instrument.drain() if instrument.enabled() else None
+
+
+def _render_points(pa_type: type, settings: dict, pd_type: type, pd_state: dict,
+                   points: np.ndarray, out: np.ndarray, line: int, first: int, last: int) -> None:
+    """Rebuild the PlotAudio and PlotData around the shared points and render."""
+    pd = pd_type.__new__(pd_type)
+    pd.__dict__.update(pd_state)
+    pd._points = points
+    pa = pa_type.__new__(pa_type)
+    pa.__dict__.update(settings)
+    pa._plotdata = pd
+    pa._decimated = None
+    pa.render_points(out, first, last, line)
+
+
+def point_ranges(samples: np.ndarray, parts: int) -> list[tuple[int, int]]:
+    """Split points into up to `parts` ranges of about equal frames."""
+    onsets = np.concatenate(([0], np.cumsum(samples)))
+    bounds = np.searchsorted(onsets, np.linspace(0, onsets[-1], parts + 1), side="left")
+    bounds = np.unique(np.clip(bounds, 0, len(samples)))
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def render_parallel(pa: Any, out: np.ndarray, filename: Optional[str] = None,
+                    offset: int = 0) -> None:
+    """Render a PlotAudio into `out`, frames by channels, split by line
+    and point range across `pa.processes` worker processes. The points
+    are shared, not pickled, and each worker writes its own frames of
+    the output in place: the memory-mapped `filename` if given, else a
+    shared array copied into `out`. The samples are bit-identical to
+    the serial render."""
+    pd = pa.render_data()
+    settings = {k: v for k, v in pa.__dict__.items() if k not in ("_plotdata", "_decimated")}
+    settings["_processes"] = 1
+    pd_state = {k: v for k, v in pd.__dict__.items() if k != "_points"}
+    lines = [0] if pa.polyphonic else list(range(pd.ysize()))
+    parts = max(1, pa.processes * TASKS_PER_PROCESS // len(lines))
+    ranges = point_ranges(pa.point_samples(), parts)
+
+    with SharedArray(pd.points.shape, np.float64) as points:
+        points.array[...] = pd.points
+        shared: Optional[SharedArray] = None
+        if filename is not None:
+            out_spec: ArraySpec = ("file", filename, offset, out.shape, out.dtype.str)
+        else:
+            shared = SharedArray(out.shape, out.dtype)
+            out_spec = shared.spec()
+        try:
+            # forked workers start with a copy of the recordings, so discard it
+            with concurrent.futures.ProcessPoolExecutor(
+                    pa.processes, initializer=instrument.reset) as pool:
+                futures = [pool.submit(render_task, type(pa), settings, type(pd), pd_state,
+                                       points.spec(), out_spec, line, first, last)
+                           for line in lines for first, last in ranges]
+                for future in futures:
+                    recorded = future.result()
+                    if recorded is not None:
+                        instrument.merge(recorded)
+            if shared is not None:
+                out[...] = shared.array
+        finally:
+            if shared is not None:
+                shared.close()
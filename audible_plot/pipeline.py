@@ -0,0 +1,178 @@
+"""PlotPipeline to make the visual, tone and speech plot files at once."""
+import asyncio
+import functools
+import os
+import time
+from typing import Any, Callable, Optional, Sequence
+
+from . import instrument
+from .gnuplot import GnuplotPool, get_pool
+from .plotaudio import PlotAudio
+from .plotdata import PlotData
+from .plotvisual import PlotVisual
+from .speech import find_engine
+
+
+# Module Constants
+PANDOC: str = "pandoc"
+DOC_TYPES: tuple[str, ...] = ("html", "pdf")
+
+
+def describe(pd: PlotData) -> str:
+    """Get the text spoken to describe a plot: its title, description,
+    axis labels and ranges, and line labels."""
+    (xlo, xhi), (ylo, yhi) = pd.xrange, pd.yrange
+    text = f"{pd.title}. "
+    if pd.description:
+        text += pd.description.rstrip(".") + ". "
+    text += (f"The x axis is {pd.xlabel} from {xlo:g} to {xhi:g}. "
+             f"The y axis is {pd.ylabel} from {ylo:g} to {yhi:g}.")
+    if pd.ysize() > 1:
+        text += " The lines are " + ", ".join(pd.line_labels) + "."
+    return text
+
+
+class PlotPipeline(object):
+    """Class to make the files of the `plot` flow, running the visual
+    plot with gnuplot, the tone audio and the spoken description with a
+    speech engine all at once, then the document with pandoc when they
+    are ready. The wall time of each stage is kept in `timings`."""
+
+    def __init__(self, pd: PlotData, output: str = "plot", doctype: str = "html",
+                 pool: Optional[GnuplotPool] = None, speech: Optional[Sequence[str]] = None,
+                 pandoc: str = PANDOC) -> None:
+        """Initialize a pipeline writing files named from `output`, with
+        gnuplot from `pool`, speech from the `speech` engine command, by
+        default the installed one, and the `pandoc` executable. The
+        shared pool is used if `pool` is None."""
+        if doctype not in DOC_TYPES:
+            raise ValueError(f"Document type must be one of {DOC_TYPES}, not {doctype}.")
+        self._plotdata = pd
+        self._visual = PlotVisual(pd)
+        self._audio = PlotAudio(pd)
+        self._visual.output = self._audio.output = output
+        self._output = output
+        self._doctype = doctype
+        self._pool = pool if pool is not None else get_pool()
+        self._speech = tuple(speech) if speech is not None else find_engine()
+        self._pandoc = pandoc
+        self._timings: dict[str, float] = {}
+
+    @property
+    def visual(self) -> PlotVisual:
+        """PlotVisual of the visual plot stage."""
+        return self._visual
+
+    @property
+    def audio(self) -> PlotAudio:
+        """PlotAudio of the tone stage."""
+        return self._audio
+
+    @property
+    def timings(self) -> dict[str, float]:
+        """Wall seconds of each stage of the last run, and in total."""
+        return self._timings
+
+    def text_filename(self) -> str:
+        """Get the spoken description filename from `output` and `.txt`."""
+        return self._output + ".txt"
+
+    def speech_filename(self) -> str:
+        """Get the spoken description audio filename from `output` and `-speech.wav`."""
+        return self._output + "-speech.wav"
+
+    def md_filename(self) -> str:
+        """Get the markdown document filename from `output` and `.md`."""
+        return self._output + ".md"
+
+    def doc_filename(self) -> str:
+        """Get the document filename from `output` and the `doctype`."""
+        return self._output + "." + self._doctype
+
+    def plot(self) -> dict[str, float]:
+        """Run the pipeline to completion. Return the `timings`."""
+        return asyncio.run(self.run())
+
+    async def run(self) -> dict[str, float]:
+        """Run the visual, tone and speech stages at once, then the
+        document stage. If any stage fails, cancel the others and raise
+        its exception. Return the `timings`."""
+        self._timings = {}
+        start = time.perf_counter()
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(self._stage("visual", self._run_visual))
+                group.create_task(self._stage("tones", self._run_tones))
+                group.create_task(self._stage("speech", self._run_speech))
+        except ExceptionGroup as eg:
+            raise eg.exceptions[0] from eg
+        await self._stage("document", self._run_document)
+        self._timings["total"] = time.perf_counter() - start
+        return self._timings
+
+    async def _stage(self, name: str, run: Callable[[], Any]) -> None:
+        """Run a stage coroutine function, timing it."""
+        start = time.perf_counter()
+        with instrument.span("pipeline." + name):
+            await run()
+        self._timings[name] = time.perf_counter() - start
+
+    async def _in_thread(self, func: Callable, *args: Any) -> Any:
+        """Run a blocking function in the default executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args))
+
+    async def _run_visual(self) -> None:
+        """Write the plot data and commands, and plot them with gnuplot."""
+        await self._in_thread(self._visual.write_data)
+        await self._in_thread(self._visual.write_gp)
+        await self._in_thread(self._visual.plot_gp, self._pool)
+
+    async def _run_tones(self) -> None:
+        """Render the tones to the `.wav` file."""
+        await self._in_thread(self._audio.write_wav)
+
+    async def _run_speech(self) -> None:
+        """Write the description text and speak it to a `.wav` file."""
+        if self._speech is None:
+            raise FileNotFoundError("Speech requires espeak-ng, espeak or say. Install one.")
+        text = describe(self._plotdata)
+        with open(self.text_filename(), "w") as f:
+            f.write(text + "\n")
+        await self._exec("speech", *[arg.format(wav=self.speech_filename(), rate=self._audio.rate,
+                                                text=text) for arg in self._speech])
+
+    async def _run_document(self) -> None:
+        """Write the markdown document and convert it with pandoc."""
+        pd = self._plotdata
+        with open(self.md_filename(), "w") as f:
+            f.write(self.markdown())
+        await self._exec("document", self._pandoc, os.path.basename(self.md_filename()),
+                         "--standalone", "--metadata", "title=" + pd.title,
+                         "-o", os.path.basename(self.doc_filename()),
+                         cwd=os.path.dirname(self.md_filename()) or None)
+
+    def markdown(self) -> str:
+        """Get the markdown document of the plot: the description, the
+        image, and links to the tone and speech audio."""
+        pd = self._plotdata
+        image = os.path.basename(self._visual.out_filename())
+        return (f"{pd.description}\n\n" if pd.description else "") + (
+            f"![{pd.title}]({image})\n\n"
+            f"- [Plot tones]({os.path.basename(self._audio.wav_filename())})\n"
+            f"- [Spoken description]({os.path.basename(self.speech_filename())})\n\n"
+            f"{describe(pd)}\n")
+
+    async def _exec(self, stage: str, *args: str, cwd: Optional[str] = None) -> None:
+        """Run a program, raising RuntimeError if it fails."""
+        process = await asyncio.create_subprocess_exec(
+            *args, cwd=cwd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+        try:
+            out, _ = await process.communicate()
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+        if process.returncode != 0:
+            raise RuntimeError(f"The {stage} stage failed, {args[0]} exited with "
+                               f"{process.returncode}:\n{out.decode(errors='replace')}")
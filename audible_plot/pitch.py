@@ -0,0 +1,285 @@
+"""Pitch classes to convert between MIDI numbers, frequencies and note names."""
+import math
+import sys
+from typing import Any, Iterable, Iterator, Union
+
+import numpy as np
+
+
+# Module Constants
+MIDI_A440: int = 69
+MIDI_MIN: int = 12
+MIDI_MAX: int = 128
+FREQ_A440: int = 440
+FREQ_MAX: int = 22000
+NOTES_PER_OCT: int = 12
+NOTE_A440: str = "A4"
+NOTE_LETTERS = "CDEFGAB"
+NOTE_OCTAVE_DIGITS = "0123456789"
+NOTE_ACCIDENTALS = "#b+-♯♭"
+NOTE_SHARPS = "#+♯"
+NOTE_FLATS = "b-♭"
+NOTE_OFFSETS: dict[str, int] = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+NOTE_NAMES_OCT: tuple[str, ...] = (
+    "C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B")
+
+
+def midi2freq(m: float) -> float:
+    """Convert a float MIDI number to a frequency in hertz."""
+    return FREQ_A440 * 2.0 ** ((m - MIDI_A440) / NOTES_PER_OCT)
+
+
+def freq2midi(f: float) -> float:
+    """Convert a frequency in hertz to a float MIDI number."""
+    return NOTES_PER_OCT * math.log2(f / FREQ_A440) + MIDI_A440
+
+
+def note2midi(note_str: str) -> int:
+    """Convert a note string like 'A4', 'C#4' or 'Eb3' to an int MIDI number."""
+    if not 2 <= len(note_str) <= 3:
+        raise ValueError(f"Note string {note_str!r} must be like 'A4' or 'C#4'.")
+    letter, octave = note_str[0], note_str[-1]
+    if letter not in NOTE_LETTERS or octave not in NOTE_OCTAVE_DIGITS:
+        raise ValueError(f"Note string {note_str!r} must be like 'A4' or 'C#4'.")
+    m = NOTES_PER_OCT * (int(octave) + 1) + NOTE_OFFSETS[letter]
+    if len(note_str) == 3:
+        accidental = note_str[1]
+        if accidental in NOTE_SHARPS:
+            m += 1
+        elif accidental in NOTE_FLATS:
+            m -= 1
+        else:
+            raise ValueError(f"Note accidental {accidental!r} must be one of {NOTE_ACCIDENTALS!r}.")
+    return m
+
+
+def midi2note(m: int) -> str:
+    """Convert an int MIDI number to a note string like 'A4' or 'C#4'."""
+    return NOTE_NAMES_OCT[m % NOTES_PER_OCT] + str(m // NOTES_PER_OCT - 1)
+
+
+# Lookup tables, so Pitch does no string work per note.
+NOTE_NAMES: tuple[str, ...] = tuple(sys.intern(midi2note(m)) for m in range(MIDI_MAX))
+NOTE_MIDIS: dict[str, int] = {}
+for _letter in NOTE_LETTERS:
+    for _accidental in ("",) + tuple(NOTE_ACCIDENTALS):
+        for _octave in NOTE_OCTAVE_DIGITS:
+            _name = _letter + _accidental + _octave
+            _m = note2midi(_name)
+            if MIDI_MIN <= _m < MIDI_MAX:
+                NOTE_MIDIS[sys.intern(_name)] = _m
+del _letter, _accidental, _octave, _name, _m
+
+
+class Pitch(object):
+    """A pitch, stored as a float MIDI number, with MIDI, frequency and note views."""
+
+    __slots__ = ("_midi",)
+
+    def __init__(self, value: Any = None) -> None:
+        """Initialize a pitch from a MIDI number, frequency, note or Pitch."""
+        if isinstance(value, str):
+            m = NOTE_MIDIS.get(value)
+            if m is not None:
+                self._midi = float(m)
+            elif not value:
+                del self.midi
+            else:
+                try:
+                    number = float(value)
+                except ValueError:
+                    self.note = value
+                else:
+                    self._init_number(number)
+        elif isinstance(value, Pitch):
+            self._midi = value.midi
+        elif value is None or isinstance(value, tuple):
+            self.note = value if value else NOTE_A440
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            self._init_number(value)
+        else:
+            raise TypeError("value must be tuple, string, float, int or Pitch.")
+
+    def _init_number(self, value: Union[int, float]) -> None:
+        """Interpret a number as a MIDI number or, when large, a frequency."""
+        if value == 0:
+            del self.midi
+        elif value < MIDI_MAX:
+            self.midi = value
+        elif value <= FREQ_MAX:
+            self.freq = value
+        else:
+            raise ValueError(f"{value} is neither a MIDI number nor an audible frequency.")
+
+    # Getter and Setter of midi (same as internal _midi)
+    @property
+    def midi(self) -> float:
+        "float MIDI number of pitch."
+        return self._midi
+
+    @midi.setter
+    def midi(self, m: Union[int, float]) -> None:
+        if not MIDI_MIN <= m < MIDI_MAX:
+            raise ValueError(f"MIDI number {m} must be from {MIDI_MIN} to below {MIDI_MAX}.")
+        self._midi = float(m)
+
+    @midi.deleter
+    def midi(self) -> None:
+        self._midi = float(MIDI_A440)
+
+    # Getter and Setter of frequency
+    @property
+    def freq(self) -> float:
+        "float frequency of pitch in hertz."
+        return midi2freq(self._midi)
+
+    @freq.setter
+    def freq(self, f: Union[int, float]) -> None:
+        if not 0 < f <= FREQ_MAX:
+            raise ValueError(f"Frequency {f} must be above 0 and at most {FREQ_MAX} hertz.")
+        self.midi = freq2midi(f)
+
+    @freq.deleter
+    def freq(self) -> None:
+        del self.midi
+
+    # Getter and Setter of note string
+    @property
+    def note(self) -> tuple[str, float]:
+        "pitch as tuple of note string and bend float, '' and NaN for no pitch."
+        if math.isnan(self._midi):
+            return ("", math.nan)
+        m = int(self._midi)
+        return (NOTE_NAMES[m], self._midi - m)
+
+    @note.setter
+    def note(self, n: Union[tuple, str]) -> None:
+        if isinstance(n, tuple):
+            note_str, note_bend = n  # unpack tuple
+        else:
+            note_str, note_bend = n, 0.0
+        if not isinstance(note_str, str):
+            raise TypeError("Note string must be a string like 'A4'.")
+        if not isinstance(note_bend, (int, float)):
+            raise TypeError("Note bend must be a float like 0.0.")
+        if not 0.0 <= note_bend < 1.0:
+            raise ValueError("Note bend must 0.0 or between 0.0 and 1.0.")
+        m = NOTE_MIDIS.get(note_str)
+        if m is None:
+            note2midi(note_str)  # raises ValueError describing the bad note
+            raise ValueError(f"Note {note_str!r} is outside MIDI {MIDI_MIN} to {MIDI_MAX - 1}.")
+        self.midi = m + note_bend
+
+    @note.deleter
+    def note(self) -> None:
+        del self.midi
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Pitch):
+            return self._midi == other._midi
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._midi)
+
+    def __str__(self) -> str:
+        """Return string of note and bend, if any, or '' for no pitch."""
+        n = self.note
+        return n[0] + "+" + str(n[1]) if n[0] and n[1] else n[0]
+
+    def __repr__(self) -> str:
+        """Return representation of Pitch."""
+        return type(self).__name__ + "(" + repr(self._midi) + ")"
+
+
+_NOTE_NAME_ARRAY: np.ndarray = np.array(NOTE_NAMES)
+
+
+class PitchArray(object):
+    """An array of pitches, stored as a NumPy float64 array of MIDI numbers.
+
+    Each conversion works on the whole array at once, so a column of
+    plot points becomes tones without a Pitch object per point."""
+
+    __slots__ = ("_midi",)
+
+    def __init__(self, midi: Any = ()) -> None:
+        """Initialize from an array-like of MIDI numbers or another PitchArray."""
+        if isinstance(midi, PitchArray):
+            self._midi = midi._midi.copy()
+        else:
+            self.midi = midi
+
+    @classmethod
+    def from_freq(cls, f: Any) -> "PitchArray":
+        """Make a PitchArray from an array-like of frequencies in hertz."""
+        pa = cls()
+        pa.freq = f
+        return pa
+
+    @classmethod
+    def from_notes(cls, notes: Iterable[Union[tuple, str]]) -> "PitchArray":
+        """Make a PitchArray from note strings or (note, bend) tuples."""
+        return cls([Pitch(n).midi for n in notes])
+
+    @classmethod
+    def from_pitches(cls, pitches: Iterable[Pitch]) -> "PitchArray":
+        """Make a PitchArray from Pitch objects."""
+        return cls([p.midi for p in pitches])
+
+    # Getter and Setter of midi (same as internal _midi)
+    @property
+    def midi(self) -> np.ndarray:
+        "float64 array of MIDI numbers of the pitches, NaN for no pitch."
+        return self._midi
+
+    @midi.setter
+    def midi(self, m: Any) -> None:
+        m = np.array(m, dtype=np.float64)
+        if np.any((m < MIDI_MIN) | (m >= MIDI_MAX)):
+            raise ValueError(f"MIDI numbers must be from {MIDI_MIN} to below {MIDI_MAX}.")
+        self._midi = m
+
+    # Getter and Setter of frequency
+    @property
+    def freq(self) -> np.ndarray:
+        "float64 array of frequencies of the pitches in hertz."
+        return FREQ_A440 * np.exp2((self._midi - MIDI_A440) / NOTES_PER_OCT)
+
+    @freq.setter
+    def freq(self, f: Any) -> None:
+        f = np.asarray(f, dtype=np.float64)
+        if np.any((f <= 0) | (f > FREQ_MAX)):
+            raise ValueError(f"Frequencies must be above 0 and at most {FREQ_MAX} hertz.")
+        self.midi = NOTES_PER_OCT * np.log2(f / FREQ_A440) + MIDI_A440
+
+    # Getter of note strings
+    @property
+    def note(self) -> tuple[np.ndarray, np.ndarray]:
+        "pitches as tuple of note string array and bend float array, '' and NaN for no pitch."
+        m = np.floor(self._midi)
+        finite = np.isfinite(m)
+        im = np.where(finite, m, MIDI_MIN).astype(np.intp)
+        return (np.where(finite, _NOTE_NAME_ARRAY[im], ""), self._midi - m)
+
+    def __len__(self) -> int:
+        return len(self._midi)
+
+    def __getitem__(self, index: Any) -> Union[Pitch, "PitchArray"]:
+        """Return a Pitch for a single index or a PitchArray for a slice."""
+        m = self._midi[index]
+        if np.ndim(m) == 0:
+            p = Pitch.__new__(Pitch)
+            p._midi = float(m)
+            return p
+        pa = PitchArray.__new__(PitchArray)
+        pa._midi = m
+        return pa
+
+    def __iter__(self) -> Iterator[Union[Pitch, "PitchArray"]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self) -> str:
+        """Return representation of PitchArray."""
+        return type(self).__name__ + "(" + repr(self._midi.tolist()) + ")"
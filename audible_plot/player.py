@@ -0,0 +1,343 @@
+"""Player to explore a plot by key presses, hearing tones and speech."""
+import asyncio
+import collections
+import concurrent.futures
+import enum
+import functools
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+try:
+    import keyboard
+except (ImportError, OSError):
+    keyboard = None
+
+import numpy as np
+
+from . import instrument
+from .output import AudioOutput
+from .pipeline import describe
+from .plotdata import PlotData
+from .prefetch import POINT_DURATION, Prefetcher
+from .speech import SpeechBank
+from .synth import FADE
+from .tonecache import ToneCache
+
+
+# Module Constants
+DECILE_KEYS: str = "~1234567890"  # keys of the 0%, 10%, ..., 100% positions
+LINE_KEYS: str = "abceghjkmnopruvwz"  # keys selecting the lines, skipping the other keys
+QUIT_KEY: str = "q"
+RENDER_WORKERS: int = 2  # threads rendering tones and speech, so a stale one never blocks
+TICK_DURATION: float = 30.0  # milliseconds of the tick of a coalesced point
+SETTLE: float = 60.0  # milliseconds without a newer move before a coalesced point sounds
+
+
+class Coalesce(enum.StrEnum):
+    """What a point sounds when moved to while the last one still sounds,
+    as when a key is held down and repeats."""
+
+    NONE = enum.auto()  # the point sounds in full
+    SKIP = enum.auto()  # the point is silent
+    TICK = enum.auto()  # the point sounds a brief tick of its tone
+
+
+class Player(object):
+    """Class to play a plot to a listener, moving between points and
+    lines by key presses and speaking or playing the tone of each.
+
+    Keys are dispatched by name through `key_functions`:
+
+    - d: speak the title and description
+    - x, y: speak the x or y axis label and range
+    - f: speak the label of the current line
+    - l: speak the legend of line keys and labels
+    - t: play the tone of the current point
+    - s: speak the x and y of the current point
+    - space: repeat the last tone or speech of the current point
+    - left, right: move to the previous or next point
+    - up, down: select the next or previous line
+    - ~, 1 to 9, 0: move to the 0%, 10% to 90%, 100% position
+    - a, b, c, ...: select a line
+    - q: quit
+
+    The key functions are coroutines run by an asyncio loop fed by a
+    queue of key events. Each changes the position at once, then waits
+    for its sound to render in worker threads, so input is never held
+    up. A newer key cancels the sound still pending from an older one,
+    and a newer sound fades out the one playing. Moves that come faster
+    than the point sounds, as from a held key, are coalesced by the
+    `coalesce` policy, so the sound keeps up with the keys. After each
+    move, a Prefetcher renders the sounds of the points around it and
+    of the decile positions in the background."""
+
+    def __init__(self, pd: PlotData, output: Optional[AudioOutput] = None,
+                 speech: Optional[SpeechBank] = None, tones: Optional[ToneCache] = None,
+                 duration: float = POINT_DURATION, prefetch: bool = True,
+                 coalesce: Coalesce = Coalesce.TICK) -> None:
+        """Initialize a player of `pd` to `output`, with speech clips from
+        `speech` and tones of `duration` milliseconds from `tones`,
+        prefetched around each move if `prefetch`, and fast moves
+        coalesced by the `coalesce` policy."""
+        self._plotdata = pd
+        self._output = output if output is not None else AudioOutput()
+        self._speech = speech if speech is not None else SpeechBank(self._output.rate)
+        self._tones = tones if tones is not None else ToneCache(rate=self._output.rate)
+        self._prefetcher = Prefetcher(pd, self._speech, self._tones, duration)
+        self._prefetch = prefetch
+        self._duration = duration
+        self._coalesce = Coalesce(coalesce)
+        self._settle = SETTLE
+        self._arrived: Optional[float] = None  # time of the last move
+        self._point = 0
+        self._line = 0
+        self._speaking = False
+        self._running = False
+        self._executor = concurrent.futures.ThreadPoolExecutor(RENDER_WORKERS)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._keys: Optional[asyncio.Queue[str]] = None
+        self._early: collections.deque[str] = collections.deque()  # keys put before `serve`
+        self._lock = threading.Lock()
+        self.key_functions: dict[str, Callable[[], Awaitable[None]]] = {
+            "d": self.speak_description, "x": functools.partial(self.speak_axis, "x"),
+            "y": functools.partial(self.speak_axis, "y"), "f": self.speak_line,
+            "l": self.speak_legend, "t": self.play_tone, "s": self.speak_position,
+            "space": self.repeat, "left": functools.partial(self.move, -1),
+            "right": functools.partial(self.move, 1),
+            "up": functools.partial(self.select_line, 1, True),
+            "down": functools.partial(self.select_line, -1, True), QUIT_KEY: self.quit}
+        for i, key in enumerate(DECILE_KEYS):
+            self.key_functions[key] = functools.partial(self.move_to_decile, i)
+        for i, key in zip(range(pd.ysize()), LINE_KEYS):
+            self.key_functions[key] = functools.partial(self.select_line, i)
+
+    @property
+    def plotdata(self) -> PlotData:
+        """PlotData being played."""
+        return self._plotdata
+
+    @property
+    def output(self) -> AudioOutput:
+        """AudioOutput the player plays to."""
+        return self._output
+
+    @property
+    def speech(self) -> SpeechBank:
+        """SpeechBank of the spoken words."""
+        return self._speech
+
+    @property
+    def tones(self) -> ToneCache:
+        """ToneCache of the point tones."""
+        return self._tones
+
+    @property
+    def prefetcher(self) -> Prefetcher:
+        """Prefetcher of the point tones and spoken positions."""
+        return self._prefetcher
+
+    @property
+    def coalesce(self) -> Coalesce:
+        """What a point sounds when moved to while the last one still
+        sounds. `tick`, `skip`, or `none` to sound it in full."""
+        return self._coalesce
+
+    @coalesce.setter
+    def coalesce(self, c: Coalesce) -> None:
+        self._coalesce = Coalesce(c)
+
+    @property
+    def settle(self) -> float:
+        """Milliseconds without a newer move before a coalesced point
+        sounds in full."""
+        return self._settle
+
+    @settle.setter
+    def settle(self, s: float) -> None:
+        self._settle = s
+
+    @property
+    def point(self) -> int:
+        """Index of the current point."""
+        return self._point
+
+    @property
+    def line(self) -> int:
+        """Index of the current line."""
+        return self._line
+
+    @property
+    def speaking(self) -> bool:
+        """True if moving speaks the position, False if it plays the tone."""
+        return self._speaking
+
+    async def press(self, key: str) -> bool:
+        """Run the function of a key to completion. Return False if the
+        key has none."""
+        function = self.key_functions.get(key)
+        if function is None:
+            return False
+        with instrument.span("player.key"):
+            await function()
+        return True
+
+    def put(self, key: str) -> None:
+        """Queue a key event, as if the key was pressed. Safe to call
+        from any thread."""
+        with self._lock:
+            if self._loop is None or self._keys is None:
+                self._early.append(key)
+            else:
+                self._loop.call_soon_threadsafe(self._keys.put_nowait, key)
+
+    async def serve(self) -> None:
+        """Handle queued key events until `q` quits, each as a task that
+        the next key cancels if its sound is still pending."""
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._keys = asyncio.Queue()
+            while self._early:
+                self._keys.put_nowait(self._early.popleft())
+        self._running = True
+        self._moved()
+        task: Optional[asyncio.Task] = None
+        try:
+            while self._running:
+                key = await self._keys.get()
+                if key not in self.key_functions:
+                    continue
+                if task is not None and not task.done():
+                    task.cancel()
+                    instrument.count("player.cancelled")
+                task = asyncio.create_task(self.press(key))
+                await asyncio.sleep(0)  # run the key function up to its first wait
+        finally:
+            if task is not None:
+                task.cancel()
+            with self._lock:
+                self._loop = self._keys = None
+
+    def run(self) -> None:
+        """Handle queued key events in a new event loop until `q` quits."""
+        asyncio.run(self.serve())
+
+    def play(self) -> None:
+        """Play the plot on the audio device, handling key presses until `q`."""
+        if keyboard is None:
+            raise ImportError("Playing requires keyboard. Use\npip install keyboard")
+        hook = keyboard.on_press(lambda event: self.put(event.name))
+        try:
+            with self._output:
+                self.run()
+        finally:
+            keyboard.unhook(hook)
+
+    def close(self) -> None:
+        """Stop the render and prefetch threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._prefetcher.close()
+
+    async def quit(self) -> None:
+        """Stop `serve` and the sound."""
+        self._running = False
+        self._output.stop()
+
+    async def render(self, func: Callable, *args: Any) -> Any:
+        """Run a blocking render function in a render thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    def tone(self, point: int, line: int) -> Optional[np.ndarray]:
+        """Get the tone of a point of a line, or None if its y is not a number."""
+        return self._prefetcher.tone(point, line)
+
+    async def play_tone(self) -> None:
+        """Play the tone of the current point."""
+        self._speaking = False
+        clip = await self.render(self.tone, self._point, self._line)
+        if clip is None:
+            self._output.stop(fade=FADE)
+        else:
+            self._output.play(clip, interrupt=True, fade=FADE)
+
+    async def play_tick(self) -> None:
+        """Play a brief tick of the tone of the current point."""
+        clip = await self.render(self._prefetcher.tone, self._point, self._line, TICK_DURATION)
+        if clip is None:
+            self._output.stop(fade=FADE)
+        else:
+            self._output.play(clip, interrupt=True, fade=FADE)
+
+    async def say(self, words: list[str]) -> None:
+        """Speak words, stopping the sound playing."""
+        samples = await self.render(self._speech.phrase, words)
+        self._output.play(samples, interrupt=True, fade=FADE)
+
+    async def speak_position(self) -> None:
+        """Speak the x and y of the current point."""
+        self._speaking = True
+        samples = await self.render(self._prefetcher.readout, self._point, self._line)
+        self._output.play(samples, interrupt=True, fade=FADE)
+
+    async def speak_description(self) -> None:
+        """Speak the title, description, axes and lines of the plot."""
+        await self.say([describe(self._plotdata)])
+
+    async def speak_axis(self, axis: str) -> None:
+        """Speak the label and range of the `x` or `y` axis."""
+        await self.say(self._speech.axis_words(self._plotdata, axis))
+
+    async def speak_line(self) -> None:
+        """Speak the key and label of the current line."""
+        await self.say([LINE_KEYS[self._line], self._plotdata.line_labels[self._line]])
+
+    async def speak_legend(self) -> None:
+        """Speak the key and label of every line."""
+        await self.say([word for key, label in zip(LINE_KEYS, self._plotdata.line_labels)
+                        for word in (key, label)])
+
+    async def repeat(self) -> None:
+        """Repeat the speech or tone of the current point."""
+        if self._speaking:
+            await self.speak_position()
+        else:
+            await self.play_tone()
+
+    async def move(self, step: int) -> None:
+        """Move `step` points, stopping at the ends, and repeat."""
+        self._point = min(max(self._point + step, 0), len(self._plotdata.points) - 1)
+        await self._arrive()
+
+    async def move_to_decile(self, decile: int) -> None:
+        """Move to the point at `decile` tenths of the points, and repeat."""
+        self._point = round(decile * (len(self._plotdata.points) - 1) / 10)
+        await self._arrive()
+
+    async def select_line(self, line: int, relative: bool = False) -> None:
+        """Select a line, or step `line` lines if `relative`, and repeat."""
+        lines = self._plotdata.ysize()
+        self._line = (self._line + line) % lines if relative else min(line, lines - 1)
+        await self._arrive()
+
+    async def _arrive(self) -> None:
+        """Sound a move to the current point. If the last move is still
+        sounding, sound a tick or nothing by the `coalesce` policy, and
+        the point in full only if no newer move comes within `settle`."""
+        now = time.monotonic()
+        fast = self._arrived is not None and now - self._arrived < self._duration / 1000
+        self._arrived = now
+        self._moved()
+        if fast and self._coalesce != Coalesce.NONE:
+            instrument.count("player.coalesced")
+            if self._coalesce == Coalesce.TICK:
+                await self.play_tick()
+            else:
+                self._output.stop(fade=FADE)
+            await asyncio.sleep(self._settle / 1000)
+        await self.repeat()
+
+    def _moved(self) -> None:
+        """Prefetch around the current point, if prefetching."""
+        if self._prefetch:
+            self._prefetcher.update(self._point, self._line)
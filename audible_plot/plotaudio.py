@@ -0,0 +1,372 @@
+"""PlotAudio class to render a PlotData as a sequence of tones."""
+from typing import Iterator, Optional
+
+import numpy as np
+
+from . import instrument
+from .artifactcache import ArtifactCache, get_cache
+from .parallel import render_parallel
+from .pitch import Pitch
+from .plotdata import TONE_HIGH, TONE_LOW, Decimation, PlotData
+from .synth import FADE, SAMPLE_RATE, VOLUME, Waveform, get_bank, tone_samples
+from .wavfile import WAV_HEADER_SIZE, open_wav, to_pcm
+
+
+# Module Constants
+LINE_DURATION: float = 10000.0  # milliseconds to play a line of many points
+POINT_DURATION: float = 250.0  # longest milliseconds per point
+GAP_FRACTION: float = 0.2  # silent fraction at the end of each point
+LINE_GAP: float = 500.0  # milliseconds of silence between lines
+CHUNK_FRAMES: int = 2**18  # most frames rendered at once
+MAX_POINTS: int = 1000  # most points per line heard, downsampled above
+LINE_TIMBRES: tuple[tuple[float, float, float], ...] = (  # sine, square, sawtooth weights
+    (1.0, 0.0, 0.0), (0.0, 0.0, 1.0), (0.0, 1.0, 0.0),
+    (0.5, 0.0, 0.5), (0.5, 0.5, 0.0), (0.0, 0.5, 0.5),
+    (0.8, 0.0, 0.2), (0.8, 0.2, 0.0), (0.4, 0.3, 0.3))
+
+
+class PlotAudio(object):
+    """Class to define and audibly render a PlotData object as tones."""
+
+    def __init__(self, pd: PlotData) -> None:
+        """Initialize an audible plot of PlotData."""
+        self._plotdata = pd
+        self._decimated: Optional[tuple] = None  # (points, version, max_points, mode, PlotData)
+        self._max_points = MAX_POINTS
+        self._decimation = Decimation.LTTB
+        self._output = "plot"
+        self._waveform = Waveform.SINE
+        self._volume = VOLUME
+        self._low = Pitch(TONE_LOW)
+        self._high = Pitch(TONE_HIGH)
+        self._point_duration = min(POINT_DURATION, LINE_DURATION / min(pd.xsize(), MAX_POINTS))
+        self._x_timing = False
+        self._polyphonic = False
+        self._processes = 1
+        self._gap = GAP_FRACTION
+        self._line_gap = LINE_GAP
+        self._fade = FADE
+        self._rate = SAMPLE_RATE
+
+    @property
+    def plotdata(self) -> PlotData:
+        """PlotData to render."""
+        return self._plotdata
+
+    @property
+    def max_points(self) -> int:
+        """Most points per line to render. More are downsampled to this."""
+        return self._max_points
+
+    @max_points.setter
+    def max_points(self, mp: int) -> None:
+        if mp < 3:
+            raise ValueError("Max points must be 3 or more.")
+        self._max_points = mp
+
+    @property
+    def decimation(self) -> Decimation:
+        """Downsampling mode above `max_points`. `lttb` or `minmax`."""
+        return self._decimation
+
+    @decimation.setter
+    def decimation(self, d: Decimation) -> None:
+        self._decimation = Decimation(d)
+
+    @property
+    def output(self) -> str:
+        """Name of output audio file."""
+        return self._output
+
+    @output.setter
+    def output(self, out: str) -> None:
+        self._output = out
+
+    @property
+    def waveform(self) -> Waveform:
+        "Waveform of the tones. `sine`, `square` or `sawtooth`."
+        return self._waveform
+
+    @waveform.setter
+    def waveform(self, wf: Waveform) -> None:
+        self._waveform = Waveform(wf)
+
+    @property
+    def volume(self) -> float:
+        """Peak amplitude of the tones, 0.0 to 1.0."""
+        return self._volume
+
+    @volume.setter
+    def volume(self, v: float) -> None:
+        self._volume = v
+
+    @property
+    def low(self) -> Pitch:
+        """Pitch of the bottom of the y range."""
+        return self._low
+
+    @low.setter
+    def low(self, p: Pitch) -> None:
+        self._low = Pitch(p)
+
+    @property
+    def high(self) -> Pitch:
+        """Pitch of the top of the y range."""
+        return self._high
+
+    @high.setter
+    def high(self, p: Pitch) -> None:
+        self._high = Pitch(p)
+
+    @property
+    def point_duration(self) -> float:
+        """Milliseconds of each point, or of the mean point with `x_timing`."""
+        return self._point_duration
+
+    @point_duration.setter
+    def point_duration(self, d: float) -> None:
+        self._point_duration = d
+
+    @property
+    def x_timing(self) -> bool:
+        """If True, each point lasts in proportion to the x distance to the next."""
+        return self._x_timing
+
+    @x_timing.setter
+    def x_timing(self, xt: bool) -> None:
+        self._x_timing = xt
+
+    @property
+    def polyphonic(self) -> bool:
+        """If True, play all lines at once in stereo, panned by x."""
+        return self._polyphonic
+
+    @polyphonic.setter
+    def polyphonic(self, p: bool) -> None:
+        self._polyphonic = p
+
+    @property
+    def processes(self) -> int:
+        """Number of worker processes to render in, 1 to render serially."""
+        return self._processes
+
+    @processes.setter
+    def processes(self, p: int) -> None:
+        if p < 1:
+            raise ValueError("Processes must be 1 or more.")
+        self._processes = p
+
+    @property
+    def gap(self) -> float:
+        """Silent fraction at the end of each point, 0.0 to below 1.0."""
+        return self._gap
+
+    @gap.setter
+    def gap(self, g: float) -> None:
+        if not 0.0 <= g < 1.0:
+            raise ValueError("Gap must be 0.0 or between 0.0 and 1.0.")
+        self._gap = g
+
+    @property
+    def line_gap(self) -> float:
+        """Milliseconds of silence between lines."""
+        return self._line_gap
+
+    @line_gap.setter
+    def line_gap(self, lg: float) -> None:
+        self._line_gap = lg
+
+    @property
+    def fade(self) -> float:
+        """Milliseconds of attack and release of each tone."""
+        return self._fade
+
+    @fade.setter
+    def fade(self, f: float) -> None:
+        self._fade = f
+
+    @property
+    def rate(self) -> int:
+        """Sample rate in samples per second."""
+        return self._rate
+
+    @rate.setter
+    def rate(self, r: int) -> None:
+        self._rate = r
+
+    def render_data(self) -> PlotData:
+        """Get the PlotData to render: `plotdata`, downsampled to
+        `max_points` if it has more. The result is kept until the
+        points or the settings change."""
+        pd = self._plotdata
+        if pd.xsize() <= self._max_points:
+            return pd
+        settings = (pd.version, self._max_points, self._decimation)
+        if (self._decimated is None or self._decimated[0] is not pd.points
+                or self._decimated[1:4] != settings):
+            self._decimated = (pd.points,) + settings + (
+                pd.decimate(self._max_points, self._decimation),)
+        return self._decimated[4]
+
+    def wav_filename(self) -> str:
+        """Get the audio filename from `output` and `.wav`."""
+        return self._output + ".wav"
+
+    def point_samples(self) -> np.ndarray:
+        """Get the number of samples of each point."""
+        pd = self.render_data()
+        n = pd.xsize()
+        if self._x_timing and n > 1:
+            dx = np.diff(pd.points[:, 0])
+            dx = np.append(dx, dx.mean())
+            durations = self._point_duration * dx / dx.mean()
+        else:
+            durations = np.full(n, self._point_duration)
+        return np.rint(durations * self._rate / 1000).astype(np.intp)
+
+    def line_frames(self) -> int:
+        """Get the number of frames of each line."""
+        return int(self.point_samples().sum())
+
+    def channels(self) -> int:
+        """Get the number of audio channels, 2 when `polyphonic`."""
+        return 2 if self._polyphonic else 1
+
+    def nframes(self) -> int:
+        """Get the number of frames of the whole plot, lines one after
+        another, or all lines at once when `polyphonic`."""
+        if self._polyphonic:
+            return self.line_frames()
+        ys = self._plotdata.ysize()
+        return ys * self.line_frames() + (ys - 1) * tone_samples(self._line_gap, self._rate)
+
+    def timbres(self) -> np.ndarray:
+        """Get the weights of each waveform in the timbre of each line,
+        lines by waveforms, the `waveform` alone unless `polyphonic`."""
+        if self._polyphonic:
+            return np.array([LINE_TIMBRES[i % len(LINE_TIMBRES)]
+                             for i in range(self._plotdata.ysize())])
+        weights = np.zeros((1, len(Waveform)))
+        weights[0, list(Waveform).index(self._waveform)] = 1.0
+        return weights
+
+    @instrument.timed("plotaudio.render")
+    def render(self, out: np.ndarray) -> None:
+        """Render the plot into `out`, an array of `nframes` float samples
+        or int16 PCM, by `channels` if 2-dimensional, in `processes`
+        worker processes if more than 1."""
+        if out.ndim == 1:
+            out = out[:, np.newaxis]
+        if self._processes > 1:
+            render_parallel(self, out)
+            return
+        out[:] = 0
+        n = self.render_data().xsize()
+        if self._polyphonic:
+            self.render_points(out, 0, n)
+        else:
+            for line in range(self._plotdata.ysize()):
+                self.render_points(out, 0, n, line)
+
+    def render_points(self, out: np.ndarray, first: int, last: int, line: int = 0) -> None:
+        """Render points `first` to before `last` of a line, or of all
+        lines when `polyphonic`, into their frames of `out`, the frames
+        by channels of the whole plot."""
+        pd = self.render_data()
+        freqs = pd.tones(self._low, self._high).freq
+        samples = self.point_samples()
+        tables = self.line_tables()
+        if not self._polyphonic:
+            start = line * (int(samples.sum()) + tone_samples(self._line_gap, self._rate))
+            for lo, idx, pos, wave in self.chunks(freqs[:, [line]], samples, tables, first, last):
+                to_pcm(wave, out[start + lo:start + lo + len(wave)])
+            return
+
+        # All lines at once, each in its own timbre, panned left to right
+        # by x and scaled by the number of lines to avoid clipping.
+        xlo, xhi = pd.xrange
+        pan = np.clip((pd.points[:, 0] - xlo) / (xhi - xlo), 0.0, 1.0)
+        pan_step = np.append(np.diff(pan), 0.0) / np.maximum(samples, 1)  # glide to the next x
+        scale = 1.0 / freqs.shape[1]
+        for lo, idx, pos, wave in self.chunks(freqs, samples, tables, first, last):
+            angle = (pan[idx] + pos * pan_step[idx]) * (np.pi / 2)
+            gains = np.column_stack((np.cos(angle), np.sin(angle)))  # equal power
+            gains *= wave.sum(axis=1, keepdims=True) * scale
+            to_pcm(gains, out[lo:lo + len(gains)])
+
+    def write_wav(self, filename: Optional[str] = None) -> None:
+        """Write the `.wav` audio file, or `filename`, rendering straight
+        into the file."""
+        filename = self.wav_filename() if filename is None else filename
+        wav = open_wav(filename, self.nframes(), self.channels(), self._rate)
+        if self._processes > 1:
+            render_parallel(self, wav, filename, WAV_HEADER_SIZE)
+        else:
+            self.render(wav)
+        wav.flush()
+        del wav
+
+    def cache_key(self) -> str:
+        """Get the ArtifactCache key of the audio, from the PlotData
+        contents and the settings that change the samples."""
+        return ArtifactCache.key(
+            "PlotAudio", self._plotdata.digest(), self._waveform, self._volume, self._low,
+            self._high, self._point_duration, self._x_timing, self._polyphonic, self._gap,
+            self._line_gap, self._fade, self._rate, self._max_points, self._decimation)
+
+    def write_wav_cached(self, cache: Optional[ArtifactCache] = None) -> str:
+        """Copy the `.wav` audio file from `cache`, or the shared cache,
+        rendering and caching it first if not cached. Return its filename."""
+        cache = cache if cache is not None else get_cache()
+        return cache.copy(self.cache_key(), ".wav", self.write_wav, self.wav_filename())
+
+    def line_tables(self) -> np.ndarray:
+        """Get the wavetables of the timbre of each line, lines by
+        octaves by table samples."""
+        bank = get_bank(self._rate)
+        tables = np.stack([bank.tables(wf) for wf in Waveform])
+        return np.tensordot(self.timbres(), tables, axes=1)
+
+    def chunks(self, freqs: np.ndarray, samples: np.ndarray, tables: np.ndarray,
+               first: int = 0, last: Optional[int] = None
+               ) -> Iterator[tuple[int, np.ndarray, np.ndarray, np.ndarray]]:
+        """Yield chunks of points `first` to before `last` of lines of
+        frequencies, points by lines, each of about `CHUNK_FRAMES` or one
+        point at most, as (first frame, point index, position in point,
+        frames by lines of float samples) tuples. Line i uses tables[i].
+        Samples depend only on their point, not on the chunking."""
+        bank = get_bank(self._rate)
+        size = bank.size
+        silent = ~np.isfinite(freqs)
+        freqs = np.where(silent, 0.0, freqs)
+        octaves = bank.octaves(np.maximum(freqs, 1.0))
+        steps = freqs * (size / self._rate)  # table samples per sample
+        tone_lens = samples - np.rint(samples * self._gap).astype(np.intp)
+        fade = max(tone_samples(self._fade, self._rate), 1)
+        onsets = np.concatenate(([0], np.cumsum(samples)))
+        advance = np.concatenate((np.zeros((1, freqs.shape[1])),
+                                  np.cumsum(steps * samples[:, np.newaxis], axis=0)))
+        lines = np.arange(freqs.shape[1])
+        gain = np.where(silent, 0.0, self._volume / fade)
+
+        last = len(samples) if last is None else last
+        bounds = np.searchsorted(onsets, np.arange(onsets[first], onsets[last], CHUNK_FRAMES),
+                                 side="right") - 1
+        bounds = np.unique(np.append(bounds, last))
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            idx = np.repeat(np.arange(a, b), samples[a:b])
+            pos = np.arange(onsets[b] - onsets[a], dtype=np.float64)
+            pos -= onsets[idx] - onsets[a]  # position within each point
+
+            phase = advance[idx] % size + pos[:, np.newaxis] * steps[idx]
+            index = phase.astype(np.intp)
+            phase -= index
+            index &= size - 1
+            octave = octaves[idx]
+            lo = tables[lines, octave, index]
+            wave = lo + phase * (tables[lines, octave, index + 1] - lo)
+
+            env = np.minimum(pos, tone_lens[idx] - pos)[:, np.newaxis] * gain[idx]
+            np.clip(env, 0.0, self._volume, out=env)
+            wave *= env
+            yield int(onsets[a]), idx, pos, wave
@@ -0,0 +1,479 @@
+"""PlotData class to hold the data to be plotted and its descriptors."""
+import copy
+import enum
+import hashlib
+import itertools
+import os
+import tempfile
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+from . import instrument
+from .pitch import Pitch, PitchArray
+
+
+# Module Constants
+TONE_LOW: str = "C3"
+TONE_HIGH: str = "C7"
+CHUNK_ROWS: int = 65536  # rows of a text file parsed at once
+DELIMITERS: dict[str, Optional[str]] = {".csv": ",", ".tsv": "\t"}  # else whitespace
+
+Limits = tuple[np.ndarray, np.ndarray]  # per-column (mins, maxs)
+
+
+class Decimation(enum.StrEnum):
+    """Enumeration of downsampling modes."""
+
+    LTTB = enum.auto()  # Largest-Triangle-Three-Buckets
+    MINMAX = enum.auto()  # min and max of each bucket
+
+
+class PlotData(object):
+    """Class to hold data to be plotted and associated descriptors."""
+
+    def __init__(self, p: np.ndarray, limits: Optional[Limits] = None) -> None:
+        """Initialize the plot data from the array, and its per-column
+        (mins, maxs) if already known, which allows no rows. Default the
+        rest."""
+        self._points: np.ndarray = self._check_shape(p, rows=limits is None)
+        self._version = 0
+        self._auto_xrange = True  # else the x range was set, and kept as the points change
+        self._auto_yrange = True
+        self.limits = limits if limits is not None else self.scan_limits(self._points)
+        self._xlabel: str = "x"
+        self._ylabel: str = "y"
+        self._xdescr: str = ""
+        self._ydescr: str = ""
+        self._title: str = ""
+        self._description: str = ""
+        self._line_labels: list[str] = []
+        self._line_descrs: list[str] = []
+
+    @property
+    def points(self) -> np.ndarray:
+        """Numpy n-dimension array of points. X-values first."""
+        return self._points
+
+    @points.setter
+    def points(self, p: np.ndarray) -> None:
+        self._points = self._check_shape(p)
+        self._version += 1
+        self.limits = self.scan_limits(self._points)
+
+    @points.deleter
+    def points(self) -> None:
+        self.points = np.array([[0.0, 0.0], [1.0, 1.0]])
+
+    @property
+    def version(self) -> int:
+        """Number of changes to the points, to tell if what was made
+        from them is current."""
+        return self._version
+
+    @property
+    def limits(self) -> Limits:
+        """Per-column (mins, maxs) of the points, ignoring NaN."""
+        return self._limits
+
+    @limits.setter
+    def limits(self, lim: Limits) -> None:
+        """Set the per-column limits, then the x and y auto ranges,
+        rounded together, and the ranges not set by the user to them."""
+        mins, maxs = np.asarray(lim[0], dtype=np.float64), np.asarray(lim[1], dtype=np.float64)
+        self._limits = (mins, maxs)
+        lo, hi = self.round_ranges(
+            np.array([mins[0], np.fmin.reduce(mins[1:])]),
+            np.array([maxs[0], np.fmax.reduce(maxs[1:])]))
+        self._autoranges = ((float(lo[0]), float(hi[0])), (float(lo[1]), float(hi[1])))
+        if self._auto_xrange:
+            self.autoxrange()
+        if self._auto_yrange:
+            self.autoyrange()
+
+    def update_points(self, rows: Union[int, slice, np.ndarray], values: np.ndarray) -> None:
+        """Write `values` into `points[rows]` in place and update the
+        limits and auto ranges from the changed rows only. A column is
+        rescanned only if a row that held one of its limits changed."""
+        old_lo, old_hi = self.scan_limits(np.atleast_2d(self._points[rows]))
+        self._points[rows] = values
+        self._version += 1
+        new_lo, new_hi = self.scan_limits(np.atleast_2d(self._points[rows]))
+        mins, maxs = np.fmin(self._limits[0], new_lo), np.fmax(self._limits[1], new_hi)
+        stale = (old_lo == self._limits[0]) & ~(new_lo <= old_lo)  # a min rose or went NaN
+        stale |= (old_hi == self._limits[1]) & ~(new_hi >= old_hi)
+        for col in np.flatnonzero(stale):
+            mins[col] = np.fmin.reduce(self._points[:, col])
+            maxs[col] = np.fmax.reduce(self._points[:, col])
+        self.limits = (mins, maxs)
+
+    @property
+    def xrange(self) -> tuple[float, float]:
+        """Min and Max of the x-values."""
+        return self._xrange
+
+    @xrange.setter
+    def xrange(self, xr: tuple[float, float]) -> None:
+        """Set the min and max of the x-values, kept as the points
+        change. If min = max, then perform autoxrange. If min > max,
+        then swap them."""
+        lo, hi = xr
+        if lo == hi:
+            self.autoxrange()
+        else:
+            self._xrange = (min(lo, hi), max(lo, hi))
+            self._auto_xrange = False
+
+    @xrange.deleter
+    def xrange(self) -> None:
+        self.xrange = (0, 0)
+
+    @property
+    def yrange(self) -> tuple[float, float]:
+        """Min and Max of the y-values, for all functions."""
+        return self._yrange
+
+    @yrange.setter
+    def yrange(self, yr: tuple[float, float]) -> None:
+        """Set the min and max of the y-values, kept as the points
+        change. If min = max, then perform autoyrange. If min > max,
+        then swap them."""
+        lo, hi = yr
+        if lo == hi:
+            self.autoyrange()
+        else:
+            self._yrange = (min(lo, hi), max(lo, hi))
+            self._auto_yrange = False
+
+    @yrange.deleter
+    def yrange(self) -> None:
+        self.yrange = (0, 0)
+
+    @property
+    def xlabel(self) -> str:
+        """Short label of x-axis"""
+        return self._xlabel
+
+    @xlabel.setter
+    def xlabel(self, xl: str):
+        self._xlabel = xl
+
+    @xlabel.deleter
+    def xlabel(self) -> None:
+        self._xlabel = ""
+
+    @property
+    def ylabel(self) -> str:
+        """Short label of y-axis"""
+        return self._ylabel
+
+    @ylabel.setter
+    def ylabel(self, yl: str):
+        self._ylabel = yl
+
+    @ylabel.deleter
+    def ylabel(self) -> None:
+        self._ylabel = ""
+
+    @property
+    def xdescr(self) -> str:
+        """Verbose description of x-data."""
+        return self._xdescr
+
+    @xdescr.setter
+    def xdescr(self, xd: str):
+        self._xdescr = xd
+
+    @xdescr.deleter
+    def xdescr(self) -> None:
+        self._xdescr = ""
+
+    @property
+    def ydescr(self) -> str:
+        """Verbose description of y-data."""
+        return self._ydescr
+
+    @ydescr.setter
+    def ydescr(self, yd: str):
+        self._ydescr = yd
+
+    @ydescr.deleter
+    def ydescr(self) -> None:
+        self._ydescr = ""
+
+    @property
+    def title(self) -> str:
+        """Title of plot."""
+        if self._title:
+            return self._title
+        else:
+            return self.ylabel + " versus " + self.xlabel
+
+    @title.setter
+    def title(self, t: str) -> None:
+        self._title = t
+
+    @title.deleter
+    def title(self) -> None:
+        self._title = ""
+
+    @property
+    def description(self) -> str:
+        """Verbose description of plot."""
+        return self._description
+
+    @description.setter
+    def description(self, d: str) -> None:
+        self._description = d
+
+    @description.deleter
+    def description(self) -> None:
+        self._description = ""
+
+    @property
+    def line_labels(self) -> list[str]:
+        """List of strings of line labels for legend."""
+        if self._line_labels:
+            return self._line_labels
+        ys = self.ysize()
+        if ys > 1:
+            return ["Line " + str(i) for i in range(1, ys + 1)]
+        else:
+            return [self.ylabel]
+
+    @line_labels.setter
+    def line_labels(self, ll: list[str]) -> None:
+        self._line_labels = ll
+
+    @line_labels.deleter
+    def line_labels(self) -> None:
+        self._line_labels = []
+
+    @property
+    def line_descrs(self) -> list[str]:
+        """List of strings of line descriptions."""
+        if self._line_descrs:
+            return self._line_descrs
+        return self.line_labels
+
+    @line_descrs.setter
+    def line_descrs(self, ld: list[str]) -> None:
+        self._line_descrs = ld
+
+    @line_descrs.deleter
+    def line_descrs(self) -> None:
+        self._line_descrs = []
+
+    @staticmethod
+    def round_range(r: tuple[float, float]) -> tuple[float, float]:
+        """Round the min and max down and up to the next round interval"""
+        lo, hi = PlotData.round_ranges(np.float64(r[0]), np.float64(r[1]))
+        return (float(lo), float(hi))
+
+    @staticmethod
+    def round_ranges(lo: np.ndarray, hi: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Round arrays of mins and maxs down and up to the next round
+        interval, the order (log10) of each difference, all at once.
+        Equal mins and maxs widen by 1.0 each way."""
+        ad = np.abs(hi - lo)  # absolute distance from min to max
+        flat = ad == 0
+        fac = 10.0 ** np.floor(np.log10(np.where(flat, 1.0, ad)))  # factor of decimal point
+        return (np.where(flat, lo - 1.0, np.floor(lo / fac) * fac),
+                np.where(flat, hi + 1.0, np.ceil(hi / fac) * fac))
+
+    def autoxrange(self) -> None:
+        """Set the min and max of the x values, rounded down and up
+        the order (log10) of the difference between the data min and max,
+        and follow them as the points change."""
+        self._xrange = self._autoranges[0]
+        self._auto_xrange = True
+
+    def autoyrange(self) -> None:
+        """Set the min and max of the y values, rounded down and up
+        the order (log10) of the difference between the data min and max,
+        and follow them as the points change."""
+        self._yrange = self._autoranges[1]
+        self._auto_yrange = True
+
+    @staticmethod
+    def _check_shape(p: np.ndarray, rows: bool = True) -> np.ndarray:
+        """Get points as a float array, raising ValueError unless it has
+        2 dimensions, an x column and a line column, and, if `rows`, a
+        row."""
+        p = np.asanyarray(p, dtype=np.float64)
+        if p.ndim != 2 or p.shape[1] < 2:
+            raise ValueError(f"Points must be rows of x and y values, not shape {p.shape}.")
+        if rows and len(p) == 0:
+            raise ValueError("There are no points.")
+        return p
+
+    @staticmethod
+    def scan_limits(p: np.ndarray) -> Limits:
+        """Get the per-column (mins, maxs) of points, ignoring NaN, in one
+        pass that needs no copy of the points, even memory-mapped."""
+        return (np.fmin.reduce(p, axis=0), np.fmax.reduce(p, axis=0))
+
+    @classmethod
+    def from_file(cls, filename: str, delimiter: Optional[str] = None,
+                  chunk_rows: int = CHUNK_ROWS) -> "PlotData":
+        """Make a PlotData from a `.npy` file, memory-mapped, or from a
+        CSV, TSV or whitespace-separated text file, read `chunk_rows` at
+        a time into a memory-mapped temporary file. The ranges come from
+        the same single pass, so memory stays bounded for any file size.
+        A header line of a text file sets the x label and line labels."""
+        ext = os.path.splitext(filename)[1].lower()
+        if ext == ".npy":
+            p = np.load(filename, mmap_mode="r")
+            if p.ndim != 2:
+                raise ValueError(f"{filename} must hold a 2-dimensional array.")
+            if p.dtype == np.float64:
+                return cls(p)
+            chunks = (p[i:i + chunk_rows] for i in range(0, len(p), chunk_rows))
+            return cls(*cls._spool(chunks, p.shape[1]))
+
+        if delimiter is None:
+            delimiter = DELIMITERS.get(ext)
+        with open(filename) as f:
+            lines = (line for line in f if line.strip() and not line.startswith("#"))
+            first = next(lines, None)
+            if first is None:
+                raise ValueError(f"{filename} has no points.")
+            fields = [field.strip() for field in first.split(delimiter)]
+            try:
+                [float(field) for field in fields]
+                header = None
+            except ValueError:
+                header = fields
+                first = None
+            rows = itertools.chain([first] if first is not None else [], lines)
+            chunks = (np.loadtxt(chunk, delimiter=delimiter, ndmin=2)
+                      for chunk in iter(lambda: list(itertools.islice(rows, chunk_rows)), []))
+            pd = cls(*cls._spool(chunks, len(fields)))
+        if header is not None:
+            pd.xlabel = header[0]
+            if len(header) > 2:
+                pd.line_labels = header[1:]
+            elif len(header) == 2:
+                pd.ylabel = header[1]
+        return pd
+
+    @staticmethod
+    def _spool(chunks: Iterable[np.ndarray], columns: int) -> tuple[np.ndarray, Limits]:
+        """Write chunks of rows of points to an anonymous temporary file,
+        tracking the per-column limits. Return the file memory-mapped
+        read-only, and the limits. The map outlives the closed file."""
+        mins = np.full(columns, np.nan)
+        maxs = np.full(columns, np.nan)
+        rows = 0
+        with tempfile.TemporaryFile() as f:
+            for chunk in chunks:
+                chunk = np.asarray(chunk, dtype=np.float64)
+                if chunk.shape[1] != columns:
+                    raise ValueError(f"Rows must have {columns} columns, not {chunk.shape[1]}.")
+                f.write(np.ascontiguousarray(chunk).tobytes())
+                lo, hi = PlotData.scan_limits(chunk)
+                np.fmin(mins, lo, out=mins)
+                np.fmax(maxs, hi, out=maxs)
+                rows += len(chunk)
+            if rows == 0:
+                raise ValueError("There are no points.")
+            f.flush()
+            p = np.memmap(f, dtype=np.float64, mode="r", shape=(rows, columns))
+        return p, (mins, maxs)
+
+    def decimate(self, size: int, mode: Decimation = Decimation.LTTB) -> "PlotData":
+        """Get a new PlotData of at most `size` points that keeps the shape
+        of every line: the first and last points, plus for each of the
+        buckets in between either the point of the largest triangle with
+        its neighbours (`lttb`) or the lowest and highest point (`minmax`),
+        which also keeps each zero crossing to within a bucket. The points
+        chosen for any line are kept for all. If `size` is too small for
+        one bucket of every line, evenly spaced points are kept instead.
+        The descriptors, ranges and limits are those of the full data."""
+        mode = Decimation(mode)
+        n, m = self.xsize(), self.ysize()
+        pd = copy.copy(self)
+        if n <= max(size, 2):
+            return pd
+        per_bucket = m if mode == Decimation.LTTB else 2 * m
+        if size < 2 + per_bucket:
+            rows = np.unique(np.linspace(0, n - 1, max(size, 2)).astype(np.intp))
+        else:
+            buckets = min((size - 2) // per_bucket, n - 2)
+            edges = np.linspace(1, n - 1, buckets + 1).astype(np.intp)
+            chosen = self._lttb(edges) if mode == Decimation.LTTB else self._minmax(edges)
+            rows = np.unique(np.concatenate(([0], chosen.ravel(), [n - 1])))
+        pd._points = np.asarray(self._points[rows])
+        return pd
+
+    def _lttb(self, edges: np.ndarray) -> np.ndarray:
+        """Get the index of the point of each bucket between `edges`, by
+        line, that makes the largest triangle with the point chosen in
+        the bucket before and the mean of the bucket after."""
+        p = self._points
+        n, m = self.xsize(), self.ysize()
+        x = p[:, 0]
+        buckets = len(edges) - 1
+        chosen = np.empty((buckets, m), dtype=np.intp)
+        lines = np.arange(1, m + 1)
+        a = np.zeros(m, dtype=np.intp)
+        for j in range(buckets):
+            lo, hi = edges[j], edges[j + 1]
+            after = p[hi:edges[j + 2] if j + 2 <= buckets else n]
+            finite = np.isfinite(after[:, 1:])
+            cx = after[:, 0].mean()
+            cy = np.where(finite, after[:, 1:], 0.0).sum(axis=0) / np.maximum(finite.sum(axis=0), 1)
+            ax, ay = x[a], p[a, lines]
+            area = np.abs((ax - cx) * (p[lo:hi, 1:] - ay) - (ax - x[lo:hi, np.newaxis]) * (cy - ay))
+            np.fmax(area, -1.0, out=area)  # never choose NaN over a number
+            a = area.argmax(axis=0) + lo
+            chosen[j] = a
+        return chosen
+
+    def _minmax(self, edges: np.ndarray) -> np.ndarray:
+        """Get the indices of the lowest and highest point of each bucket
+        between `edges`, by line, reading about `CHUNK_ROWS` at a time."""
+        p = self._points
+        buckets = len(edges) - 1
+        width = int(np.max(np.diff(edges)))
+        chosen = np.empty((buckets, 2, self.ysize()), dtype=np.intp)
+        step = max(CHUNK_ROWS // width, 1)
+        for b in range(0, buckets, step):
+            lo, hi = edges[b:min(b + step, buckets)], edges[b + 1:b + step + 1]
+            idx = np.minimum(lo[:, np.newaxis] + np.arange(width), hi[:, np.newaxis] - 1)
+            y = p[idx, 1:]  # buckets by width by lines, padded with the bucket's last point
+            missing = np.isnan(y)
+            rows = np.arange(len(idx))[:, np.newaxis]
+            chosen[b:b + step, 0] = idx[rows, np.where(missing, np.inf, y).argmin(axis=1)]
+            chosen[b:b + step, 1] = idx[rows, np.where(missing, -np.inf, y).argmax(axis=1)]
+        return chosen
+
+    def digest(self) -> str:
+        """Get a SHA-256 hex digest of the points, read `CHUNK_ROWS` at a
+        time, and of the descriptors and ranges."""
+        h = hashlib.sha256(repr(self._points.shape).encode())
+        for i in range(0, len(self._points), CHUNK_ROWS):
+            h.update(np.ascontiguousarray(self._points[i:i + CHUNK_ROWS]).data)
+        h.update(repr((self.xlabel, self.ylabel, self.xdescr, self.ydescr, self.title,
+                       self.description, self.line_labels, self.line_descrs,
+                       self.xrange, self.yrange)).encode())
+        return h.hexdigest()
+
+    def xsize(self) -> int:
+        """Get n, the x dimension size of the point array."""
+        return self._points.shape[0]
+
+    def ysize(self) -> int:
+        """Get m, the number of y functions in the point array."""
+        return self._points.shape[1] - 1
+
+    @instrument.timed("pitch.tones")
+    def tones(self, low: Pitch = Pitch(TONE_LOW), high: Pitch = Pitch(TONE_HIGH),
+              rows: Union[int, slice, np.ndarray] = slice(None)) -> PitchArray:
+        """Get the pitches of the y-values of `rows`, by default an n by
+        m PitchArray of all, scaling `yrange` linearly onto the MIDI
+        numbers from `low` to `high`."""
+        ylo, yhi = self._yrange
+        scale = (high.midi - low.midi) / (yhi - ylo)
+        m = low.midi + (self._points[rows, 1:] - ylo) * scale
+        return PitchArray(np.clip(m, low.midi, high.midi))
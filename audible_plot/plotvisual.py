@@ -0,0 +1,219 @@
+"""PlotVisual class to plot a PlotData as a graphic file with gnuplot."""
+import enum
+import os
+import shutil
+from typing import Optional
+
+import numpy as np
+
+from .artifactcache import ArtifactCache, get_cache
+from .gnuplot import GnuplotPool, get_pool, quote
+from .plotdata import Decimation, PlotData
+
+
+# Module Constants
+MAX_POINTS: int = 2000  # most points per line plotted, downsampled above
+PLOT_SIZE: tuple[int, int] = (640, 480)
+
+
+class FileType(enum.StrEnum):
+    """Enumeration of plot graphic file types."""
+
+    PNG = enum.auto()
+    GIF = enum.auto()
+    JPEG = enum.auto()
+    SVG = enum.auto()
+
+
+class Transport(enum.StrEnum):
+    """Enumeration of ways to pass the points to gnuplot."""
+
+    BINARY = enum.auto()  # raw little-endian float64 `.bin` file
+    TSV = enum.auto()  # tab-separated-values `.tsv` text file
+
+
+class PlotVisual(object):
+    """Class to define and visually plot a PlotData object."""
+
+    def __init__(self, pd: PlotData) -> None:
+        """Initialize a visual plot with PlotData."""
+        self._plotdata = pd
+        self._decimated: Optional[tuple] = None  # (points, version, max_points, mode, PlotData)
+        self._filetype = FileType.PNG
+        self._output = "plot"
+        self._size = PLOT_SIZE
+        self._max_points = MAX_POINTS
+        self._decimation = Decimation.MINMAX
+        self._transport = Transport.BINARY
+
+    @property
+    def plotdata(self) -> PlotData:
+        """PlotData to plot."""
+        return self._plotdata
+
+    @property
+    def filetype(self) -> FileType:
+        "Type of output file. `png`, `gif`, `jpeg`, or `svg`."
+        return self._filetype
+
+    @filetype.setter
+    def filetype(self, ft: FileType) -> None:
+        """Set the type of output file, or `png` if not a FileType."""
+        try:
+            self._filetype = FileType(ft)
+        except ValueError:
+            self._filetype = FileType.PNG
+
+    @property
+    def output(self) -> str:
+        """Name of output graphic, tsv and gp files."""
+        return self._output
+
+    @output.setter
+    def output(self, out: str) -> None:
+        self._output = out
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """Width and height of the graphic in pixels."""
+        return self._size
+
+    @size.setter
+    def size(self, s: tuple[int, int]):
+        self._size = s
+
+    @property
+    def max_points(self) -> int:
+        """Most points per line to plot. More are downsampled to this."""
+        return self._max_points
+
+    @max_points.setter
+    def max_points(self, mp: int) -> None:
+        if mp < 3:
+            raise ValueError("Max points must be 3 or more.")
+        self._max_points = mp
+
+    @property
+    def decimation(self) -> Decimation:
+        """Downsampling mode above `max_points`. `lttb` or `minmax`."""
+        return self._decimation
+
+    @decimation.setter
+    def decimation(self, d: Decimation) -> None:
+        self._decimation = Decimation(d)
+
+    @property
+    def transport(self) -> Transport:
+        """How the points go to gnuplot. `binary`, or `tsv` to plot from
+        the readable `.tsv` file."""
+        return self._transport
+
+    @transport.setter
+    def transport(self, t: Transport) -> None:
+        self._transport = Transport(t)
+
+    def out_filename(self) -> str:
+        """Get the output graphic filename from `output` and `filetype`."""
+        return self._output + "." + self._filetype
+
+    def tsv_filename(self) -> str:
+        """Get the tab-seperated-values data filename from `output` and `.tsv`."""
+        return self._output + ".tsv"
+
+    def gp_filename(self) -> str:
+        """Get the gnuplot commands filename from `output` and `.gp`."""
+        return self._output + ".gp"
+
+    def bin_filename(self) -> str:
+        """Get the binary data filename from `output` and `.bin`."""
+        return self._output + ".bin"
+
+    def data_filename(self) -> str:
+        """Get the data filename gnuplot reads for the `transport`."""
+        return self.bin_filename() if self._transport == Transport.BINARY else self.tsv_filename()
+
+    def render_data(self) -> PlotData:
+        """Get the PlotData to plot: `plotdata`, downsampled to
+        `max_points` if it has more. The result is kept until the
+        points or the settings change."""
+        pd = self._plotdata
+        if pd.xsize() <= self._max_points:
+            return pd
+        settings = (pd.version, self._max_points, self._decimation)
+        if (self._decimated is None or self._decimated[0] is not pd.points
+                or self._decimated[1:4] != settings):
+            self._decimated = (pd.points,) + settings + (
+                pd.decimate(self._max_points, self._decimation),)
+        return self._decimated[4]
+
+    def write_tsv(self) -> None:
+        """Write the `.tsv` data file with headers and data."""
+        pd = self._plotdata
+        header = "\t".join([pd.xlabel] + pd.line_labels)
+        np.savetxt(self.tsv_filename(), self.render_data().points, fmt="%.10g",
+                   delimiter="\t", header=header, comments="")
+
+    def write_bin(self) -> None:
+        """Write the `.bin` data file of the points as raw little-endian
+        float64 rows, straight from the array buffer when it is already
+        contiguous little-endian float64, as loaded or memory-mapped."""
+        points = np.ascontiguousarray(self.render_data().points, dtype="<f8")
+        points.tofile(self.bin_filename())
+
+    def write_data(self) -> None:
+        """Write the data file gnuplot reads for the `transport`."""
+        if self._transport == Transport.BINARY:
+            self.write_bin()
+        else:
+            self.write_tsv()
+
+    def write_gp(self) -> None:
+        """Write the `.gp` commands file. It names the data and output
+        files relative to its own directory."""
+        pd = self._plotdata
+        data = quote(os.path.basename(self.data_filename()))
+        if self._transport == Transport.BINARY:
+            data += (f" binary record=({self.render_data().xsize()})"
+                     f" format=\"{'%float64' * (pd.ysize() + 1)}\" endian=little")
+        else:
+            data += " skip 1"
+        xlo, xhi = pd.xrange
+        ylo, yhi = pd.yrange
+        plots = [f"{data} using 1:{i} with lines title {quote(label)}"
+                 for i, label in enumerate(pd.line_labels, 2)]
+        with open(self.gp_filename(), "w") as f:
+            f.write(f"set terminal {self._filetype} size {self._size[0]},{self._size[1]}\n"
+                    f"set output {quote(os.path.basename(self.out_filename()))}\n"
+                    f"set title {quote(pd.title)}\n"
+                    f"set xlabel {quote(pd.xlabel)}\n"
+                    f"set ylabel {quote(pd.ylabel)}\n"
+                    f"set xrange [{xlo:.17g}:{xhi:.17g}]\n"
+                    f"set yrange [{ylo:.17g}:{yhi:.17g}]\n"
+                    + ("set datafile separator \"\\t\"\n"
+                       if self._transport == Transport.TSV else "")
+                    + "plot " + ", \\\n     ".join(plots) + "\n")
+
+    def plot_gp(self, pool: Optional[GnuplotPool] = None) -> str:
+        """Plot the `.gp` commands file with a persistent gnuplot from
+        `pool`, or the shared pool. Return gnuplot's messages."""
+        return (pool if pool is not None else get_pool()).plot(self.gp_filename())
+
+    def cache_key(self) -> str:
+        """Get the ArtifactCache key of the graphic, from the PlotData
+        contents and the settings that change the graphic."""
+        return ArtifactCache.key("PlotVisual", self._plotdata.digest(), self._filetype,
+                                 tuple(self._size), self._max_points, self._decimation)
+
+    def plot_cached(self, cache: Optional[ArtifactCache] = None,
+                    pool: Optional[GnuplotPool] = None) -> str:
+        """Copy the graphic from `cache`, or the shared cache, to the
+        output filename, plotting and caching it first if not cached.
+        Return the output filename."""
+        def make(filename: str) -> None:
+            self.write_data()
+            self.write_gp()
+            self.plot_gp(pool)
+            shutil.move(self.out_filename(), filename)
+
+        cache = cache if cache is not None else get_cache()
+        return cache.copy(self.cache_key(), "." + self._filetype, make, self.out_filename())
@@ -0,0 +1,185 @@
+"""Prefetcher rendering the tones and spoken positions a Player will play next."""
+import collections
+import math
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from . import instrument
+from .pitch import Pitch
+from .plotdata import PlotData
+from .speech import SpeechBank
+from .tonecache import ToneCache
+
+
+# Module Constants
+POINT_DURATION: float = 200.0  # milliseconds of the tone of a point
+READOUT_BYTES: int = 32 * 2**20  # most bytes of spoken positions kept
+LOOKAHEAD: float = 0.5  # seconds of navigation to prefetch ahead
+LOOKAHEAD_MIN: int = 2  # fewest points prefetched each way
+LOOKAHEAD_MAX: int = 16  # most points prefetched each way
+IDLE: float = 1.0  # seconds between moves counted as a pause
+SMOOTHING: float = 0.5  # weight of the newest interval between moves
+DECILES: int = 11  # 0%, 10%, ..., 100% positions
+
+
+class Prefetcher(object):
+    """Class to get the tones and spoken positions of the points of a
+    plot, and to render them ahead in a background thread.
+
+    After each move, the tones and spoken positions of the current
+    point, the next and previous `lookahead` points and the decile
+    positions of the line are rendered, nearest first, into the
+    ToneCache and a bounded LRU cache of spoken positions. The
+    lookahead grows with the speed of the moves, to cover `LOOKAHEAD`
+    seconds of them, and a newer move restarts the prefetch."""
+
+    def __init__(self, pd: PlotData, speech: SpeechBank, tones: ToneCache,
+                 duration: float = POINT_DURATION, max_bytes: int = READOUT_BYTES) -> None:
+        """Initialize a prefetcher of the points of `pd`, with speech clips
+        from `speech` and tones of `duration` milliseconds from `tones`."""
+        self._plotdata = pd
+        self._speech = speech
+        self._tones = tones
+        self._duration = duration
+        self._max_bytes = max_bytes
+        self._readouts: collections.OrderedDict[tuple[int, int, int], np.ndarray] = \
+            collections.OrderedDict()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        self._interval = IDLE
+        self._moved: Optional[float] = None
+        self._target: Optional[tuple[int, int]] = None
+        self._generation = 0
+        self._closed = False
+        self._changed = threading.Condition()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def lookahead(self) -> int:
+        """Number of points prefetched each way from the current point."""
+        k = math.ceil(LOOKAHEAD / self._interval) if self._interval > 0 else LOOKAHEAD_MAX
+        return min(max(k, LOOKAHEAD_MIN), LOOKAHEAD_MAX)
+
+    @property
+    def max_bytes(self) -> int:
+        """Most bytes of spoken positions to keep."""
+        return self._max_bytes
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of spoken positions in the cache."""
+        return self._nbytes
+
+    @property
+    def hits(self) -> int:
+        """Number of spoken positions found in the cache."""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """Number of spoken positions rendered because they were not in the cache."""
+        return self._misses
+
+    def tone(self, point: int, line: int,
+             duration: Optional[float] = None) -> Optional[np.ndarray]:
+        """Get the tone of a point of a line, by default of the point
+        duration, or None if its y is not a number. The pitch is of the
+        current points and y range."""
+        midi = self._plotdata.tones(rows=point).midi[line]
+        if not math.isfinite(midi):
+            return None
+        return self._tones.get(Pitch(float(midi)), duration or self._duration)
+
+    def readout(self, point: int, line: int) -> np.ndarray:
+        """Get the float32 samples speaking the x and y of a point of a
+        line, rendering them on a miss. Readouts of points since changed
+        are never found."""
+        key = (self._plotdata.version, point, line)
+        with self._lock:
+            samples = self._readouts.get(key)
+            if samples is not None:
+                self._readouts.move_to_end(key)
+                self._hits += 1
+                return samples
+            self._misses += 1
+        samples = self._speech.phrase(self._speech.position_words(self._plotdata, point, line))
+        samples.setflags(write=False)
+        with self._lock:
+            if key not in self._readouts and samples.nbytes <= self._max_bytes:
+                self._readouts[key] = samples
+                self._nbytes += samples.nbytes
+                while self._nbytes > self._max_bytes:
+                    _, old = self._readouts.popitem(last=False)
+                    self._nbytes -= old.nbytes
+        return samples
+
+    def targets(self, point: int, line: int) -> list[int]:
+        """Get the points to prefetch around `point`, nearest first, then
+        the decile positions."""
+        last = len(self._plotdata.points) - 1
+        points = [point]
+        for step in range(1, self.lookahead + 1):
+            points += [p for p in (point + step, point - step) if 0 <= p <= last]
+        points += [round(i * last / (DECILES - 1)) for i in range(DECILES)]
+        return list(dict.fromkeys(points))
+
+    def update(self, point: int, line: int) -> None:
+        """Note a move to a point of a line, adapt the lookahead to the
+        speed of the moves, and restart the prefetch around it."""
+        now = time.monotonic()
+        if self._moved is not None:
+            interval = min(now - self._moved, IDLE)
+            self._interval = SMOOTHING * interval + (1.0 - SMOOTHING) * self._interval
+        self._moved = now
+        with self._changed:
+            if self._closed:
+                return
+            self._target = (point, line)
+            self._generation += 1
+            self._idle.clear()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._changed.notify()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the prefetch is done. Return False on timeout."""
+        return self._idle.wait(timeout)
+
+    def close(self) -> None:
+        """Stop the prefetch thread."""
+        with self._changed:
+            self._closed = True
+            self._changed.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        """Prefetch around each newest target until closed."""
+        while True:
+            with self._changed:
+                while self._target is None and not self._closed:
+                    self._idle.set()
+                    self._changed.wait()
+                if self._closed:
+                    self._idle.set()
+                    return
+                (point, line), self._target = self._target, None
+                generation = self._generation
+            for p in self.targets(point, line):
+                if self._generation != generation or self._closed:
+                    break
+                try:
+                    with instrument.span("prefetch.point"):
+                        self.tone(p, line)
+                        self.readout(p, line)
+                except Exception:  # the player meets the error when it renders
+                    instrument.count("prefetch.errors")
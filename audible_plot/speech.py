@@ -0,0 +1,201 @@
+"""SpeechBank of pre-synthesized speech clips joined into spoken read-outs."""
+import concurrent.futures
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import wave
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from . import instrument
+from .artifactcache import ArtifactCache, get_cache
+from .plotdata import PlotData
+from .synth import SAMPLE_RATE, tone_samples
+
+
+# Module Constants
+SPEECH_ENGINES: tuple[tuple[str, ...], ...] = (  # commands, with {wav}, {rate} and {text}
+    ("espeak-ng", "-w", "{wav}", "{text}"),
+    ("espeak", "-w", "{wav}", "{text}"),
+    ("say", "-o", "{wav}", "--data-format=LEI16@{rate}", "{text}"))
+SPEECH_WORKERS: int = 4  # engine processes run at once to fill the bank
+SPEECH_DIGITS: int = 4  # significant digits of spoken numbers
+WORD_GAP: float = 40.0  # milliseconds of silence between words
+SILENCE_LEVEL: int = 300  # int16 level below which clip ends are trimmed
+PCM_SCALE: int = 32767
+ONES: tuple[str, ...] = (
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen",
+    "eighteen", "nineteen")
+TENS: tuple[str, ...] = (
+    "", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety")
+SCALES: tuple[tuple[int, str], ...] = (
+    (10**9, "billion"), (10**6, "million"), (1000, "thousand"), (100, "hundred"))
+VOCABULARY: tuple[str, ...] = ONES + TENS[2:] + tuple(name for _, name in SCALES) + (
+    "point", "minus", "equals", "from", "to", "times", "the", "not", "a", "number", "infinity")
+
+
+def integer_words(n: int) -> list[str]:
+    """Get the words of a whole number from 0, such as `twenty one`."""
+    if n < 20:
+        return [ONES[n]]
+    if n < 100:
+        return [TENS[n // 10]] + ([ONES[n % 10]] if n % 10 else [])
+    for scale, name in SCALES:
+        if n >= scale:
+            rest = integer_words(n % scale) if n % scale else []
+            return integer_words(n // scale) + [name] + rest
+    return []
+
+
+def number_words(v: float, digits: int = SPEECH_DIGITS) -> list[str]:
+    """Get the words of a number to `digits` significant digits, with
+    the digits after the point one by one, such as `three point five`,
+    and very large or small numbers as `times ten to the` a power."""
+    if math.isnan(v):
+        return ["not", "a", "number"]
+    if math.isinf(v):
+        return (["minus"] if v < 0 else []) + ["infinity"]
+    r = float(f"{v:.{digits}g}")
+    words = ["minus"] if r < 0 else []  # not for -0.0
+    r = abs(r)
+    if r == 0 or 1e-6 <= r < 1e12:
+        text, power = np.format_float_positional(r, trim="-"), None
+    else:
+        mantissa, exponent = f"{r:.{digits - 1}e}".split("e")
+        text, power = np.format_float_positional(float(mantissa), trim="-"), int(exponent)
+    whole, _, fraction = text.partition(".")
+    words += integer_words(int(whole))
+    if fraction:
+        words += ["point"] + [ONES[int(d)] for d in fraction]
+    if power is not None:
+        words += ["times", "ten", "to", "the"] + number_words(power)
+    return words
+
+
+def find_engine() -> Optional[tuple[str, ...]]:
+    """Get the command of the first installed speech engine, or None."""
+    for command in SPEECH_ENGINES:
+        if shutil.which(command[0]) is not None:
+            return command
+    return None
+
+
+class SpeechBank(object):
+    """Bank of speech clips, one per word or label, synthesized once
+    with a text-to-speech engine and kept as int16 in memory and in an
+    ArtifactCache between sessions. Read-outs are joined from clips
+    with exact silences between them, so speaking needs no engine."""
+
+    def __init__(self, rate: int = SAMPLE_RATE, command: Optional[Sequence[str]] = None,
+                 cache: Optional[ArtifactCache] = None) -> None:
+        """Initialize an empty bank of clips at `rate`, synthesized by
+        `command`, or else the first installed of `SPEECH_ENGINES`."""
+        self._rate = rate
+        self._command = tuple(command) if command is not None else find_engine()
+        self._cache = cache
+        self._clips: dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> int:
+        """Sample rate in samples per second."""
+        return self._rate
+
+    @property
+    def command(self) -> Optional[tuple[str, ...]]:
+        """Command of the speech engine, with `{wav}`, `{rate}` and `{text}`."""
+        return self._command
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of the clips in memory."""
+        return sum(clip.nbytes for clip in self._clips.values())
+
+    def __contains__(self, text: str) -> bool:
+        return text in self._clips
+
+    def __len__(self) -> int:
+        return len(self._clips)
+
+    def clip(self, text: str) -> np.ndarray:
+        """Get the int16 clip of a word or label, from memory, the cache,
+        or else synthesized and cached."""
+        clip = self._clips.get(text)
+        if clip is None:
+            cache = self._cache if self._cache is not None else get_cache()
+            key = ArtifactCache.key("SpeechBank", self._command, self._rate, text)
+            with cache.hold(key, ".npy", lambda filename: self._save(text, filename)) as path:
+                clip = np.load(path)
+            with self._lock:
+                self._clips[text] = clip
+        return clip
+
+    def prepare(self, pd: Optional[PlotData] = None, texts: Iterable[str] = ()) -> None:
+        """Get the clips of the `VOCABULARY`, the axis and line labels of
+        `pd`, and `texts` ready, running `SPEECH_WORKERS` engines at once."""
+        wanted = list(VOCABULARY) + list(texts)
+        if pd is not None:
+            wanted += [pd.xlabel, pd.ylabel] + pd.line_labels
+        missing = list(dict.fromkeys(t for t in wanted if t and t not in self._clips))
+        with concurrent.futures.ThreadPoolExecutor(SPEECH_WORKERS) as pool:
+            list(pool.map(self.clip, missing))
+
+    def phrase(self, words: Iterable[str], gap: float = WORD_GAP) -> np.ndarray:
+        """Join the clips of `words` with `gap` milliseconds of silence
+        into float32 samples, each clip copied once to its exact offset."""
+        clips = [self.clip(w) for w in words if w]
+        silence = tone_samples(gap, self._rate)
+        out = np.zeros(sum(len(c) for c in clips) + silence * max(len(clips) - 1, 0),
+                       dtype=np.float32)
+        pos = 0
+        for clip in clips:
+            np.multiply(clip, np.float32(1.0 / PCM_SCALE), out=out[pos:pos + len(clip)])
+            pos += len(clip) + silence
+        return out
+
+    def position_words(self, pd: PlotData, point: int, line: int = 0) -> list[str]:
+        """Get the words of the x and y of a point of a line, such as
+        `time equals three point five speed equals seven`."""
+        x, y = pd.points[point, 0], pd.points[point, line + 1]
+        return ([pd.xlabel, "equals"] + number_words(x)
+                + [pd.line_labels[line], "equals"] + number_words(y))
+
+    def axis_words(self, pd: PlotData, axis: str = "x") -> list[str]:
+        """Get the words of the label and range of the `x` or `y` axis,
+        such as `time from zero to ten`."""
+        label, (lo, hi) = (pd.xlabel, pd.xrange) if axis == "x" else (pd.ylabel, pd.yrange)
+        return [label, "from"] + number_words(lo) + ["to"] + number_words(hi)
+
+    @instrument.timed("speech.synthesize")
+    def synthesize(self, text: str) -> np.ndarray:
+        """Run the speech engine on `text`. Return int16 samples at `rate`,
+        mixed to mono and trimmed of silence at both ends."""
+        if self._command is None:
+            raise FileNotFoundError("Speech requires espeak-ng, espeak or say. Install one.")
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "speech.wav")
+            subprocess.run([arg.format(wav=filename, rate=self._rate, text=text)
+                            for arg in self._command], check=True, capture_output=True)
+            with wave.open(filename, "rb") as w:
+                if w.getsampwidth() != 2:
+                    raise ValueError(f"Speech samples must be 16-bit, not {8 * w.getsampwidth()}.")
+                channels, rate = w.getnchannels(), w.getframerate()
+                samples = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2")
+        samples = samples.reshape(-1, channels).mean(axis=1)
+        if rate != self._rate:
+            t = np.arange(int(len(samples) * self._rate / rate)) * (rate / self._rate)
+            samples = np.interp(t, np.arange(len(samples)), samples)
+        loud = np.flatnonzero(np.abs(samples) > SILENCE_LEVEL)
+        if len(loud):
+            samples = samples[loud[0]:loud[-1] + 1]
+        return np.rint(samples).astype(np.int16)
+
+    def _save(self, text: str, filename: str) -> None:
+        """Synthesize `text` and save the clip as `.npy` to `filename`."""
+        with open(filename, "wb") as f:
+            np.save(f, self.synthesize(text))
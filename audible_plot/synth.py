@@ -0,0 +1,319 @@
+"""Streaming tone synthesis with phase-continuous, band-limited oscillators."""
+import enum
+import functools
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+try:
+    import sounddevice as sd
+except (ImportError, OSError):
+    sd = None
+
+from . import instrument
+from .pitch import MIDI_MAX, MIDI_MIN, NOTES_PER_OCT, Pitch, midi2freq
+
+
+# Module Constants
+SAMPLE_RATE: int = 44100
+BLOCK_SIZE: int = 1024
+DURATION: float = 500.0  # milliseconds
+VOLUME: float = 0.2
+FADE: float = 5.0  # milliseconds of attack and release of each tone, and of a cut sound
+TABLE_SIZE: int = 2048
+TABLE_OCTAVES: int = -(-(MIDI_MAX - MIDI_MIN) // NOTES_PER_OCT)  # octaves, MIDI_MIN to MIDI_MAX
+FREQ_BASE: float = midi2freq(MIDI_MIN)
+
+Tone = tuple[Union[Pitch, float], float]  # (pitch or frequency, duration in milliseconds)
+
+
+class Waveform(enum.StrEnum):
+    """Enumeration of oscillator waveforms."""
+
+    SINE = enum.auto()
+    SQUARE = enum.auto()
+    SAWTOOTH = enum.auto()
+
+
+def tone_freq(pitch: Union[Pitch, float]) -> float:
+    """Get the frequency in hertz of a Pitch or a plain frequency."""
+    return pitch.freq if isinstance(pitch, Pitch) else float(pitch)
+
+
+def tone_samples(duration: float, rate: int = SAMPLE_RATE) -> int:
+    """Get the number of samples in a duration in milliseconds."""
+    return int(round(duration * rate / 1000))
+
+
+class Oscillator(object):
+    """Oscillator of one waveform that keeps its phase from block to block,
+    so consecutive tones join without a click."""
+
+    def __init__(self, waveform: Waveform = Waveform.SINE, volume: float = VOLUME,
+                 rate: int = SAMPLE_RATE) -> None:
+        """Initialize the oscillator at phase 0."""
+        self._waveform = Waveform(waveform)
+        self._volume = volume
+        self._rate = rate
+        self._phase = 0.0  # in cycles, from 0.0 to below 1.0
+
+    @property
+    def waveform(self) -> Waveform:
+        "Waveform of the oscillator. `sine`, `square` or `sawtooth`."
+        return self._waveform
+
+    @waveform.setter
+    def waveform(self, wf: Waveform) -> None:
+        self._waveform = Waveform(wf)
+
+    @property
+    def volume(self) -> float:
+        """Peak amplitude of the samples, 0.0 to 1.0."""
+        return self._volume
+
+    @volume.setter
+    def volume(self, v: float) -> None:
+        self._volume = v
+
+    @property
+    def rate(self) -> int:
+        """Sample rate in samples per second."""
+        return self._rate
+
+    @property
+    def phase(self) -> float:
+        """Phase of the next sample in cycles, 0.0 to below 1.0."""
+        return self._phase
+
+    def reset(self) -> None:
+        """Return the phase to 0."""
+        self._phase = 0.0
+
+    def render(self, freq: Union[float, np.ndarray], n: int,
+               out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Render the next n samples at a frequency in hertz, either a
+        float or an array of n per-sample frequencies, into `out`."""
+        if out is None:
+            out = np.empty(n)
+        self._phases(freq, n, out)
+        return self._shape(freq, out)
+
+    def _phases(self, freq: Union[float, np.ndarray], n: int, out: np.ndarray) -> None:
+        """Fill `out` with the phases of the next n samples and advance the phase."""
+        step = np.asarray(freq, dtype=np.float64) / self._rate  # cycles per sample
+        if step.ndim == 0:
+            np.multiply(np.arange(n), step, out=out)
+            advance = float(step) * n
+        else:
+            out[0] = 0.0
+            np.cumsum(step[:-1], out=out[1:])
+            advance = float(step.sum())
+        out += self._phase
+        np.mod(out, 1.0, out=out)
+        self._phase = (self._phase + advance) % 1.0
+
+    def _shape(self, freq: Union[float, np.ndarray], out: np.ndarray) -> np.ndarray:
+        """Convert the phases in `out` to samples of the waveform in place."""
+        if self._waveform is Waveform.SINE:
+            out *= 2 * np.pi
+            np.sin(out, out=out)
+        elif self._waveform is Waveform.SQUARE:
+            np.sign(0.5 - out, out=out)
+        else:
+            out -= np.floor(out + 0.5)
+            out *= 2.0
+        out *= self._volume
+        return out
+
+
+def harmonics(waveform: Waveform, n: int) -> np.ndarray:
+    """Get the sine amplitudes of harmonics 0 to n of a waveform, which
+    match the phase and sign of the naive Oscillator waveforms."""
+    k = np.arange(n + 1, dtype=np.float64)
+    a = np.zeros(n + 1)
+    if waveform is Waveform.SINE:
+        a[1] = 1.0
+    elif waveform is Waveform.SQUARE:
+        a[1::2] = 4 / (np.pi * k[1::2])
+    else:
+        a[1:] = 2 / (np.pi * k[1:]) * np.where(k[1:] % 2, 1.0, -1.0)
+    return a
+
+
+class WavetableBank(object):
+    """Band-limited tables of one cycle of each waveform, one table per
+    octave, each with only the harmonics below the Nyquist frequency at
+    the top of its octave."""
+
+    def __init__(self, rate: int = SAMPLE_RATE, size: int = TABLE_SIZE) -> None:
+        """Build the tables by inverse FFT of the harmonic amplitudes."""
+        if size < 2 or size & (size - 1):
+            raise ValueError(f"Table size {size} must be a power of two.")
+        self._rate = rate
+        self._size = size
+        self._tables: dict[Waveform, np.ndarray] = {}
+        tops = FREQ_BASE * 2.0 ** np.arange(1, TABLE_OCTAVES + 1)
+        limits = np.clip((rate / 2) // tops, 1, size // 2 - 1).astype(int)
+        for wf in Waveform:
+            tables = np.empty((TABLE_OCTAVES, size + 1))  # one guard sample for interpolation
+            for octave, n in enumerate(limits):
+                spectrum = np.zeros(size // 2 + 1, dtype=np.complex128)
+                spectrum[:n + 1] = -0.5j * size * harmonics(wf, n)
+                tables[octave, :size] = np.fft.irfft(spectrum, size)
+            tables[:, size] = tables[:, 0]
+            self._tables[wf] = tables
+
+    @property
+    def rate(self) -> int:
+        """Sample rate in samples per second the tables are limited for."""
+        return self._rate
+
+    @property
+    def size(self) -> int:
+        """Number of samples in one cycle of each table."""
+        return self._size
+
+    def octave(self, freq: float) -> int:
+        """Get the index of the table octave for a frequency in hertz."""
+        return min(max(int(np.log2(freq / FREQ_BASE)), 0), TABLE_OCTAVES - 1)
+
+    def octaves(self, freq: np.ndarray) -> np.ndarray:
+        """Get the indexes of the table octaves for an array of frequencies."""
+        octave = np.log2(np.asarray(freq, dtype=np.float64) / FREQ_BASE).astype(np.intp)
+        return np.clip(octave, 0, TABLE_OCTAVES - 1)
+
+    def table(self, waveform: Waveform, freq: float) -> np.ndarray:
+        """Get the table of a waveform for a frequency in hertz."""
+        return self._tables[Waveform(waveform)][self.octave(freq)]
+
+    def tables(self, waveform: Waveform) -> np.ndarray:
+        """Get the tables of a waveform, octaves by size + 1 samples."""
+        return self._tables[Waveform(waveform)]
+
+
+@functools.lru_cache(maxsize=None)
+def get_bank(rate: int = SAMPLE_RATE, size: int = TABLE_SIZE) -> WavetableBank:
+    """Get the shared WavetableBank of a sample rate and table size."""
+    return WavetableBank(rate, size)
+
+
+class WavetableOscillator(Oscillator):
+    """Oscillator rendering band-limited waveforms by linear
+    interpolation in the tables of a WavetableBank."""
+
+    def __init__(self, waveform: Waveform = Waveform.SINE, volume: float = VOLUME,
+                 rate: int = SAMPLE_RATE, bank: Union[WavetableBank, None] = None) -> None:
+        """Initialize the oscillator at phase 0 with a shared bank by default."""
+        super().__init__(waveform, volume, rate)
+        self._bank = bank if bank is not None else get_bank(rate)
+        self._ramp = np.arange(BLOCK_SIZE, dtype=np.float64)
+
+    @property
+    def bank(self) -> WavetableBank:
+        """WavetableBank of the tables."""
+        return self._bank
+
+    def render(self, freq: Union[float, np.ndarray], n: int,
+               out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Render the next n samples at a frequency in hertz, either a
+        float or an array of n per-sample frequencies, into `out`, by
+        interpolation in the table of the highest frequency."""
+        if out is None:
+            out = np.empty(n)
+        size = self._bank.size
+        table = self._bank.table(self._waveform, float(np.max(freq)))
+        step = np.asarray(freq, dtype=np.float64) * (size / self._rate)  # table samples per sample
+        if step.ndim == 0:
+            if len(self._ramp) < n:
+                self._ramp = np.arange(n, dtype=np.float64)
+            np.multiply(self._ramp[:n], step, out=out)
+            advance = float(step) * n
+        else:
+            out[0] = 0.0
+            np.cumsum(step[:-1], out=out[1:])
+            advance = float(step.sum())
+        out += self._phase * size
+        self._phase = (self._phase + advance / size) % 1.0
+
+        index = out.astype(np.intp)
+        out -= index  # fraction between table samples
+        index &= size - 1  # wrap to one cycle without a float modulo
+        lo = table[index]
+        index += 1
+        hi = table[index]
+        hi -= lo
+        out *= hi
+        out += lo
+        out *= self._volume
+        return out
+
+
+class Synth(object):
+    """Tone synthesizer that streams fixed-size blocks of a sequence of
+    tones from one phase-continuous oscillator."""
+
+    def __init__(self, waveform: Waveform = Waveform.SINE, volume: float = VOLUME,
+                 rate: int = SAMPLE_RATE, block_size: int = BLOCK_SIZE,
+                 band_limited: bool = True) -> None:
+        """Initialize the synthesizer and its oscillator, a band-limited
+        WavetableOscillator unless `band_limited` is False."""
+        if band_limited:
+            self._oscillator = WavetableOscillator(waveform, volume, rate)
+        else:
+            self._oscillator = Oscillator(waveform, volume, rate)
+        self._block_size = block_size
+
+    @property
+    def oscillator(self) -> Oscillator:
+        """Oscillator rendering the samples."""
+        return self._oscillator
+
+    @property
+    def block_size(self) -> int:
+        """Number of samples in each streamed block."""
+        return self._block_size
+
+    def blocks(self, tones: Iterable[Tone]) -> Iterator[np.ndarray]:
+        """Yield blocks of `block_size` samples of the tones, given as
+        (pitch or frequency, duration in milliseconds) pairs. The last
+        block is padded with silence."""
+        osc = self._oscillator
+        block = np.empty(self._block_size)
+        filled = 0
+        for pitch, duration in tones:
+            freq = tone_freq(pitch)
+            remaining = tone_samples(duration, osc.rate)
+            while remaining:
+                k = min(remaining, self._block_size - filled)
+                osc.render(freq, k, out=block[filled:filled + k])
+                filled += k
+                remaining -= k
+                if filled == self._block_size:
+                    yield block
+                    block = np.empty(self._block_size)
+                    filled = 0
+        if filled:
+            block[filled:] = 0.0
+            yield block
+
+    @instrument.timed("synth.render")
+    def render(self, tones: Iterable[Tone]) -> np.ndarray:
+        """Render the tones into one array, without padding."""
+        tones = list(tones)
+        n = sum(tone_samples(d, self._oscillator.rate) for _, d in tones)
+        out = np.empty(n)
+        pos = 0
+        for block in self.blocks(tones):
+            k = min(len(block), n - pos)
+            out[pos:pos + k] = block[:k]
+            pos += k
+        return out
+
+    def play(self, tones: Iterable[Tone]) -> None:
+        """Play the tones with `sounddevice`, one block at a time."""
+        if sd is None:
+            raise ImportError("Playing tones requires sounddevice. Use\npip install sounddevice")
+        with sd.OutputStream(samplerate=self._oscillator.rate, channels=1,
+                             blocksize=self._block_size, dtype="float32") as stream:
+            for block in self.blocks(tones):
+                stream.write(block.astype(np.float32))
@@ -0,0 +1,148 @@
+"""Bounded LRU cache of rendered tone buffers."""
+import collections
+import threading
+from typing import Union
+
+import numpy as np
+
+from . import instrument
+from .pitch import Pitch, freq2midi, midi2freq
+from .synth import (FADE, SAMPLE_RATE, VOLUME, Waveform, WavetableOscillator, tone_freq,
+                    tone_samples)
+
+
+# Module Constants
+MAX_BYTES: int = 16 * 2**20
+CENTS: float = 1.0  # tolerance of pitches sharing a buffer
+CENTS_PER_NOTE: int = 100
+
+ToneKey = tuple[int, int, float, Waveform]  # (cents steps, samples, volume, waveform)
+
+
+class ToneCache(object):
+    """Cache of rendered tones, keyed by pitch, duration, volume and
+    waveform, evicting the least recently used tones beyond `max_bytes`.
+
+    Pitches within `cents` of each other share one buffer, rendered at
+    the quantized pitch, with an attack and release of `fade`
+    milliseconds, as in a PlotAudio, so it starts and ends silent.
+    Buffers are read-only, so they can be handed to the playback path
+    without copying."""
+
+    def __init__(self, max_bytes: int = MAX_BYTES, cents: float = CENTS,
+                 rate: int = SAMPLE_RATE, fade: float = FADE) -> None:
+        """Initialize an empty cache."""
+        if cents <= 0:
+            raise ValueError("Cents tolerance must be above 0.")
+        self._max_bytes = max_bytes
+        self._cents = cents
+        self._rate = rate
+        self._fade = fade
+        self._tones: collections.OrderedDict[ToneKey, np.ndarray] = collections.OrderedDict()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self) -> int:
+        """Most bytes of buffers to keep."""
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, mb: int) -> None:
+        with self._lock:
+            self._max_bytes = mb
+            self._evict()
+
+    @property
+    def cents(self) -> float:
+        """Tolerance in cents of pitches sharing a buffer."""
+        return self._cents
+
+    @property
+    def rate(self) -> int:
+        """Sample rate in samples per second."""
+        return self._rate
+
+    @property
+    def fade(self) -> float:
+        """Milliseconds of attack and release of each tone."""
+        return self._fade
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of buffers in the cache."""
+        return self._nbytes
+
+    @property
+    def hits(self) -> int:
+        """Number of tones found in the cache."""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """Number of tones rendered because they were not in the cache."""
+        return self._misses
+
+    @property
+    def evictions(self) -> int:
+        """Number of tones evicted to stay within `max_bytes`."""
+        return self._evictions
+
+    def __len__(self) -> int:
+        return len(self._tones)
+
+    def key(self, pitch: Union[Pitch, float], duration: float, volume: float = VOLUME,
+            waveform: Waveform = Waveform.SINE) -> ToneKey:
+        """Get the cache key of a tone, with the pitch quantized to `cents`."""
+        midi = pitch.midi if isinstance(pitch, Pitch) else freq2midi(tone_freq(pitch))
+        steps = round(midi * CENTS_PER_NOTE / self._cents)
+        return (steps, tone_samples(duration, self._rate), round(volume, 4), Waveform(waveform))
+
+    def get(self, pitch: Union[Pitch, float], duration: float, volume: float = VOLUME,
+            waveform: Waveform = Waveform.SINE) -> np.ndarray:
+        """Get the read-only buffer of a tone, rendering it on a miss."""
+        key = self.key(pitch, duration, volume, waveform)
+        with self._lock:
+            buf = self._tones.get(key)
+            if buf is not None:
+                self._tones.move_to_end(key)
+                self._hits += 1
+                instrument.count("tonecache.hits")
+                return buf.view()
+            self._misses += 1
+        instrument.count("tonecache.misses")
+        buf = self.render(key)
+        with self._lock:
+            if key not in self._tones and buf.nbytes <= self._max_bytes:
+                self._tones[key] = buf
+                self._nbytes += buf.nbytes
+                self._evict()
+        return buf.view()
+
+    def render(self, key: ToneKey) -> np.ndarray:
+        """Render the read-only buffer of a tone key, faded in and out."""
+        steps, samples, volume, waveform = key
+        freq = midi2freq(steps * self._cents / CENTS_PER_NOTE)
+        buf = WavetableOscillator(waveform, volume, self._rate).render(freq, samples)
+        fade = max(tone_samples(self._fade, self._rate), 1)
+        pos = np.arange(samples, dtype=np.float64)
+        buf *= np.clip(np.minimum(pos, samples - pos) / fade, 0.0, 1.0)
+        buf.setflags(write=False)
+        return buf
+
+    def clear(self) -> None:
+        """Empty the cache and zero the counters."""
+        with self._lock:
+            self._tones.clear()
+            self._nbytes = 0
+            self._hits = self._misses = self._evictions = 0
+
+    def _evict(self) -> None:
+        """Evict the least recently used tones until within `max_bytes`."""
+        while self._nbytes > self._max_bytes:
+            _, buf = self._tones.popitem(last=False)
+            self._nbytes -= buf.nbytes
+            self._evictions += 1
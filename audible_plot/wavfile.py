@@ -0,0 +1,65 @@
+"""Memory-mapped WAV file writing and reading."""
+import struct
+from typing import Union
+
+import numpy as np
+
+
+# Module Constants
+WAV_HEADER_SIZE: int = 44
+WAV_PCM: int = 1
+WAV_FLOAT: int = 3
+WAV_FORMATS: dict[np.dtype, int] = {
+    np.dtype("<i2"): WAV_PCM, np.dtype("<f4"): WAV_FLOAT}
+PCM_SCALE: int = 32767
+
+
+def wav_header(nframes: int, channels: int, rate: int, dtype: np.dtype) -> bytes:
+    """Get the 44 byte header of a WAV file of int16 or float32 samples."""
+    dtype = np.dtype(dtype).newbyteorder("<")
+    if dtype not in WAV_FORMATS:
+        raise ValueError(f"WAV samples must be int16 or float32, not {dtype}.")
+    width = dtype.itemsize
+    data_size = nframes * channels * width
+    return (b"RIFF" + struct.pack("<I", 36 + data_size) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, WAV_FORMATS[dtype], channels, rate,
+                                    rate * channels * width, channels * width, 8 * width)
+            + b"data" + struct.pack("<I", data_size))
+
+
+def open_wav(filename: str, nframes: int, channels: int = 1, rate: int = 44100,
+             dtype: Union[str, np.dtype] = "<i2") -> np.memmap:
+    """Create a WAV file and return its samples as a writable memory map
+    of nframes by channels, so audio is rendered straight into the file."""
+    dtype = np.dtype(dtype).newbyteorder("<")
+    header = wav_header(nframes, channels, rate, dtype)
+    with open(filename, "wb") as f:
+        f.write(header)
+        f.truncate(WAV_HEADER_SIZE + nframes * channels * dtype.itemsize)
+    return np.memmap(filename, dtype=dtype, mode="r+", offset=WAV_HEADER_SIZE,
+                     shape=(nframes, channels))
+
+
+def read_wav(filename: str) -> tuple[int, np.memmap]:
+    """Read a WAV file written by `open_wav`. Return the sample rate and
+    a read-only memory map of the samples, frames by channels."""
+    with open(filename, "rb") as f:
+        header = f.read(WAV_HEADER_SIZE)
+    if header[:4] != b"RIFF" or header[8:16] != b"WAVEfmt " or header[36:40] != b"data":
+        raise ValueError(f"{filename} is not a simple WAV file.")
+    fmt, channels, rate, _, _, bits = struct.unpack("<HHIIHH", header[20:36])
+    dtype = np.dtype("<i2") if fmt == WAV_PCM and bits == 16 else np.dtype("<f4")
+    if fmt not in (WAV_PCM, WAV_FLOAT) or bits != 8 * dtype.itemsize:
+        raise ValueError(f"{filename} samples must be int16 or float32.")
+    (data_size,) = struct.unpack("<I", header[40:44])
+    nframes = data_size // (channels * dtype.itemsize)
+    return rate, np.memmap(filename, dtype=dtype, mode="r", offset=WAV_HEADER_SIZE,
+                           shape=(nframes, channels))
+
+
+def to_pcm(samples: np.ndarray, out: np.ndarray) -> None:
+    """Convert float samples from -1.0 to 1.0 into `out`, int16 or float32."""
+    if out.dtype.kind == "f":
+        out[...] = samples
+    else:
+        out[...] = np.rint(np.clip(samples, -1.0, 1.0) * PCM_SCALE)
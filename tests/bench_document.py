@@ -0,0 +1,57 @@
+"""Benchmark of PlotDocument throughput for 1, 10 and 100 plots.
+
+Uses the installed gnuplot, speech engine and pandoc, or the test
+stand-ins for any that are missing. Run from the repository root with
+`python -m tests.bench_document`."""
+import shutil
+import stat
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from audible_plot.artifactcache import ArtifactCache
+from audible_plot.document import PlotDocument
+from audible_plot.gnuplot import GnuplotPool
+from audible_plot.plotdata import PlotData
+from audible_plot.speech import find_engine
+from tests.helpers import GNUPLOT_STUB, PANDOC_STUB, TTS_STUB
+
+
+PLOTS: tuple[int, ...] = (1, 10, 100)
+POINTS: int = 200
+
+
+def stub(directory: Path, name: str, source: str) -> str:
+    path = directory / name
+    path.write_text(source.format(python=sys.executable, log=str(directory / (name + ".log"))))
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        tmp = Path(directory)
+        gnuplot = "gnuplot" if shutil.which("gnuplot") else stub(tmp, "gnuplot", GNUPLOT_STUB)
+        pandoc = "pandoc" if shutil.which("pandoc") else stub(tmp, "pandoc", PANDOC_STUB)
+        speech = find_engine() or (stub(tmp, "espeak", TTS_STUB), "-w", "{wav}", "{text}")
+        print(f"gnuplot {gnuplot}\npandoc {pandoc}\nspeech {speech[0]}")
+        x = np.linspace(0.0, 1.0, POINTS)
+        with GnuplotPool(executable=gnuplot) as pool:
+            for n in PLOTS:
+                cache = ArtifactCache(str(tmp / f"cache{n}"))
+                doc = PlotDocument(str(tmp / f"report{n}"), ("html",), pool, cache, speech, pandoc)
+                for i in range(n):
+                    pd = PlotData(np.column_stack((x, np.sin((i + 1) * x))))
+                    pd.title = f"Plot {i}"
+                    doc.add(pd)
+                cold = doc.build()
+                warm = doc.build()
+                print(f"{n:4} plots  cold {cold['total']:7.3f} s {n / cold['total']:7.1f} plots/s"
+                      f"  cached {warm['total']:7.3f} s {n / warm['total']:7.1f} plots/s"
+                      f"  pandoc {cold['pandoc']:6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark of the key-to-sound latency of the Player.
+
+Synthetic key events are queued to a running Player, whose output is
+called back by a NullStream at the pace of a device. The latency of a
+key is from queueing it to the callback of the first block with its
+sound. Uses the installed speech engine, or the test stand-in. Run
+from the repository root with `python -m tests.bench_latency [--budget 30]`.
+The 50th and 99th percentile latency of each key is printed, and the
+exit status is 1 if any 99th percentile is over the budget."""
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from audible_plot.artifactcache import ArtifactCache
+from audible_plot.output import OUTPUT_BLOCK_SIZE, AudioOutput, NullStream
+from audible_plot.player import Coalesce, Player
+from audible_plot.plotdata import PlotData
+from audible_plot.speech import SpeechBank, find_engine
+from tests.bench_document import stub
+from tests.helpers import TTS_STUB
+
+
+PRESSES: int = 50
+BUDGET: float = 30.0  # milliseconds of 99th percentile latency
+TIMEOUT: float = 2.0  # seconds to wait for the sound of a key
+POINTS: int = 1000
+CASES: tuple[tuple[str, str, str], ...] = (  # (name, key setting the mode, key timed)
+    ("t", "t", "t"), ("right tone", "t", "right"), ("left tone", "t", "left"),
+    ("up tone", "t", "up"), ("5 tone", "t", "5"), ("space tone", "t", "space"),
+    ("s", "s", "s"), ("right speech", "s", "right"), ("space speech", "s", "space"),
+    ("x", "t", "x"), ("f", "t", "f"), ("l", "t", "l"), ("d", "t", "d"))
+
+
+class Probe(object):
+    """Sink of a NullStream that times the first sound after a key,
+    pressed at a random phase of the block period as a listener would."""
+
+    def __init__(self, period: float) -> None:
+        self._period = period
+        self._rng = np.random.default_rng(0)
+        self._sent: Optional[float] = None
+        self._latency = 0.0
+        self._sounded = threading.Event()
+        self._silent = threading.Event()
+
+    def sink(self, outdata: np.ndarray, t: float) -> None:
+        if not outdata.any():
+            self._silent.set()
+        elif self._sent is not None:
+            self._latency, self._sent = t - self._sent, None
+            self._sounded.set()
+
+    def quiet(self, player: Player) -> None:
+        """Stop the sound and wait for a silent block."""
+        player.output.stop()
+        self._silent.clear()
+        self._silent.wait(TIMEOUT)
+
+    def press(self, player: Player, key: str) -> float:
+        """Queue a key and return the seconds until its sound."""
+        self.quiet(player)
+        time.sleep(self._rng.uniform(0.0, self._period))
+        self._sounded.clear()
+        self._sent = time.perf_counter()
+        player.put(key)
+        if not self._sounded.wait(TIMEOUT):
+            raise RuntimeError(f"Key {key} made no sound in {TIMEOUT} seconds.")
+        return self._latency
+
+
+def measure(player: Player, probe: Probe, presses: int) -> dict[str, tuple[float, float]]:
+    """Time each case `presses` times, after one untimed press to warm
+    the caches. Return the 50th and 99th percentile seconds of each."""
+    results = {}
+    for name, mode, key in CASES:
+        probe.press(player, mode)
+        probe.press(player, key)
+        latencies = [probe.press(player, key) for _ in range(presses)]
+        results[name] = (float(np.percentile(latencies, 50)),
+                         float(np.percentile(latencies, 99)))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--presses", type=int, default=PRESSES, help="presses of each key")
+    parser.add_argument("--budget", type=float, default=BUDGET,
+                        help="most milliseconds of 99th percentile latency")
+    parser.add_argument("--coalesce", choices=list(Coalesce), default=Coalesce.TICK,
+                        help="policy of the moves that come while a point sounds")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        tmp = Path(directory)
+        command = find_engine() or (stub(tmp, "espeak", TTS_STUB), "-w", "{wav}", "{text}")
+        x = np.linspace(0.0, 10.0, POINTS)
+        pd = PlotData(np.column_stack((x, np.sin(x), np.cos(x))))
+        pd.title = "Latency"
+        output = AudioOutput()
+        speech = SpeechBank(output.rate, command, ArtifactCache(str(tmp / "cache")))
+        speech.prepare(pd)
+        player = Player(pd, output, speech, coalesce=args.coalesce)
+        probe = Probe(OUTPUT_BLOCK_SIZE / output.rate)
+        loop = threading.Thread(target=player.run)
+        loop.start()
+        try:
+            with NullStream(output, sink=probe.sink):
+                results = measure(player, probe, args.presses)
+        finally:
+            player.put("q")
+            loop.join()
+            player.close()
+    over = []
+    print(f"{'key':16} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, (p50, p99) in results.items():
+        flag = p99 * 1000 > args.budget
+        if flag:
+            over.append(name)
+        print(f"{name:16} {p50 * 1000:8.2f} {p99 * 1000:8.2f} {'OVER BUDGET' if flag else ''}")
+    if over:
+        print(f"Over the {args.budget:g} ms budget: " + ", ".join(over), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
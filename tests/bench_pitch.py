@@ -0,0 +1,40 @@
+"""Micro-benchmark of Pitch note lookups against string parsing.
+
+Run from the repository root with `python -m tests.bench_pitch`."""
+import timeit
+
+from audible_plot.pitch import NOTE_MIDIS, NOTE_NAMES, Pitch, midi2note, note2midi
+
+
+NUMBER: int = 100000
+NOTES: list[str] = ["C#4", "Eb3", "F♯2", "A4", "B-5", "G+6"]
+
+
+def parse_path() -> None:
+    """Parse and format notes character by character."""
+    for n in NOTES:
+        midi2note(note2midi(n))
+
+
+def table_path() -> None:
+    """Parse and format notes by table lookup."""
+    for n in NOTES:
+        NOTE_NAMES[NOTE_MIDIS[n]]
+
+
+def pitch_path() -> None:
+    """Construct a Pitch from each note and read back note and freq."""
+    for n in NOTES:
+        p = Pitch(n)
+        p.note
+        p.freq
+
+
+def main() -> None:
+    for name, func in [("parse", parse_path), ("table", table_path), ("pitch", pitch_path)]:
+        t = min(timeit.repeat(func, number=NUMBER // len(NOTES), repeat=5))
+        print(f"{name:8} {t / NUMBER * 1e9:8.1f} ns/note")
+
+
+if __name__ == "__main__":
+    main()
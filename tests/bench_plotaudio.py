@@ -0,0 +1,38 @@
+"""Benchmark of parallel PlotAudio rendering on 1 to N processes.
+
+Run from the repository root with `python -m tests.bench_plotaudio [N]`."""
+import os
+import sys
+import time
+
+import numpy as np
+
+from audible_plot.plotaudio import PlotAudio
+from audible_plot.plotdata import PlotData
+
+
+POINTS: int = 100000
+LINES: int = 9
+LINE_DURATION: float = 60000.0  # milliseconds
+
+
+def main() -> None:
+    cores = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    x = np.linspace(0.0, 1.0, POINTS)
+    pd = PlotData(np.column_stack([x] + [np.sin((i + 1) * 10 * x) for i in range(LINES)]))
+    pa = PlotAudio(pd)
+    pa.max_points = POINTS  # render every point, not the default decimation
+    pa.point_duration = LINE_DURATION / POINTS
+    out = np.empty((pa.nframes(), 1), dtype=np.int16)
+    serial = None
+    for processes in range(1, cores + 1):
+        pa.processes = processes
+        t = time.perf_counter()
+        pa.render(out)
+        t = time.perf_counter() - t
+        serial = serial or t
+        print(f"{processes:3} processes {t:7.3f} s  speedup {serial / t:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Benchmark suite of Pitch, PlotData, synthesis, PlotAudio and PlotVisual
+workloads, written as JSON and compared against a stored baseline.
+
+Run from the repository root with
+`python -m tests.bench_suite [--quick] [--out run.json] [--baseline base.json]`.
+With a baseline, each benchmark slower than it by more than the
+tolerance is flagged and the exit status is 1, so CI can fail on it."""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from typing import Callable, Optional
+
+import numpy as np
+
+from audible_plot.gnuplot import GnuplotPool
+from audible_plot.pitch import Pitch, PitchArray
+from audible_plot.plotaudio import PlotAudio
+from audible_plot.plotdata import PlotData
+from audible_plot.plotvisual import PlotVisual
+from audible_plot.synth import SAMPLE_RATE, Synth, Waveform, WavetableOscillator
+
+
+REPEAT: int = 5
+TOLERANCE: float = 0.25  # slowdown flagged as a regression
+RANGE_SIZES: tuple[int, ...] = (10**3, 10**4, 10**5, 10**6, 10**7)
+QUICK_SIZES: tuple[int, ...] = (10**3, 10**4, 10**5)
+BULK_PITCHES: int = 10**6
+RENDER_POINTS: int = 10**4
+VISUAL_POINTS: int = 10**5
+
+Bench = tuple[str, Callable[[], object]]
+
+
+def line_points(n: int, lines: int = 1) -> np.ndarray:
+    x = np.linspace(0.0, 1.0, n)
+    return np.column_stack([x] + [np.sin((i + 1) * 10 * x) for i in range(lines)])
+
+
+def pitch_benches() -> list[Bench]:
+    """Scalar and bulk pitch conversion."""
+    midis = np.random.default_rng(0).uniform(21.0, 108.0, BULK_PITCHES)
+    freqs = PitchArray(midis).freq
+    return [("pitch.scalar.note", lambda: Pitch("C#4").freq),
+            ("pitch.scalar.freq", lambda: Pitch(440.0).note),
+            ("pitch.bulk.from_freq", lambda: PitchArray.from_freq(freqs)),
+            ("pitch.bulk.note", lambda: PitchArray(midis).note)]
+
+
+def range_benches(sizes: tuple[int, ...]) -> list[Bench]:
+    """Range computation from new points, and reset from the cache."""
+    benches: list[Bench] = []
+    for n in sizes:
+        pd = PlotData(line_points(n))
+        p = pd.points
+        benches += [(f"plotdata.ranges.{n:.0e}", lambda pd=pd, p=p: setattr(pd, "points", p)),
+                    (f"plotdata.autoyrange.{n:.0e}", pd.autoyrange)]
+    return benches
+
+
+def synth_benches() -> list[Bench]:
+    """Half-second tone synthesis per waveform, and a tone sequence."""
+    n = SAMPLE_RATE // 2
+    out = np.empty(n)
+    benches: list[Bench] = []
+    for wf in Waveform:
+        osc = WavetableOscillator(wf, rate=SAMPLE_RATE)
+        benches.append((f"synth.tone.{wf}", lambda osc=osc: osc.render(440.0, n, out)))
+    synth = Synth()
+    tones = [(Pitch(m), 100.0) for m in range(48, 72)]
+    benches.append(("synth.render.sequence", lambda: synth.render(tones)))
+    return benches
+
+
+def render_benches() -> list[Bench]:
+    """Full plot render to int16 samples, one line at a time and polyphonic."""
+    pa = PlotAudio(PlotData(line_points(RENDER_POINTS, 3)))
+    pa.max_points = RENDER_POINTS
+    pa.point_duration = 10.0
+    out = np.empty((pa.nframes(), 1), dtype=np.int16)
+    poly = PlotAudio(pa.plotdata)
+    poly.max_points = RENDER_POINTS
+    poly.point_duration = 10.0
+    poly.polyphonic = True
+    stereo = np.empty((poly.nframes(), 2), dtype=np.int16)
+    return [("plotaudio.render", lambda: pa.render(out)),
+            ("plotaudio.render.polyphonic", lambda: poly.render(stereo))]
+
+
+def visual_benches(directory: str) -> list[Bench]:
+    """TSV, binary and gnuplot commands writing, and gnuplot if installed."""
+    pv = PlotVisual(PlotData(line_points(VISUAL_POINTS, 2)))
+    pv.output = os.path.join(directory, "bench")
+    pv.max_points = VISUAL_POINTS
+    benches: list[Bench] = [("plotvisual.write_tsv", pv.write_tsv),
+                            ("plotvisual.write_bin", pv.write_bin),
+                            ("plotvisual.write_gp", pv.write_gp)]
+    if shutil.which("gnuplot") is not None:
+        pool = GnuplotPool(1)
+        pv.write_bin()
+        pv.write_gp()
+        benches.append(("gnuplot.plot", lambda: pool.plot(pv.gp_filename())))
+    return benches
+
+
+def measure(func: Callable[[], object]) -> dict[str, float]:
+    """Time a benchmark: the best and median seconds per call over
+    `REPEAT` runs of enough calls to take about 0.2 seconds."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = [t / number for t in timer.repeat(REPEAT, number)]
+    return {"best": min(times), "median": statistics.median(times), "number": number}
+
+
+def run(quick: bool = False) -> dict:
+    """Run the suite. Return the results and the machine they ran on."""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        benches = (pitch_benches() + range_benches(QUICK_SIZES if quick else RANGE_SIZES)
+                   + synth_benches() + render_benches() + visual_benches(directory))
+        for name, func in benches:
+            results[name] = measure(func)
+            print(f"{name:32} {results[name]['best'] * 1e6:12.2f} us", file=sys.stderr)
+    return {"meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                     "python": platform.python_version(), "numpy": np.__version__,
+                     "machine": platform.machine(),
+                     "system": platform.system(), "cpus": os.cpu_count(), "unit": "s/call"},
+            "results": results}
+
+
+def compare(run: dict, baseline: dict, tolerance: float = TOLERANCE) -> list[str]:
+    """Compare the best times of a run against a baseline. Print each
+    ratio to stderr and return the names of benchmarks slower by over `tolerance`."""
+    regressions = []
+    for name, result in run["results"].items():
+        base: Optional[dict] = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:32} new", file=sys.stderr)
+            continue
+        ratio = result["best"] / base["best"]
+        flag = ratio > 1.0 + tolerance
+        if flag:
+            regressions.append(name)
+        print(f"{name:32} {ratio:6.2f}x {'REGRESSION' if flag else ''}", file=sys.stderr)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="skip the largest range sizes")
+    parser.add_argument("--out", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON file of results")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="slowdown flagged as a regression, 0.25 for 25%%")
+    args = parser.parse_args()
+    results = run(args.quick)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions: " + ", ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Benchmark of wavetable oscillators against the sandbox Synth.
+
+Run from the repository root with `python -m tests.bench_synth`."""
+import timeit
+
+import numpy as np
+
+from audible_plot.synth import Oscillator, Waveform, WavetableOscillator
+
+
+SAMPLE_RATE: int = 44100
+DURATION: float = 0.5  # seconds
+FREQ: float = 440.0
+VOLUME: float = 0.2
+
+
+def sandbox_synth(waveform: Waveform) -> np.ndarray:
+    """Render a tone the way sandbox/audio.py Synth does, all three waveforms."""
+    samples = int(DURATION * SAMPLE_RATE)
+    t = np.linspace(0, DURATION, samples, False)
+    sign = VOLUME * np.sin(FREQ * t * 2 * np.pi)
+    square = VOLUME * np.sign(np.sin(FREQ * t * 2 * np.pi))
+    sawtooth = VOLUME * (2 * (FREQ * t - np.floor(FREQ * t + 0.5)))
+    return {Waveform.SINE: sign, Waveform.SQUARE: square, Waveform.SAWTOOTH: sawtooth}[waveform]
+
+
+def main() -> None:
+    n = int(DURATION * SAMPLE_RATE)
+    out = np.empty(n)
+    for wf in Waveform:
+        naive = Oscillator(wf)
+        table = WavetableOscillator(wf)
+        for name, func in [("sandbox", lambda: sandbox_synth(wf)),
+                           ("naive", lambda: naive.render(FREQ, n, out)),
+                           ("table", lambda: table.render(FREQ, n, out))]:
+            t = min(timeit.repeat(func, number=20, repeat=5)) / 20
+            print(f"{wf:9} {name:8} {t / n * 1e9:6.2f} ns/sample")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+from helpers import GNUPLOT_STUB, PANDOC_STUB, TTS_STUB
+import pytest
+import stat
+import sys
+
+
+@pytest.fixture
+def gnuplot_stub(tmp_path) -> str:
+    """Path of an executable stand-in for gnuplot that logs its starts
+    to `gnuplot.log` beside it."""
+    path = tmp_path / "gnuplot"
+    path.write_text(GNUPLOT_STUB.format(python=sys.executable,
+                                        log=str(tmp_path / "gnuplot.log")))
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+@pytest.fixture
+def tts_stub(tmp_path) -> list[str]:
+    """Command of a stand-in for espeak that logs its texts to `tts.log`
+    beside it."""
+    path = tmp_path / "espeak"
+    path.write_text(TTS_STUB.format(python=sys.executable, log=str(tmp_path / "tts.log")))
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return [str(path), "-w", "{wav}", "{text}"]
+
+
+@pytest.fixture
+def pandoc_stub(tmp_path) -> str:
+    """Path of an executable stand-in for pandoc that logs its runs to
+    `pandoc.log` beside it."""
+    path = tmp_path / "pandoc"
+    path.write_text(PANDOC_STUB.format(python=sys.executable, log=str(tmp_path / "pandoc.log")))
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
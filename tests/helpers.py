@@ -0,0 +1,97 @@
+from audible_plot.output import AudioOutput
+from types import SimpleNamespace
+import numpy as np
+
+
+BLOCK: int = 64  # frames of each output callback
+
+
+def line_points(n: int = 11, k: float = 2.0, lines: int = 2) -> np.ndarray:
+    """Get `n` points, x from 0 to 10, of the lines y = k x and y = -x,
+    or of the first of them if `lines` is 1."""
+    x = np.linspace(0.0, 10.0, n)
+    return np.column_stack((x, k * x, -x)[:lines + 1])
+
+
+def pull(out: AudioOutput, frames: int = BLOCK, **status) -> np.ndarray:
+    """Run the output callback once, as the device stream would."""
+    outdata = np.empty((frames, out.channels), dtype=np.float32)
+    out.callback(outdata, frames, None, SimpleNamespace(output_underflow=False, **status))
+    return outdata[:, 0]
+
+
+GNUPLOT_STUB: str = '''#!{python}
+"""Stand-in for gnuplot: runs commands from stdin, writing each output
+file when it is closed, and logging each start."""
+import os
+import shlex
+import sys
+import time
+
+output = None
+with open({log!r}, "a") as log:
+    log.write("start\\n")
+
+
+def run(line):
+    global output
+    words = shlex.split(line, comments=True)
+    if not words:
+        return
+    if words[0] == "crash":
+        sys.exit(3)
+    if words[0] == "hang":
+        time.sleep(float(words[1]))
+    if words[0] == "cd":
+        os.chdir(words[1])
+    elif words[0] == "load":
+        with open(words[1]) as f:
+            for command in f.read().replace("\\\\\\n", " ").splitlines():
+                run(command)
+    elif words[:2] == ["set", "output"]:
+        output = words[2]
+    elif words[:2] == ["unset", "output"] and output:
+        with open(output, "w") as f:
+            f.write("plot\\n")
+        output = None
+    elif words[0] == "print":
+        print(words[1], flush=True)
+
+
+for line in sys.stdin:
+    run(line)
+'''
+
+
+TTS_STUB: str = '''#!{python}
+"""Stand-in for espeak -w: writes 22050 Hz speech of 100 samples per
+character between 200 samples of silence, and logs each text."""
+import math
+import struct
+import sys
+import wave
+
+filename, text = sys.argv[2], sys.argv[3]
+with open({log!r}, "a") as log:
+    log.write(text + "\\n")
+samples = [0] * 200 + [int(8000 * math.sin(i / 5.0)) or 1000 for i in range(100 * len(text))]
+samples += [0] * 200
+with wave.open(filename, "wb") as w:
+    w.setnchannels(1)
+    w.setsampwidth(2)
+    w.setframerate(22050)
+    w.writeframes(struct.pack("<%dh" % len(samples), *samples))
+'''
+
+
+PANDOC_STUB: str = '''#!{python}
+"""Stand-in for pandoc: copies the input file to the -o file, and logs
+each run."""
+import shutil
+import sys
+
+args = sys.argv[1:]
+with open({log!r}, "a") as log:
+    log.write(" ".join(args) + "\\n")
+shutil.copyfile(args[0], args[args.index("-o") + 1])
+'''
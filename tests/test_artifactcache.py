@@ -0,0 +1,119 @@
+from audible_plot.artifactcache import ArtifactCache
+from audible_plot.gnuplot import GnuplotPool
+from audible_plot.plotaudio import PlotAudio
+from audible_plot.plotdata import PlotData
+from audible_plot.plotvisual import PlotVisual
+from audible_plot import artifactcache
+from helpers import line_points
+import concurrent.futures
+import os
+
+
+def write_bytes(n: int, log: str, filename: str) -> None:
+    with open(log, "a") as f:
+        f.write("made\n")
+    with open(filename, "wb") as f:
+        f.write(b"x" * n)
+
+
+def fetch_shared(directory: str, log: str) -> str:
+    cache = ArtifactCache(directory)
+    return cache.fetch(cache.key("shared"), ".bin", lambda f: write_bytes(100, log, f))
+
+
+class TestArtifactCache:
+    def test_fetch(self, tmp_path):
+        cache = ArtifactCache(str(tmp_path / "cache"))
+        log = str(tmp_path / "log")
+        key = cache.key("plot", 1, (2, 3))
+        assert key == ArtifactCache.key("plot", 1, (2, 3))
+        assert key != ArtifactCache.key("plot", 1, (2, 4))
+        assert cache.get(key, ".png") is None
+        path = cache.fetch(key, ".png", lambda f: write_bytes(10, log, f))
+        assert cache.fetch(key, ".png", lambda f: write_bytes(10, log, f)) == path
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert open(log).read() == "made\n"
+        assert cache.nbytes == 10
+        assert [name for name in os.listdir(cache.directory) if name.endswith(".tmp")] == []
+
+    def test_lru_eviction(self, tmp_path):
+        cache = ArtifactCache(str(tmp_path / "cache"), max_bytes=250)
+        log = str(tmp_path / "log")
+        for name in "ab":
+            path = cache.fetch(cache.key(name), ".bin", lambda f: write_bytes(100, log, f))
+            os.utime(path, (1000 + ord(name), 1000 + ord(name)))
+        cache.get(cache.key("a"), ".bin")
+        cache.fetch(cache.key("c"), ".bin", lambda f: write_bytes(100, log, f))
+        assert cache.get(cache.key("b"), ".bin") is None
+        assert cache.get(cache.key("a"), ".bin") is not None
+        assert cache.nbytes == 200
+        cache.max_bytes = 0
+        assert cache.nbytes == 100
+        cache.clear()
+        assert cache.nbytes == 0
+
+    def test_hold(self, tmp_path):
+        cache = ArtifactCache(str(tmp_path / "cache"), max_bytes=0)
+        log = str(tmp_path / "log")
+        locks = os.path.join(cache.directory, "locks")
+        with cache.hold(cache.key("a"), ".bin", lambda f: write_bytes(100, log, f)) as held:
+            os.utime(held, (1000, 1000))
+            cache.fetch(cache.key("b"), ".bin", lambda f: write_bytes(100, log, f))
+            assert os.path.exists(held)
+        cache.evict()
+        assert not os.path.exists(held)
+        assert cache.nbytes == 100
+        assert sorted(os.listdir(locks)) == [cache.key("b") + ".lock", "locks.lock"]
+        copied = str(tmp_path / "copy.bin")
+        assert cache.copy(cache.key("b"), ".bin", lambda f: write_bytes(1, log, f),
+                          copied) == copied
+        assert os.path.getsize(copied) == 100
+        cache.clear()
+        assert os.listdir(locks) == ["locks.lock"]
+
+    def test_no_file_locks(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(artifactcache, "fcntl", None)
+        monkeypatch.setattr(artifactcache, "msvcrt", None)
+        cache = ArtifactCache(str(tmp_path / "cache"), max_bytes=150)
+        log = str(tmp_path / "log")
+        for name in "ab":
+            cache.fetch(cache.key(name), ".bin", lambda f: write_bytes(100, log, f))
+        assert cache.nbytes == 100
+
+    def test_processes(self, tmp_path):
+        directory = str(tmp_path / "cache")
+        log = str(tmp_path / "log")
+        with concurrent.futures.ProcessPoolExecutor(4) as pool:
+            paths = list(pool.map(fetch_shared, [directory] * 8, [log] * 8))
+        assert len(set(paths)) == 1
+        assert open(log).read() == "made\n"
+
+    def test_plot_audio(self, tmp_path):
+        cache = ArtifactCache(str(tmp_path / "cache"))
+        pa = PlotAudio(PlotData(line_points()))
+        pa.point_duration = 20.0
+        pa.output = str(tmp_path / "first")
+        pa.write_wav_cached(cache)
+        pa.output = str(tmp_path / "second")
+        pa.write_wav_cached(cache)
+        assert (cache.hits, cache.misses) == (1, 1)
+        with open(tmp_path / "first.wav", "rb") as a, open(tmp_path / "second.wav", "rb") as b:
+            assert a.read() == b.read()
+        pa.fade = 2.0
+        pa.write_wav_cached(cache)
+        assert cache.misses == 2
+
+    def test_plot_visual(self, tmp_path, gnuplot_stub):
+        cache = ArtifactCache(str(tmp_path / "cache"))
+        pd = PlotData(line_points())
+        pv = PlotVisual(pd)
+        pv.output = str(tmp_path / "plot")
+        with GnuplotPool(1, gnuplot_stub) as pool:
+            assert pv.plot_cached(cache, pool) == pv.out_filename()
+            os.remove(pv.out_filename())
+            pv.plot_cached(cache, pool)
+            assert os.path.exists(pv.out_filename())
+            assert (cache.hits, cache.misses) == (1, 1)
+            pd.title = "Changed"
+            pv.plot_cached(cache, pool)
+            assert cache.misses == 2
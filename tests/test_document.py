@@ -0,0 +1,70 @@
+from audible_plot.artifactcache import ArtifactCache
+from audible_plot.document import PlotDocument
+from audible_plot.gnuplot import GnuplotPool
+from audible_plot.plotdata import PlotData
+from helpers import line_points
+import http.server
+import json
+import os
+import threading
+
+
+class EchoHandler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        body = ("<html>" + request["text"] + "</html>").encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPlotDocument:
+    def test_table(self):
+        pd = PlotData(line_points(101))
+        pd.line_labels = ["up", "down"]
+        table = PlotDocument.table(pd, rows=10).splitlines()
+        assert table[0] == "| x | up | down |"
+        assert table[1] == "|---:|---:|---:|"
+        assert table[2] == "| 0 | 0 | -0 |"
+        assert 3 < len(table) <= 12
+
+    def test_build(self, tmp_path, gnuplot_stub, tts_stub, pandoc_stub):
+        cache = ArtifactCache(str(tmp_path / "cache"))
+        with GnuplotPool(2, gnuplot_stub) as pool:
+            doc = PlotDocument(str(tmp_path / "report"), ("html", "pdf"), pool, cache,
+                               tts_stub, pandoc_stub)
+            for k in (1.0, 2.0, 1.0, 3.0):
+                pd = PlotData(line_points(k=k))
+                pd.title = f"Slope {k:g}"
+                doc.add(pd)
+            timings = doc.build()
+        assert set(timings) == {"assets", "markdown", "pandoc", "total"}
+        files = os.listdir(doc.assets_dir())
+        assert len([f for f in files if f.endswith(".png")]) == 3
+        assert len([f for f in files if f.endswith("-speech.wav")]) == 3
+        with open(tmp_path / "pandoc.log") as f:
+            assert len(f.readlines()) == 2
+        with open(doc.doc_filename("pdf")) as f:
+            md = f.read()
+        assert md.count("## Slope") == 4
+        assert "](report_files/" in md
+
+    def test_server(self, tmp_path, gnuplot_stub, tts_stub, pandoc_stub):
+        server = http.server.HTTPServer(("127.0.0.1", 0), EchoHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            with GnuplotPool(1, gnuplot_stub) as pool:
+                doc = PlotDocument(str(tmp_path / "report"), ("html",), pool,
+                                   ArtifactCache(str(tmp_path / "cache")), tts_stub, pandoc_stub,
+                                   server=f"http://127.0.0.1:{server.server_port}")
+                doc.add(PlotData(line_points()))
+                doc.build()
+        finally:
+            server.shutdown()
+        assert not os.path.exists(tmp_path / "pandoc.log")
+        with open(doc.doc_filename("html")) as f:
+            assert f.read().startswith("<html>## y versus x")
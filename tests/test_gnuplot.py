@@ -0,0 +1,66 @@
+from audible_plot.gnuplot import GnuplotPool, GnuplotWorker, quote
+import os
+import pytest
+
+
+def write_gp(directory, name: str) -> str:
+    path = os.path.join(directory, name + ".gp")
+    with open(path, "w") as f:
+        f.write(f'set terminal png\nset output "{name}.png"\nplot "{name}.tsv" \\\n  using 1:2\n')
+    return path
+
+
+def starts(directory) -> int:
+    with open(os.path.join(directory, "gnuplot.log")) as f:
+        return len(f.readlines())
+
+
+class TestGnuplot:
+    def test_quote(self):
+        assert quote('say "hi"\\') == '"say \\"hi\\"\\\\"'
+
+    def test_worker_persists(self, tmp_path, gnuplot_stub):
+        worker = GnuplotWorker(gnuplot_stub)
+        for i in range(5):
+            worker.run(f'cd "{tmp_path}"\nload "{os.path.basename(write_gp(tmp_path, str(i)))}"')
+            assert os.path.exists(tmp_path / f"{i}.png")
+        assert worker.starts == 1
+        assert starts(tmp_path) == 1
+        worker.close()
+        assert not worker.running
+
+    def test_worker_restarts(self, tmp_path, gnuplot_stub):
+        worker = GnuplotWorker(gnuplot_stub)
+        worker.run("print 1")
+        with pytest.raises(RuntimeError):
+            worker.run("crash")
+        assert not worker.running
+        worker.run("print 2")
+        assert worker.starts == 2
+        worker.close()
+
+    def test_worker_timeout(self, tmp_path, gnuplot_stub):
+        worker = GnuplotWorker(gnuplot_stub, timeout=0.5)
+        assert worker.run("print 1") == "1\n"
+        with pytest.raises(TimeoutError):
+            worker.run("hang 30")
+        assert not worker.running
+        assert worker.run("print 2") == "2\n"
+        assert worker.starts == starts(tmp_path) == 2
+        worker.close()
+
+    def test_pool(self, tmp_path, gnuplot_stub):
+        names = [write_gp(tmp_path, f"plot{i}") for i in range(8)]
+        with GnuplotPool(3, gnuplot_stub) as pool:
+            assert pool.size == 3
+            pool.plot_all(names)
+            pool.plot(names[0])
+        for i in range(8):
+            assert os.path.exists(tmp_path / f"plot{i}.png")
+        assert starts(tmp_path) <= 3
+        with pytest.raises(ValueError):
+            GnuplotPool(0)
+
+    def test_missing(self):
+        with pytest.raises(FileNotFoundError):
+            GnuplotWorker("no-such-gnuplot").run("print 1")
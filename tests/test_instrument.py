@@ -0,0 +1,131 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from audible_plot import instrument
+from audible_plot.plotaudio import PlotAudio
+from audible_plot.plotdata import PlotData
+from audible_plot.tonecache import ToneCache
+from helpers import line_points
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def recording():
+    instrument.reset()
+    instrument.enable()
+    yield
+    instrument.enable(False)
+    instrument.reset()
+
+
+class TestInstrument:
+    def test_disabled(self):
+        instrument.reset()
+        assert not instrument.enabled()
+        with instrument.span("off") as s:
+            instrument.count("off")
+        assert s is instrument.span("other")
+        assert instrument.stats() == {"spans": {}, "counters": {}}
+
+    def test_spans_and_counters(self, recording):
+        for _ in range(3):
+            with instrument.span("step"):
+                instrument.count("items", 2)
+
+        @instrument.timed("func")
+        def func(v):
+            return v + 1
+
+        assert func(1) == 2
+        stats = instrument.stats()
+        assert stats["counters"] == {"items": 6}
+        assert stats["spans"]["step"]["count"] == 3
+        assert stats["spans"]["func"]["count"] == 1
+        step = stats["spans"]["step"]
+        assert 0 <= step["min_s"] <= step["mean_s"] <= step["max_s"] <= step["total_s"]
+        assert sum(step["histogram_us"].values()) == 3
+
+    def test_threads(self, recording):
+        def work():
+            for _ in range(100):
+                with instrument.span("work"):
+                    instrument.count("done")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = instrument.stats()
+        assert stats["counters"]["done"] == 400
+        assert stats["spans"]["work"]["count"] == 400
+
+    def test_drain_merge(self, recording):
+        with instrument.span("worker"):
+            instrument.count("jobs")
+        recorded = json.loads(json.dumps(instrument.drain()))
+        assert instrument.stats() == {"spans": {}, "counters": {}}
+        instrument.merge(recorded)
+        instrument.merge(recorded)
+        stats = instrument.stats()
+        assert stats["counters"] == {"jobs": 2}
+        assert stats["spans"]["worker"]["count"] == 2
+
+    def test_stages(self, recording):
+        pa = PlotAudio(PlotData(line_points()))
+        pa.point_duration = 10.0
+        pa.render(np.empty(pa.nframes()))
+        cache = ToneCache()
+        cache.get(440.0, 10.0)
+        cache.get(440.0, 10.0)
+        stats = instrument.stats()
+        assert stats["spans"]["plotaudio.render"]["count"] == 1
+        assert stats["counters"] == {"tonecache.hits": 1, "tonecache.misses": 1}
+
+    def test_parallel(self, recording):
+        pa = PlotAudio(PlotData(line_points(40)))
+        pa.point_duration = 10.0
+        pa.processes = 2
+        pa.render(np.empty(pa.nframes()))
+        tasks = [e for e in instrument.chrome_trace()["traceEvents"]
+                 if e["name"] == "parallel.render_task"]
+        assert tasks and all(e["pid"] != os.getpid() for e in tasks)
+
+    def test_parallel_counts_parent_once(self, recording):
+        with instrument.span("parent"):
+            instrument.count("parent")
+        pa = PlotAudio(PlotData(line_points(40)))
+        pa.point_duration = 10.0
+        pa.processes = 4
+        pa.render(np.empty(pa.nframes()))
+        stats = instrument.stats()
+        assert stats["spans"]["parent"]["count"] == 1
+        assert stats["counters"]["parent"] == 1
+
+    def test_export(self, recording, tmp_path):
+        with instrument.span("step"):
+            instrument.count("items")
+        instrument.export(str(tmp_path / "stats.json"))
+        instrument.export(str(tmp_path / "run.trace.json"))
+        with open(tmp_path / "stats.json") as f:
+            assert json.load(f)["spans"]["step"]["count"] == 1
+        with open(tmp_path / "run.trace.json") as f:
+            events = json.load(f)["traceEvents"]
+        assert events[0]["name"] == "step" and events[0]["ph"] == "X"
+        assert events[1] == {"name": "items", "ph": "C", "ts": events[1]["ts"],
+                             "pid": os.getpid(), "args": {"items": 1}}
+
+    def test_environment(self, tmp_path):
+        trace = tmp_path / "run.trace.json"
+        code = ("import numpy as np\nfrom audible_plot import PlotAudio, PlotData\n"
+                "pa = PlotAudio(PlotData(np.column_stack((np.arange(5.0), np.arange(5.0)))))\n"
+                "pa.render(np.empty(pa.nframes()))\n")
+        env = dict(os.environ, AUDIBLE_PLOT_TRACE=str(trace))
+        subprocess.run([sys.executable, "-c", code], env=env, check=True)
+        with open(trace) as f:
+            names = {e["name"] for e in json.load(f)["traceEvents"]}
+        assert "plotaudio.render" in names
@@ -0,0 +1,80 @@
+from audible_plot.liveplotdata import LivePlotData
+from audible_plot.plotdata import PlotData
+import numpy as np
+import pytest
+import threading
+
+
+def stream_points(n: int) -> np.ndarray:
+    x = np.arange(n, dtype=np.float64)
+    return np.column_stack((x, np.sin(x / 7.0), (x % 13) - 6.0))
+
+
+class TestLivePlotData:
+    def test_append_window(self):
+        live = LivePlotData(3, window=10, capacity=16)
+        assert live.xsize() == 0
+        p = stream_points(45)
+        for row in p[:5]:
+            live.append(row)
+        np.testing.assert_array_equal(live.points, p[:5])
+        live.extend(p[5:])
+        assert live.count == 45
+        np.testing.assert_array_equal(live.points, p[-10:])
+        assert live.points.base is not None
+        mins, maxs = live.limits
+        np.testing.assert_array_equal(mins, p[-10:].min(axis=0))
+        np.testing.assert_array_equal(maxs, p[-10:].max(axis=0))
+        assert live.xrange == PlotData(p[-10:]).xrange
+        assert live.yrange == PlotData(p[-10:]).yrange
+        live.yrange = (-100.0, 100.0)
+        live.extend(p[:3])
+        assert live.yrange == live.snapshot().yrange == (-100.0, 100.0)
+        assert live.xrange == live.snapshot().xrange == PlotData(live.points).xrange
+
+    def test_running_limits(self):
+        live = LivePlotData(3, window=25)
+        p = stream_points(500)
+        p[100:140, 2] = np.nan
+        for k, row in enumerate(p):
+            live.append(row)
+            window = p[max(0, k - 24):k + 1]
+            mins, maxs = live.limits
+            np.testing.assert_array_equal(mins, np.fmin.reduce(window, axis=0))
+            np.testing.assert_array_equal(maxs, np.fmax.reduce(window, axis=0))
+
+    def test_snapshot(self):
+        live = LivePlotData(3, window=50)
+        live.xlabel = "time"
+        live.extend(stream_points(80))
+        pd = live.snapshot()
+        assert type(pd) is PlotData
+        assert pd.xlabel == "time"
+        np.testing.assert_array_equal(pd.points, stream_points(80)[-50:])
+        live.append([80.0, 0.0, 0.0])
+        assert pd.points[0, 0] == 30.0
+        with pytest.raises(TypeError, match="append-only"):
+            live.update_points(0, [0.0, 0.0, 0.0])
+        np.testing.assert_array_equal(live.points[0], stream_points(81)[31])
+        with pytest.raises(ValueError):
+            LivePlotData(3, window=10, capacity=10)
+
+    def test_threaded_snapshots(self):
+        live = LivePlotData(2, window=64, capacity=128)
+        done = threading.Event()
+
+        def produce():
+            for k in range(20000):
+                live.append([k, 2.0 * k])
+            done.set()
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        while not done.is_set():
+            pd = live.snapshot()
+            x = pd.points[:, 0]
+            np.testing.assert_array_equal(pd.points[:, 1], 2.0 * x)
+            assert np.all(np.diff(x) == 1.0)
+            if len(x):
+                assert pd.limits[1][0] == x[-1]
+        producer.join()
@@ -0,0 +1,105 @@
+from audible_plot.output import AudioOutput, NullStream, RingBuffer
+from helpers import BLOCK, pull
+from types import SimpleNamespace
+import threading
+import numpy as np
+
+
+class TestRingBuffer:
+    def test_wrap(self):
+        ring = RingBuffer(10)
+        assert ring.write(np.arange(8)) == 8
+        out = np.zeros((6, 1), dtype=np.float32)
+        assert ring.read(out) == 6
+        assert ring.write(np.arange(8, 20)) == 8
+        assert ring.available == 10
+        out = np.zeros((12, 1), dtype=np.float32)
+        assert ring.read(out) == 10
+        np.testing.assert_array_equal(out[:10, 0], np.arange(6, 16))
+        ring.write(np.ones(3))
+        ring.clear()
+        assert ring.available == 0
+        assert ring.space == 10
+
+
+class TestAudioOutput:
+    def test_play_does_not_block(self):
+        out = AudioOutput(block_size=BLOCK)
+        out.play(np.full(100, 0.25))
+        assert out.playing == 0  # started by the callback
+        np.testing.assert_allclose(pull(out), 0.25)
+        np.testing.assert_allclose(pull(out), [0.25] * 36 + [0.0] * 28)
+        assert out.playing == 0
+        assert out.frames == 2 * BLOCK
+
+    def test_mix_and_interrupt(self):
+        out = AudioOutput(block_size=BLOCK)
+        out.play(np.full(1000, 0.25))
+        out.play(np.full(1000, 0.5), gain=0.5)
+        np.testing.assert_allclose(pull(out), 0.5)
+        out.play(np.full(1000, 0.1), interrupt=True)
+        np.testing.assert_allclose(pull(out), 0.1)
+        assert out.playing == 1
+        out.stop()
+        np.testing.assert_allclose(pull(out), 0.0)
+
+    def test_stop_voice(self):
+        out = AudioOutput(block_size=BLOCK)
+        a = out.play(np.full(1000, 0.25))
+        out.play(np.full(1000, 0.5))
+        out.stop(a)
+        np.testing.assert_allclose(pull(out), 0.5)
+
+    def test_stream_and_clip(self):
+        out = AudioOutput(block_size=BLOCK)
+        out.write(np.full(BLOCK + 10, 0.5))
+        out.play(np.full(BLOCK * 2, 0.25))
+        np.testing.assert_allclose(pull(out), 0.75)
+        np.testing.assert_allclose(pull(out), [0.75] * 10 + [0.25] * (BLOCK - 10))
+        assert out.underruns == 1
+
+    def test_clipping_and_underflow(self):
+        out = AudioOutput(block_size=BLOCK)
+        out.play(np.full(BLOCK, 0.8))
+        out.play(np.full(BLOCK, 0.8))
+        np.testing.assert_allclose(pull(out), 1.0)
+        out.callback(np.empty((BLOCK, 1), dtype=np.float32), BLOCK, None,
+                     SimpleNamespace(output_underflow=True))
+        assert out.underruns == 1
+        out.callback(np.empty((BLOCK, 1), dtype=np.float32), BLOCK,
+                     SimpleNamespace(outputBufferDacTime=1.01, currentTime=1.0), None)
+        assert abs(out.latency - 0.01) < 1e-9
+
+    def test_null_stream(self):
+        out = AudioOutput(block_size=BLOCK)
+        blocks = []
+        done = threading.Event()
+
+        def sink(outdata, t):
+            blocks.append((outdata[:, 0].copy(), t))
+            if len(blocks) == 8:
+                done.set()
+
+        out.play(np.full(BLOCK * 2, 0.25))
+        with NullStream(out, BLOCK, sink):
+            assert done.wait(5.0)
+        np.testing.assert_allclose(blocks[0][0], 0.25)
+        np.testing.assert_allclose(blocks[2][0], 0.0)
+        times = [t for _, t in blocks[:8]]
+        assert times[-1] - times[0] >= 6 * BLOCK / out.rate
+
+    def test_fade(self):
+        out = AudioOutput(block_size=BLOCK)
+        out.play(np.full(1000, 0.5))
+        pull(out)
+        out.play(np.full(1000, 0.25), interrupt=True, fade=BLOCK / 2 * 1000 / out.rate)
+        samples = pull(out)
+        np.testing.assert_allclose(samples[:32], 0.25 + 0.5 * (32 - np.arange(32)) / 32)
+        np.testing.assert_allclose(samples[32:], 0.25)
+        assert out.playing == 1
+        out.stop(fade=BLOCK * 2 * 1000 / out.rate)
+        samples = np.concatenate([pull(out), pull(out), pull(out)])
+        np.testing.assert_allclose(samples[:128], 0.25 * (128 - np.arange(128)) / 128,
+                                   rtol=1e-6)
+        np.testing.assert_allclose(samples[128:], 0.0)
+        assert out.playing == 0
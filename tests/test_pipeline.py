@@ -0,0 +1,42 @@
+from audible_plot.gnuplot import GnuplotPool
+from audible_plot.pipeline import PlotPipeline, describe
+from audible_plot.plotdata import PlotData
+from helpers import line_points
+import os
+import pytest
+import sys
+
+
+class TestPipeline:
+    def test_describe(self):
+        pd = PlotData(line_points())
+        pd.title = "Speeds"
+        assert describe(pd) == ("Speeds. The x axis is x from 0 to 10. The y axis is y "
+                                "from -10 to 20. The lines are Line 1, Line 2.")
+
+    def test_plot(self, tmp_path, gnuplot_stub, tts_stub, pandoc_stub):
+        pd = PlotData(line_points())
+        output = str(tmp_path / "plot")
+        with GnuplotPool(1, gnuplot_stub) as pool:
+            pipeline = PlotPipeline(pd, output, pool=pool, speech=tts_stub, pandoc=pandoc_stub)
+            pipeline.audio.point_duration = 20.0
+            timings = pipeline.plot()
+        assert set(timings) == {"visual", "tones", "speech", "document", "total"}
+        assert timings["total"] >= timings["document"]
+        for ext in (".png", ".wav", "-speech.wav", ".txt", ".md", ".html"):
+            assert os.path.exists(output + ext)
+        with open(output + ".html") as f:
+            html = f.read()
+        assert "![y versus x](plot.png)" in html
+        assert "[Plot tones](plot.wav)" in html
+
+    def test_failure(self, tmp_path, gnuplot_stub, pandoc_stub):
+        failing = [sys.executable, "-c", "import sys; print('no voice'); sys.exit(2)"]
+        with GnuplotPool(1, gnuplot_stub) as pool:
+            pipeline = PlotPipeline(PlotData(line_points()), str(tmp_path / "plot"), pool=pool,
+                                    speech=failing, pandoc=pandoc_stub)
+            with pytest.raises(RuntimeError, match="no voice"):
+                pipeline.plot()
+        assert not os.path.exists(tmp_path / "plot.html")
+        with pytest.raises(ValueError):
+            PlotPipeline(PlotData(line_points()), doctype="docx")
@@ -0,0 +1,149 @@
+from audible_plot.pitch import Pitch, PitchArray
+import numpy as np
+import pytest
+
+
+MIDI_A440: int = 69
+MIDI_MIN: int = 12
+MIDI_MAX: int = 128
+MIDI_C3: int = 48
+
+FREQ_A440: int = 440
+
+NOTES_PER_OCT: int = 12
+
+NOTE_A440: str = "A4"
+NOTE_LIST: list = [
+    "C0", "C#0", "D0", "D#0", "E0", "F0", "F#0", "G0", "G#0", "A0", "A#0", "B0",
+    "C1", "C#1", "D1", "D#1", "E1", "F1", "F#1", "G1", "G#1", "A1", "A#1", "B1",
+    "C2", "C#2", "D2", "D#2", "E2", "F2", "F#2", "G2", "G#2", "A2", "A#2", "B2",
+    "C3", "C#3", "D3", "D#3", "E3", "F3", "F#3", "G3", "G#3", "A3", "A#3", "B3",
+    "C4", "C#4", "D4", "D#4", "E4", "F4", "F#4", "G4", "G#4", "A4", "A#4", "B4",
+    "C5", "C#5", "D5", "D#5", "E5", "F5", "F#5", "G5", "G#5", "A5", "A#5", "B5",
+    "C6", "C#6", "D6", "D#6", "E6", "F6", "F#6", "G6", "G#6", "A6", "A#6", "B6",
+    "C7", "C#7", "D7", "D#7", "E7", "F7", "F#7", "G7", "G#7", "A7", "A#7", "B7",
+    "C8", "C#8", "D8", "D#8", "E8", "F8", "F#8", "G8", "G#8", "A8", "A#8", "B8",
+    "C9", "C#9", "D9", "D#9", "E9", "F9", "F#9", "G9", ]
+
+CLOSE_ENOUGH: float = 0.001
+
+
+def midi2freq(m: float) -> float:
+    return FREQ_A440 * (2 ** ((m - MIDI_A440) / NOTES_PER_OCT))
+
+
+def midi2note(m: int) -> str:
+    return NOTE_LIST[m - MIDI_MIN]
+
+
+class TestPitch:
+    def test_defaults(self):
+        for arg in [None, 0, 0.0, "0", "0.0", ""]:
+            p = Pitch(arg)
+            assert p.midi == MIDI_A440
+            assert p.freq == pytest.approx(FREQ_A440)
+            assert p.note == (NOTE_A440, 0.0)
+
+    def test_valid_midi(self):
+        for m in range(MIDI_MIN, MIDI_MAX):
+            for arg in [m, float(m), str(m), m + 0.5, str(m + 0.5)]:
+                p = Pitch(arg)
+                assert isinstance(p.midi, float)
+                assert p.midi == float(arg)
+                assert p.freq == pytest.approx(midi2freq(float(arg)), abs=CLOSE_ENOUGH)
+                assert p.note == (midi2note(m), float(arg) - m)
+
+    def test_valid_note(self):
+        for m in range(MIDI_MIN, MIDI_MAX):
+            n = midi2note(m)
+            assert Pitch(n).midi == m
+            assert Pitch((n, 0.25)).midi == m + 0.25
+
+    def test_accidentals(self):
+        assert Pitch("Eb3").note == ("D#3", 0.0)
+        assert Pitch("F♯2").midi == Pitch("F#2").midi == Pitch("F+2").midi
+        assert Pitch("D♭4").midi == Pitch("Db4").midi == Pitch("D-4").midi
+        assert Pitch("E#4").note == ("F4", 0.0)
+        assert Pitch("Cb4").note == ("B3", 0.0)
+
+    def test_valid_freq(self):
+        for m in range(MIDI_C3, MIDI_MAX):
+            f = midi2freq(m + 0.5)
+            p = Pitch(f)
+            assert p.midi == pytest.approx(m + 0.5)
+            assert p.freq == pytest.approx(f)
+            assert p.note[0] == midi2note(m)
+
+    def test_low(self):
+        for i in range(1, MIDI_MIN):
+            with pytest.raises(ValueError):
+                Pitch(i)
+            with pytest.raises(ValueError):
+                Pitch(i - 0.5)
+        with pytest.raises(ValueError):
+            Pitch(-69)
+
+    def test_invalid(self):
+        for arg in ["H4", "A", "A#b4", "C#", "Cb0", "G#9", "30000"]:
+            with pytest.raises(ValueError):
+                Pitch(arg)
+        for arg in [[69], object()]:
+            with pytest.raises(TypeError):
+                Pitch(arg)
+
+    def test_pitch_copy(self):
+        p = Pitch("C#4")
+        assert Pitch(p) == p
+        assert repr(p) == "Pitch(61.0)"
+        assert str(Pitch(("A4", 0.5))) == "A4+0.5"
+
+    def test_tables(self):
+        from audible_plot.pitch import NOTE_ACCIDENTALS, NOTE_MIDIS, NOTE_NAMES
+        assert len(NOTE_NAMES) == MIDI_MAX
+        assert NOTE_NAMES[MIDI_MIN:] == tuple(NOTE_LIST)
+        for a in NOTE_ACCIDENTALS:
+            assert "D" + a + "4" in NOTE_MIDIS
+        assert not hasattr(Pitch("A4"), "__dict__")
+
+
+class TestPitchArray:
+    def test_midi_freq(self):
+        m = np.arange(MIDI_MIN, MIDI_MAX, 0.25)
+        pa = PitchArray(m)
+        assert pa.midi.dtype == np.float64
+        assert len(pa) == len(m)
+        np.testing.assert_allclose(pa.freq, [midi2freq(x) for x in m])
+        np.testing.assert_allclose(PitchArray.from_freq(pa.freq).midi, m)
+
+    def test_note(self):
+        m = np.arange(MIDI_MIN, MIDI_MAX) + 0.5
+        names, bends = PitchArray(m).note
+        assert names.tolist() == NOTE_LIST
+        np.testing.assert_array_equal(bends, 0.5)
+        np.testing.assert_array_equal(PitchArray.from_notes(NOTE_LIST).midi, m - 0.5)
+
+    def test_round_trip(self):
+        pitches = [Pitch(m + 0.3) for m in range(MIDI_MIN, MIDI_MAX)]
+        pa = PitchArray.from_pitches(pitches)
+        assert list(pa) == pitches
+        for i, p in enumerate(pitches):
+            assert pa[i].freq == pytest.approx(p.freq)
+            assert pa[i].note == pytest.approx(p.note)
+        assert isinstance(pa[1:3], PitchArray)
+
+    def test_no_pitch(self):
+        pa = PitchArray([MIDI_A440, np.nan])
+        names, bends = pa.note
+        assert names.tolist() == ["A4", ""]
+        np.testing.assert_array_equal(bends, [0.0, np.nan])
+        assert np.isnan(pa.freq[1])
+        note, bend = pa[1].note
+        assert note == "" and np.isnan(bend)
+        assert str(pa[1]) == ""
+        assert [str(p) for p in pa] == ["A4", ""]
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            PitchArray([MIDI_A440, MIDI_MAX])
+        with pytest.raises(ValueError):
+            PitchArray.from_freq([FREQ_A440, 0.0])
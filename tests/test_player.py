@@ -0,0 +1,200 @@
+import asyncio
+import threading
+
+from audible_plot.artifactcache import ArtifactCache
+from audible_plot.liveplotdata import LivePlotData
+from audible_plot.output import AudioOutput
+from audible_plot.pitch import Pitch
+from audible_plot.player import TICK_DURATION, Coalesce, Player
+from audible_plot.plotdata import PlotData
+from audible_plot.speech import SpeechBank
+from helpers import BLOCK, line_points, pull
+import numpy as np
+import pytest
+
+
+WAIT: float = 5.0  # seconds to wait for a sound before failing
+
+
+def press(player: Player, *keys: str) -> None:
+    """Run the functions of keys one after another, to completion."""
+    async def run():
+        for key in keys:
+            assert await player.press(key)
+    asyncio.run(run())
+
+
+class Recorder(AudioOutput):
+    """AudioOutput recording each clip played, and None for each stop,
+    for a test to wait on."""
+
+    def __init__(self) -> None:
+        super().__init__(block_size=BLOCK)
+        self.sounds: list = []
+        self._changed = threading.Condition()
+
+    def play(self, clip, gain=1.0, interrupt=False, fade=0.0):
+        self._record(clip)
+        return super().play(clip, gain, interrupt, fade)
+
+    def stop(self, voice=None, fade=0.0):
+        self._record(None)
+        return super().stop(voice, fade)
+
+    def wait(self, n: int) -> list:
+        """Wait until `n` sounds are recorded and return them."""
+        with self._changed:
+            assert self._changed.wait_for(lambda: len(self.sounds) >= n, WAIT)
+            return self.sounds[:n]
+
+    def _record(self, clip) -> None:
+        with self._changed:
+            self.sounds.append(clip)
+            self._changed.notify_all()
+
+
+@pytest.fixture
+def player(tmp_path, tts_stub) -> Player:
+    pd = PlotData(line_points())
+    pd.xlabel = "time"
+    pd.line_labels = ["speed", "depth"]
+    out = AudioOutput(block_size=BLOCK)
+    bank = SpeechBank(out.rate, tts_stub, ArtifactCache(str(tmp_path / "cache")))
+    player = Player(pd, out, bank)
+    yield player
+    player.close()
+
+
+class TestPlayer:
+    def test_navigation(self, player):
+        press(player, "right")
+        assert player.point == 1
+        press(player, "left", "left")
+        assert player.point == 0
+        press(player, "5")
+        assert player.point == 5
+        press(player, "0")
+        assert player.point == 10
+        press(player, "right")
+        assert player.point == 10
+        press(player, "~")
+        assert player.point == 0
+        press(player, "up")
+        assert player.line == 1
+        press(player, "up")
+        assert player.line == 0
+        press(player, "b")
+        assert player.line == 1
+        assert not asyncio.run(player.press("F12"))
+
+    def test_tones(self, player):
+        press(player, "5")
+        assert not player.speaking
+        pull(player.output)
+        assert player.output.playing == 1
+        low = player.tone(0, 0)
+        high = player.tone(10, 0)
+        assert len(low) == len(high) == 200 * player.output.rate // 1000
+        assert np.count_nonzero(np.diff(np.sign(low))) < np.count_nonzero(np.diff(np.sign(high)))
+
+    def test_changed_points(self, player):
+        pd = player.plotdata
+        player.tone(10, 0)
+        player.prefetcher.readout(2, 0)
+        pd.yrange = (0.0, 100.0)
+        np.testing.assert_array_equal(player.tone(10, 0), player.tones.get(Pitch(57.6), 200))
+        pd.points = line_points(21)
+        press(player, "0")
+        assert player.point == 20
+        expected = player.speech.phrase(player.speech.position_words(pd, 2, 0))
+        np.testing.assert_array_equal(player.prefetcher.readout(2, 0), expected)
+
+    def test_live(self, player):
+        live = LivePlotData(3, window=20)
+        streamed = Player(live, player.output, player.speech)
+        live.extend(line_points())
+        press(streamed, "right")
+        streamed.close()
+        assert streamed.point == 1
+        np.testing.assert_array_equal(streamed.tone(1, 0), streamed.tones.get(Pitch(67.2), 200))
+
+    def test_speech(self, player, tmp_path):
+        press(player, "s")
+        assert player.speaking
+        player.output.stop()
+        pull(player.output)
+        press(player, "right")
+        expected = player.speech.phrase(["time", "equals", "one", "speed", "equals", "two"])
+        samples = np.concatenate([pull(player.output) for _ in range(len(expected) // BLOCK)])
+        np.testing.assert_array_equal(samples, expected[:len(samples)])
+        press(player, "l")
+        with open(tmp_path / "tts.log") as f:
+            assert {"a", "b", "speed", "depth"} <= set(f.read().splitlines())
+
+    def test_run(self, player):
+        loop = threading.Thread(target=player.run)
+        loop.start()
+        for key in ("right", "right", "up", "q"):
+            player.put(key)
+        loop.join(5.0)
+        assert not loop.is_alive()
+        assert (player.point, player.line) == (2, 1)
+
+    def test_cancel(self, player, monkeypatch):
+        out = Recorder()
+        racer = Player(player.plotdata, out, player.speech, coalesce="none")
+        release, rendered = threading.Event(), threading.Event()
+        tone = racer.tone
+
+        def slow_tone(point, line):
+            if point != 1:
+                return tone(point, line)
+            release.wait(WAIT)
+            clip = tone(point, line)
+            rendered.set()
+            return clip
+
+        monkeypatch.setattr(racer, "tone", slow_tone)
+        racer.put("right")  # queued before the loop runs, so the next key
+        racer.put("right")  # cancels it while its tone renders
+        loop = threading.Thread(target=racer.run)
+        loop.start()
+        out.wait(1)
+        release.set()
+        assert rendered.wait(WAIT)
+        racer.put("q")
+        loop.join(WAIT)
+        racer.close()
+        assert not loop.is_alive()
+        np.testing.assert_array_equal(out.sounds[0], tone(2, 0))
+        assert out.sounds[1:] == [None]  # only the stop of `q`
+
+    @pytest.mark.parametrize("coalesce", list(Coalesce))
+    def test_coalesce(self, player, coalesce):
+        out = Recorder()
+        held = Player(player.plotdata, out, player.speech, duration=2000.0,
+                      coalesce=coalesce)  # long, so each next move comes while it sounds
+        held.settle = 60000.0  # and before it settles
+        loop = threading.Thread(target=held.run)
+        loop.start()
+        held.put("right")
+        out.wait(1)
+        for k in range(2, 6):
+            held.put("right")
+            out.wait(k)
+        held.settle = 0.0
+        held.put("right")
+        sounds = out.wait(6 if coalesce == Coalesce.NONE else 7)
+        held.put("q")
+        loop.join(WAIT)
+        held.close()
+        assert not loop.is_alive()
+        assert held.point == 6
+        lengths = [0 if s is None else len(s) for s in sounds]
+        full, tick = (int(n * out.rate // 1000) for n in (2000, TICK_DURATION))
+        if coalesce == Coalesce.TICK:
+            assert lengths == [full] + [tick] * 5 + [full]
+        elif coalesce == Coalesce.SKIP:
+            assert lengths == [full] + [0] * 5 + [full]
+        else:
+            assert lengths == [full] * 6
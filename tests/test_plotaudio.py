@@ -0,0 +1,143 @@
+from audible_plot.plotaudio import PlotAudio
+from audible_plot.plotdata import PlotData
+from audible_plot.wavfile import read_wav
+from helpers import line_points
+import numpy as np
+import pytest
+import time
+
+
+SAMPLE_RATE: int = 44100
+
+
+def dominant_freq(samples: np.ndarray) -> float:
+    spectrum = np.abs(np.fft.rfft(samples, SAMPLE_RATE))
+    return float(np.argmax(spectrum))
+
+
+class TestPlotAudio:
+    def test_nframes(self):
+        pa = PlotAudio(PlotData(line_points()))
+        pa.point_duration = 100.0
+        pa.line_gap = 500.0
+        assert pa.line_frames() == 11 * 4410
+        assert pa.nframes() == 2 * 11 * 4410 + 22050
+
+    def test_render(self):
+        pd = PlotData(line_points())
+        pa = PlotAudio(pd)
+        pa.point_duration = 100.0
+        pa.gap = 0.5
+        out = np.empty(pa.nframes())
+        pa.render(out)
+        tones = pd.tones(pa.low, pa.high).freq
+        for line, start in enumerate((0, 11 * 4410 + 22050)):
+            for i in (0, 5, 10):
+                point = out[start + i * 4410:start + (i + 1) * 4410]
+                assert abs(dominant_freq(point[:2205]) - tones[i, line]) <= 1.0
+                assert np.all(point[2205:] == 0.0)
+                assert abs(point[0]) < 1e-3  # attack
+        assert np.all(out[11 * 4410:11 * 4410 + 22050] == 0.0)
+        assert np.max(np.abs(out)) <= pa.volume
+
+    def test_x_timing(self):
+        x = np.array([0.0, 1.0, 3.0, 4.0])
+        pa = PlotAudio(PlotData(np.column_stack((x, x))))
+        pa.point_duration = 100.0
+        pa.x_timing = True
+        np.testing.assert_array_equal(pa.point_samples(), [3308, 6615, 3308, 4410])
+
+    def test_write_wav(self, tmp_path):
+        x = np.linspace(0.0, 1.0, 10000)
+        pa = PlotAudio(PlotData(np.column_stack((x, np.sin(20 * x), np.cos(20 * x)))))
+        pa.output = str(tmp_path / "plot")
+        t = time.perf_counter()
+        pa.write_wav()
+        elapsed = time.perf_counter() - t
+        rate, samples = read_wav(pa.wav_filename())
+        assert rate == SAMPLE_RATE
+        assert samples.shape == (pa.nframes(), 1)
+        assert np.max(np.abs(samples)) <= round(pa.volume * 32767)
+        assert elapsed < 2.0
+
+    def test_nan_points_are_silent(self):
+        y = np.array([1.0, np.nan, 3.0])
+        pa = PlotAudio(PlotData(np.column_stack((np.arange(3.0), y))))
+        pa.point_duration = 100.0
+        out = np.empty(pa.nframes())
+        pa.render(out)
+        assert np.all(out[4410:8820] == 0.0)
+        assert np.any(out[:4410] != 0.0)
+
+    def test_polyphonic(self):
+        x = np.linspace(0.0, 10.0, 11)
+        pd = PlotData(np.column_stack([x] + [x + i for i in range(9)]))
+        pa = PlotAudio(pd)
+        pa.point_duration = 100.0
+        pa.polyphonic = True
+        pa.volume = 1.0
+        assert pa.channels() == 2
+        assert pa.nframes() == 11 * 4410
+        tables = pa.line_tables()
+        assert len({t.tobytes() for t in tables}) == 9
+        out = np.empty((pa.nframes(), 2))
+        pa.render(out)
+        assert np.max(np.abs(out)) <= 1.0
+        first, last = out[:4410], out[-4410:]
+        assert np.sum(first[:, 0] ** 2) > 100 * np.sum(first[:, 1] ** 2)
+        assert np.sum(last[:, 1] ** 2) > 100 * np.sum(last[:, 0] ** 2)
+
+    def test_polyphonic_lines_sum(self):
+        pd = PlotData(line_points())
+        pa = PlotAudio(pd)
+        pa.point_duration = 100.0
+        pa.polyphonic = True
+        out = np.empty((pa.nframes(), 2))
+        pa.render(out)
+        middle = out[5 * 4410:5 * 4410 + 2205]  # centered, both lines
+        tones = pd.tones(pa.low, pa.high).freq[5]
+        spectrum = np.abs(np.fft.rfft(middle[:, 0], SAMPLE_RATE))
+        for f in tones:
+            assert spectrum[int(round(f))] > 0.1 * spectrum.max()
+        energy = np.sum(middle ** 2, axis=0)
+        assert 0.7 < energy[0] / energy[1] < 1.0  # gliding right from the center
+
+    def test_parallel_identical(self, tmp_path):
+        x = np.linspace(0.0, 1.0, 500)
+        pd = PlotData(np.column_stack((x, np.sin(20 * x), np.cos(20 * x), x ** 2)))
+        for polyphonic in (False, True):
+            pa = PlotAudio(pd)
+            pa.polyphonic = polyphonic
+            serial = np.empty((pa.nframes(), pa.channels()))
+            pa.render(serial)
+            pa.processes = 3
+            parallel = np.empty((pa.nframes(), pa.channels()))
+            pa.render(parallel)
+            np.testing.assert_array_equal(parallel, serial)
+
+            pa.output = str(tmp_path / "parallel")
+            pa.write_wav()
+            pa.processes = 1
+            pa.output = str(tmp_path / "serial")
+            pa.write_wav()
+            assert open(tmp_path / "parallel.wav", "rb").read() \
+                == open(tmp_path / "serial.wav", "rb").read()
+
+    def test_max_points(self):
+        pa = PlotAudio(PlotData(line_points(100001)))
+        assert pa.render_data().xsize() <= pa.max_points
+        assert pa.render_data() is pa.render_data()
+        pa.max_points = 50
+        assert pa.render_data().xsize() <= 50
+        assert pa.line_frames() == pa.render_data().xsize() * pa.point_samples()[0]
+        with pytest.raises(ValueError):
+            pa.max_points = 2
+
+    def test_max_points_updated(self):
+        pd = PlotData(line_points(5000))
+        pa = PlotAudio(pd)
+        pa.max_points = 1000
+        before = pa.render_data()
+        pd.update_points(slice(0, 5000), line_points(5000, k=10.0))
+        assert pa.render_data() is not before
+        assert pa.render_data().points[:, 1].max() == 100.0
@@ -0,0 +1,183 @@
+from audible_plot.pitch import Pitch, PitchArray
+from audible_plot.plotdata import PlotData
+from helpers import line_points
+import gc
+import numpy as np
+import pytest
+import warnings
+
+
+class TestPlotData:
+    def test_defaults(self):
+        pd = PlotData(line_points())
+        assert pd.xsize() == 11
+        assert pd.ysize() == 2
+        assert pd.xrange == (0.0, 10.0)
+        assert pd.yrange == (-10.0, 20.0)
+        assert pd.title == "y versus x"
+        assert pd.line_labels == ["Line 1", "Line 2"]
+        assert pd.line_descrs == ["Line 1", "Line 2"]
+
+    def test_ranges(self):
+        pd = PlotData(line_points())
+        pd.xrange = (5.0, -5.0)
+        assert pd.xrange == (-5.0, 5.0)
+        del pd.xrange
+        assert pd.xrange == (0.0, 10.0)
+        pd.yrange = (3.0, 3.0)
+        assert pd.yrange == (-10.0, 20.0)
+
+    def test_round_range(self):
+        assert PlotData.round_range((0.13, 0.87)) == pytest.approx((0.1, 0.9))
+        assert PlotData.round_range((-3.2, 47.0)) == pytest.approx((-10.0, 50.0))
+
+    def test_tones(self):
+        pd = PlotData(line_points())
+        pd.yrange = (-10.0, 20.0)
+        t = pd.tones()
+        assert isinstance(t, PitchArray)
+        assert t.midi.shape == (11, 2)
+        assert t.midi.min() == Pitch("C3").midi
+        assert t.midi.max() == Pitch("C7").midi
+        assert t[0, 0].midi == pytest.approx(Pitch("C3").midi + 48 / 3)
+
+    def test_from_npy(self, tmp_path):
+        filename = str(tmp_path / "points.npy")
+        np.save(filename, line_points())
+        pd = PlotData.from_file(filename)
+        assert isinstance(pd.points, np.memmap)
+        np.testing.assert_array_equal(pd.points, line_points())
+        assert pd.yrange == (-10.0, 20.0)
+        np.save(filename, line_points().astype(np.int32))
+        pd = PlotData.from_file(filename, chunk_rows=4)
+        assert pd.points.dtype == np.float64
+        np.testing.assert_array_equal(pd.points, line_points())
+
+    def test_from_text(self, tmp_path):
+        p = line_points(1001)
+        p[500, 1] = np.nan
+        for name, delimiter in [("points.csv", ","), ("points.tsv", "\t"), ("points.dat", " ")]:
+            filename = str(tmp_path / name)
+            with open(filename, "w") as f:
+                f.write(delimiter.join(["time", "speed", "depth"]) + "\n")
+                f.write("# a comment\n")
+                for row in p:
+                    f.write(delimiter.join(repr(float(v)) for v in row) + "\n")
+            pd = PlotData.from_file(filename, chunk_rows=64)
+            assert isinstance(pd.points, np.memmap)
+            np.testing.assert_array_equal(pd.points, p)
+            assert pd.xrange == (0.0, 10.0)
+            assert pd.yrange == (-10.0, 20.0)
+            assert pd.xlabel == "time"
+            assert pd.line_labels == ["speed", "depth"]
+
+    def test_from_text_no_header(self, tmp_path):
+        filename = str(tmp_path / "points.csv")
+        np.savetxt(filename, line_points()[:, :2], delimiter=",")
+        pd = PlotData.from_file(filename)
+        assert pd.ysize() == 1
+        assert pd.xlabel == "x"
+        with open(filename, "a") as f:
+            f.write("1,2,3\n")
+        with pytest.raises(ValueError):
+            PlotData.from_file(filename)
+
+    def test_bad_shape(self, tmp_path):
+        for p in (np.arange(5.0), np.ones((5, 1)), np.empty((0, 3))):
+            with pytest.raises(ValueError):
+                PlotData(p)
+        pd = PlotData(line_points())
+        with pytest.raises(ValueError):
+            pd.points = np.ones((5, 1))
+        assert pd.xsize() == 11
+        filename = str(tmp_path / "points.csv")
+        np.savetxt(filename, line_points()[:, :1], delimiter=",")
+        with pytest.raises(ValueError):
+            PlotData.from_file(filename)
+        np.save(str(tmp_path / "points.npy"), line_points()[:, :1])
+        with pytest.raises(ValueError):
+            PlotData.from_file(str(tmp_path / "points.npy"))
+
+    def test_from_file_closes_spool(self, tmp_path):
+        filename = str(tmp_path / "points.csv")
+        np.savetxt(filename, line_points(), delimiter=",")
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", ResourceWarning)
+            pd = PlotData.from_file(filename, chunk_rows=4)
+            with open(filename, "a") as f:
+                f.write("1,2\n")
+            with pytest.raises(ValueError):
+                PlotData.from_file(filename, chunk_rows=4)
+            gc.collect()
+        assert [w for w in caught if issubclass(w.category, ResourceWarning)] == []
+        np.testing.assert_array_equal(pd.points, line_points())
+
+    def test_decimate_lttb(self):
+        x = np.linspace(0.0, 10.0, 100001)
+        p = np.column_stack((x, np.sin(x), np.cos(3 * x)))
+        pd = PlotData(p)
+        pd.xlabel = "time"
+        small = pd.decimate(500)
+        assert 3 <= small.xsize() <= 500
+        assert small.ysize() == 2
+        assert small.xlabel == "time"
+        assert small.yrange == pd.yrange
+        np.testing.assert_array_equal(small.points[[0, -1]], p[[0, -1]])
+        assert np.all(np.diff(small.points[:, 0]) > 0)
+        assert small.points[:, 1].max() == pytest.approx(1.0, abs=1e-3)
+        assert small.points[:, 2].min() == pytest.approx(-1.0, abs=1e-3)
+        assert pd.decimate(200000).xsize() == 100001
+
+    def test_decimate_minmax(self):
+        x = np.linspace(0.0, 10.0, 100001)
+        p = np.column_stack((x, np.sin(7 * x)))
+        p[5000:6000, 1] = np.nan
+        pd = PlotData(p)
+        small = pd.decimate(400, "minmax")
+        assert small.xsize() <= 400
+        y = small.points[:, 1]
+        assert np.nanmax(y) == p[:, 1][np.nanargmax(p[:, 1])]
+        assert np.nanmin(y) == p[:, 1][np.nanargmin(p[:, 1])]
+        signs = np.sign(p[:, 1][np.isfinite(p[:, 1])])
+        kept = np.sign(y[np.isfinite(y)])
+        assert np.count_nonzero(np.diff(kept)) == np.count_nonzero(np.diff(signs))
+
+    def test_decimate_small(self):
+        x = np.linspace(0.0, 10.0, 1001)
+        pd = PlotData(np.column_stack((x, np.sin(x), np.cos(x), x)))
+        for mode in ("lttb", "minmax"):
+            for size in range(2, 12):
+                small = pd.decimate(size, mode)
+                assert 2 <= small.xsize() <= size
+                np.testing.assert_array_equal(small.points[[0, -1]], pd.points[[0, -1]])
+        assert pd.decimate(8, "minmax").xsize() == 8
+
+    def test_round_ranges(self):
+        lo, hi = PlotData.round_ranges(np.array([-0.37, 3.0, 5.0]), np.array([9.2, 1234.0, 5.0]))
+        np.testing.assert_array_equal(lo, [-1.0, 0.0, 4.0])
+        np.testing.assert_array_equal(hi, [10.0, 2000.0, 6.0])
+        assert PlotData.round_range((-0.37, 9.2)) == (-1.0, 10.0)
+
+    def test_update_points(self):
+        pd = PlotData(line_points())
+        pd.update_points(slice(2, 4), [[2.0, 50.0, 0.0], [3.0, 6.0, -30.0]])
+        np.testing.assert_array_equal(pd.limits[0], [0.0, 0.0, -30.0])
+        np.testing.assert_array_equal(pd.limits[1], [10.0, 50.0, 0.0])
+        assert pd.yrange == (-30.0, 50.0)
+        pd.update_points(2, [2.0, 4.0, np.nan])
+        pd.update_points(3, [3.0, 6.0, -3.0])
+        np.testing.assert_array_equal(pd.limits[0], PlotData.scan_limits(pd.points)[0])
+        np.testing.assert_array_equal(pd.limits[1], PlotData.scan_limits(pd.points)[1])
+        assert pd.yrange == (-10.0, 20.0)
+
+    def test_set_ranges_kept(self):
+        pd = PlotData(line_points())
+        pd.xrange = (-5.0, 15.0)
+        pd.yrange = (100.0, -100.0)
+        pd.update_points(3, [3.0, 60.0, -3.0])
+        pd.points = line_points(5)
+        assert (pd.xrange, pd.yrange) == ((-5.0, 15.0), (-100.0, 100.0))
+        pd.autoyrange()
+        pd.update_points(3, [3.0, 60.0, -3.0])
+        assert pd.yrange == (-10.0, 60.0)
+        assert pd.xrange == (-5.0, 15.0)
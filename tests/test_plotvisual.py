@@ -0,0 +1,77 @@
+from audible_plot.gnuplot import GnuplotPool
+from audible_plot.plotdata import PlotData
+from audible_plot.plotvisual import FileType, PlotVisual, Transport
+from helpers import line_points
+import numpy as np
+import os
+
+
+class TestPlotVisual:
+    def test_filenames(self):
+        pv = PlotVisual(PlotData(line_points()))
+        pv.output = "out/speed"
+        assert pv.out_filename() == "out/speed.png"
+        pv.filetype = "svg"
+        assert pv.filetype == FileType.SVG
+        assert pv.out_filename() == "out/speed.svg"
+        pv.filetype = "bmp"
+        assert pv.filetype == FileType.PNG
+        assert pv.tsv_filename() == "out/speed.tsv"
+        assert pv.gp_filename() == "out/speed.gp"
+
+    def test_write_tsv(self, tmp_path):
+        pd = PlotData(line_points())
+        pd.xlabel = "time"
+        pd.line_labels = ["speed", "depth"]
+        pv = PlotVisual(pd)
+        pv.output = str(tmp_path / "plot")
+        pv.write_tsv()
+        back = PlotData.from_file(pv.tsv_filename())
+        np.testing.assert_array_equal(back.points, line_points())
+        assert back.line_labels == ["speed", "depth"]
+        pv.max_points = 100
+        pd.points = line_points(10001)
+        pv.write_tsv()
+        assert PlotData.from_file(pv.tsv_filename()).xsize() <= 100
+
+    def test_write_gp(self, tmp_path, gnuplot_stub):
+        pd = PlotData(line_points())
+        pd.title = 'The "plot"'
+        pv = PlotVisual(pd)
+        pv.output = str(tmp_path / "plot")
+        pv.transport = "tsv"
+        pv.write_data()
+        pv.write_gp()
+        with open(pv.gp_filename()) as f:
+            gp = f.read()
+        assert 'set output "plot.png"' in gp
+        assert 'set title "The \\"plot\\""' in gp
+        assert "set yrange [-10:20]" in gp
+        assert "set datafile separator" in gp
+        assert '"plot.tsv" skip 1 using 1:3 with lines title "Line 2"' in gp
+        with GnuplotPool(1, gnuplot_stub) as pool:
+            pv.plot_gp(pool)
+        assert os.path.exists(pv.out_filename())
+
+    def test_write_bin(self, tmp_path, gnuplot_stub):
+        pv = PlotVisual(PlotData(line_points(5001)))
+        pv.output = str(tmp_path / "plot")
+        pv.max_points = 1000
+        assert pv.transport == Transport.BINARY
+        assert pv.data_filename() == pv.bin_filename()
+        pv.write_data()
+        pv.write_gp()
+        points = pv.render_data().points
+        np.testing.assert_array_equal(np.fromfile(pv.bin_filename(), dtype="<f8").reshape(-1, 3),
+                                      points)
+        assert not os.path.exists(pv.tsv_filename())
+        with open(pv.gp_filename()) as f:
+            gp = f.read()
+        assert (f'"plot.bin" binary record=({len(points)}) format="%float64%float64%float64"'
+                ' endian=little using 1:2 with lines') in gp
+        assert "separator" not in gp
+        with GnuplotPool(1, gnuplot_stub) as pool:
+            pv.plot_gp(pool)
+        assert os.path.exists(pv.out_filename())
+        pv.plotdata.update_points(slice(0, 5001), line_points(5001, k=10.0))
+        assert pv.render_data().points[:, 1].max() == 100.0
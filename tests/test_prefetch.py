@@ -0,0 +1,60 @@
+from audible_plot.artifactcache import ArtifactCache
+from audible_plot.plotdata import PlotData
+from audible_plot.prefetch import LOOKAHEAD_MAX, LOOKAHEAD_MIN, Prefetcher
+from audible_plot.speech import SpeechBank
+from audible_plot.tonecache import ToneCache
+from helpers import line_points
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def prefetcher(tmp_path, tts_stub) -> Prefetcher:
+    pd = PlotData(line_points(101, lines=1))
+    pd.xlabel = "time"
+    pd.line_labels = ["speed"]
+    bank = SpeechBank(44100, tts_stub, ArtifactCache(str(tmp_path / "cache")))
+    prefetcher = Prefetcher(pd, bank, ToneCache())
+    yield prefetcher
+    prefetcher.close()
+
+
+class TestPrefetcher:
+    def test_targets(self, prefetcher):
+        assert prefetcher.lookahead == LOOKAHEAD_MIN
+        assert prefetcher.targets(50, 0) == [50, 51, 49, 52, 48] + [0, 10, 20, 30, 40, 60, 70,
+                                                                   80, 90, 100]
+        assert prefetcher.targets(0, 0)[:3] == [0, 1, 2]
+
+    def test_lookahead(self, prefetcher):
+        for point in range(20):
+            prefetcher.update(point, 0)
+        assert prefetcher.lookahead == LOOKAHEAD_MAX
+
+    def test_readout(self, prefetcher):
+        samples = prefetcher.readout(3, 0)
+        bank = prefetcher._speech
+        np.testing.assert_array_equal(
+            samples, bank.phrase(["time", "equals", "zero", "point", "three",
+                                  "speed", "equals", "zero", "point", "six"]))
+        assert prefetcher.readout(3, 0) is samples
+        assert (prefetcher.hits, prefetcher.misses) == (1, 1)
+        assert not samples.flags.writeable
+        small = Prefetcher(prefetcher._plotdata, bank, ToneCache(),
+                           max_bytes=samples.nbytes * 3 // 2)
+        small.readout(3, 0)
+        small.readout(4, 0)
+        assert 0 < small.nbytes <= small.max_bytes
+        small.readout(4, 0)
+        small.readout(3, 0)
+        assert (small.hits, small.misses) == (1, 3)
+
+    def test_prefetch(self, prefetcher):
+        prefetcher.update(50, 0)
+        assert prefetcher.wait(30.0)
+        misses = prefetcher.misses
+        for point in prefetcher.targets(50, 0):
+            prefetcher.readout(point, 0)
+            prefetcher.tone(point, 0)
+        assert prefetcher.misses == misses
+        assert prefetcher._tones.misses == len(prefetcher._tones)
@@ -0,0 +1,68 @@
+from audible_plot.artifactcache import ArtifactCache
+from audible_plot.plotdata import PlotData
+from audible_plot.speech import VOCABULARY, SpeechBank, integer_words, number_words
+from helpers import line_points
+import numpy as np
+import pytest
+
+
+def logged(tmp_path) -> list[str]:
+    with open(tmp_path / "tts.log") as f:
+        return f.read().splitlines()
+
+
+class TestSpeech:
+    def test_integer_words(self):
+        assert integer_words(0) == ["zero"]
+        assert integer_words(15) == ["fifteen"]
+        assert integer_words(40) == ["forty"]
+        assert integer_words(121) == ["one", "hundred", "twenty", "one"]
+        assert integer_words(2003004) == ["two", "million", "three", "thousand", "four"]
+
+    def test_number_words(self):
+        assert number_words(3.5) == ["three", "point", "five"]
+        assert number_words(-0.25) == ["minus", "zero", "point", "two", "five"]
+        assert number_words(12345.678) == ["twelve", "thousand", "three", "hundred", "fifty"]
+        assert number_words(2.5e-9) == ["two", "point", "five", "times", "ten", "to", "the",
+                                        "minus", "nine"]
+        assert number_words(float("nan")) == ["not", "a", "number"]
+        assert number_words(float("-inf")) == ["minus", "infinity"]
+        assert number_words(-0.0) == number_words(0.0) == ["zero"]
+        assert number_words(-1e-300) == ["minus", "one", "times", "ten", "to", "the", "minus",
+                                         "three", "hundred"]
+        for v in (3.5, -1234.0, 1e15, 7e-8):
+            assert set(number_words(v)) <= set(VOCABULARY)
+
+    def test_clips(self, tmp_path, tts_stub):
+        cache = ArtifactCache(str(tmp_path / "cache"))
+        bank = SpeechBank(44100, tts_stub, cache)
+        clip = bank.clip("hello")
+        assert clip.dtype == np.int16
+        assert len(clip) == pytest.approx(2 * 100 * len("hello"), abs=4)
+        assert clip[0] != 0 and clip[-1] != 0
+        assert bank.clip("hello") is clip
+        assert logged(tmp_path) == ["hello"]
+        again = SpeechBank(44100, tts_stub, cache)
+        np.testing.assert_array_equal(again.clip("hello"), clip)
+        assert logged(tmp_path) == ["hello"]
+
+    def test_phrase(self, tmp_path, tts_stub):
+        pd = PlotData(line_points())
+        pd.xlabel = "time"
+        pd.line_labels = ["speed", "depth"]
+        bank = SpeechBank(44100, tts_stub, ArtifactCache(str(tmp_path / "cache")))
+        bank.prepare(pd)
+        count = len(logged(tmp_path))
+        assert "speed" in bank and "time" in bank and "nine" in bank
+        words = bank.position_words(pd, 7, 1)
+        assert words == ["time", "equals", "seven", "depth", "equals", "minus", "seven"]
+        samples = bank.phrase(words, gap=10.0)
+        assert samples.dtype == np.float32
+        clips = [bank.clip(w) for w in words]
+        assert len(samples) == sum(len(c) for c in clips) + 6 * 441
+        start = len(clips[0]) + 441
+        np.testing.assert_array_equal(samples[start:start + len(clips[1])],
+                                      clips[1] * np.float32(1.0 / 32767))
+        assert np.all(samples[len(clips[0]):start] == 0)
+        assert bank.axis_words(pd, "y") == ["y", "from", "minus", "ten", "to", "twenty"]
+        assert len(logged(tmp_path)) == count
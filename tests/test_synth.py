@@ -0,0 +1,104 @@
+from audible_plot.pitch import Pitch
+from audible_plot.synth import (Oscillator, Synth, Waveform, WavetableBank,
+                                 WavetableOscillator, tone_samples)
+import numpy as np
+import pytest
+
+
+SAMPLE_RATE: int = 44100
+VOLUME: float = 0.2
+
+
+def reference(freq: float, duration: float) -> dict:
+    """Full-buffer waveforms, as rendered by the sandbox Synth."""
+    t = np.linspace(0, duration / 1000, tone_samples(duration), False)
+    return {
+        Waveform.SINE: VOLUME * np.sin(freq * t * 2 * np.pi),
+        Waveform.SQUARE: VOLUME * np.sign(np.sin(freq * t * 2 * np.pi)),
+        Waveform.SAWTOOTH: VOLUME * (2 * (freq * t - np.floor(freq * t + 0.5))),
+    }
+
+
+class TestOscillator:
+    def test_matches_reference(self):
+        ref = reference(220.0, 500)
+        for wf in Waveform:
+            out = Oscillator(wf).render(220.0, len(ref[wf]))
+            if wf is Waveform.SQUARE:
+                assert np.mean(out == ref[wf]) > 0.99
+            else:
+                np.testing.assert_allclose(out, ref[wf], atol=1e-9)
+
+    def test_phase_continuous(self):
+        whole = Oscillator().render(330.0, 4000)
+        osc = Oscillator()
+        parts = np.concatenate([osc.render(330.0, k) for k in (1000, 7, 2993)])
+        np.testing.assert_allclose(parts, whole, atol=1e-9)
+
+    def test_per_sample_freq(self):
+        osc = Oscillator()
+        out = osc.render(np.full(1000, 441.0), 1000)
+        np.testing.assert_allclose(out, Oscillator().render(441.0, 1000), atol=1e-9)
+        assert osc.phase == pytest.approx(0.0, abs=1e-9)
+
+
+def alias_ratio(out: np.ndarray, freq: int) -> float:
+    """Fraction of the energy of one second of samples outside the harmonics of freq."""
+    power = np.abs(np.fft.rfft(out)) ** 2
+    harmonic = np.zeros(len(power), dtype=bool)
+    harmonic[::freq] = True
+    return power[~harmonic].sum() / power.sum()
+
+
+class TestWavetable:
+    def test_low_freq_matches_naive(self):
+        for wf in Waveform:
+            out = WavetableOscillator(wf).render(110.0, 4410)
+            ref = Oscillator(wf).render(110.0, 4410)
+            if wf is Waveform.SINE:
+                np.testing.assert_allclose(out, ref, atol=1e-6)
+            else:
+                assert np.corrcoef(out, ref)[0, 1] > 0.99
+
+    def test_band_limited(self):
+        freq = 4186  # about C8, MIDI 108
+        for wf in (Waveform.SQUARE, Waveform.SAWTOOTH):
+            naive = alias_ratio(Oscillator(wf).render(freq, SAMPLE_RATE), freq)
+            table = alias_ratio(WavetableOscillator(wf).render(freq, SAMPLE_RATE), freq)
+            assert table < 1e-6
+            assert table < naive / 1000
+
+    def test_phase_continuous(self):
+        whole = WavetableOscillator(Waveform.SAWTOOTH).render(330.0, 4000)
+        osc = WavetableOscillator(Waveform.SAWTOOTH)
+        parts = np.concatenate([osc.render(330.0, k) for k in (1000, 7, 2993)])
+        np.testing.assert_allclose(parts, whole, atol=1e-9)
+
+    def test_bank(self):
+        bank = WavetableBank(size=256)
+        assert bank.table(Waveform.SQUARE, 30.0).shape == (257,)
+        assert bank.octave(20.0) == 0
+        assert bank.octave(20000.0) == bank.octave(12000.0)
+        with pytest.raises(ValueError):
+            WavetableBank(size=1000)
+
+
+class TestSynth:
+    def test_blocks(self):
+        synth = Synth(block_size=256)
+        tones = [(Pitch("A4"), 10), (Pitch("A5"), 10), (220.0, 10)]
+        blocks = list(synth.blocks(tones))
+        assert all(len(b) == 256 for b in blocks)
+        assert len(blocks) == -(-3 * tone_samples(10) // 256)
+
+    def test_no_clicks(self):
+        # A jump between tones is no larger than one sample step of the higher tone.
+        out = Synth(volume=1.0).render([(220.0, 23), (880.0, 17), (330.0, 31)])
+        assert len(out) == tone_samples(23) + tone_samples(17) + tone_samples(31)
+        assert np.max(np.abs(np.diff(out))) <= 2 * np.pi * 880.0 / SAMPLE_RATE + 1e-9
+
+    def test_render_equals_blocks(self):
+        tones = [(Pitch("C4"), 100), (Pitch("E4"), 100)]
+        out = Synth(Waveform.SAWTOOTH, block_size=100).render(tones)
+        blocks = np.concatenate(list(Synth(Waveform.SAWTOOTH, block_size=100).blocks(tones)))
+        np.testing.assert_array_equal(out, blocks[:len(out)])
@@ -0,0 +1,72 @@
+from audible_plot.pitch import Pitch
+from audible_plot.synth import VOLUME, Waveform, tone_samples
+from audible_plot.tonecache import ToneCache
+import numpy as np
+import pytest
+
+
+TONE_BYTES: int = tone_samples(100) * 8
+
+
+class TestToneCache:
+    def test_hits_and_misses(self):
+        cache = ToneCache()
+        a = cache.get(Pitch("A4"), 100)
+        b = cache.get(440.0, 100)
+        assert cache.misses == 1
+        assert cache.hits == 1
+        assert np.shares_memory(a, b)
+        assert len(a) == tone_samples(100)
+        cache.get(Pitch("A4"), 100, waveform=Waveform.SQUARE)
+        cache.get(Pitch("A4"), 200)
+        cache.get(Pitch("A4"), 100, volume=0.5)
+        assert cache.misses == 4
+        assert len(cache) == 4
+
+    def test_read_only(self):
+        buf = ToneCache().get(Pitch("C4"), 100)
+        with pytest.raises(ValueError):
+            buf[0] = 1.0
+        with pytest.raises(ValueError):
+            buf.setflags(write=True)
+
+    def test_cents(self):
+        cache = ToneCache(cents=10.0)
+        cache.get(Pitch(69.0), 100)
+        cache.get(Pitch(69.03), 100)
+        assert cache.hits == 1
+        cache.get(Pitch(69.2), 100)
+        assert cache.misses == 2
+        with pytest.raises(ValueError):
+            ToneCache(cents=0.0)
+
+    def test_lru_eviction(self):
+        cache = ToneCache(max_bytes=3 * TONE_BYTES)
+        for m in (60, 61, 62):
+            cache.get(Pitch(m), 100)
+        cache.get(Pitch(60), 100)  # 61 is now least recently used
+        cache.get(Pitch(63), 100)
+        assert cache.evictions == 1
+        assert cache.nbytes == 3 * TONE_BYTES
+        cache.get(Pitch(60), 100)
+        assert cache.hits == 2
+        cache.get(Pitch(61), 100)
+        assert cache.misses == 5
+        cache.max_bytes = TONE_BYTES
+        assert len(cache) == 1
+        cache.clear()
+        assert len(cache) == cache.nbytes == cache.hits == 0
+
+    def test_fade(self):
+        cache = ToneCache()
+        fade = tone_samples(cache.fade)
+        for duration in (200, 30):
+            buf = cache.get(Pitch("A4"), duration)
+            assert buf[0] == 0.0
+            assert abs(buf[-1]) <= VOLUME / fade
+            assert np.abs(buf[fade:-fade]).max() == pytest.approx(VOLUME, rel=0.01)
+
+    def test_too_big(self):
+        cache = ToneCache(max_bytes=TONE_BYTES // 2)
+        assert len(cache.get(Pitch("A4"), 100)) == tone_samples(100)
+        assert len(cache) == 0
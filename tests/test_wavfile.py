@@ -0,0 +1,37 @@
+from audible_plot.wavfile import WAV_HEADER_SIZE, open_wav, read_wav, to_pcm
+import numpy as np
+import os
+import pytest
+import wave
+
+
+class TestWavFile:
+    def test_pcm_round_trip(self, tmp_path):
+        filename = str(tmp_path / "tone.wav")
+        wav = open_wav(filename, 1000, channels=2, rate=22050)
+        to_pcm(np.linspace(-1.0, 1.0, 2000).reshape(1000, 2), wav)
+        wav.flush()
+        del wav
+        assert os.path.getsize(filename) == WAV_HEADER_SIZE + 4000
+        with wave.open(filename) as w:
+            assert (w.getnchannels(), w.getsampwidth(), w.getframerate(), w.getnframes()) \
+                == (2, 2, 22050, 1000)
+        rate, samples = read_wav(filename)
+        assert rate == 22050
+        assert samples.shape == (1000, 2)
+        assert samples[0, 0] == -32767
+        assert samples[-1, -1] == 32767
+
+    def test_float(self, tmp_path):
+        filename = str(tmp_path / "tone.wav")
+        wav = open_wav(filename, 10, dtype="float32")
+        to_pcm(np.full((10, 1), 0.5), wav)
+        wav.flush()
+        del wav
+        _, samples = read_wav(filename)
+        assert samples.dtype == np.float32
+        np.testing.assert_array_equal(samples, 0.5)
+
+    def test_bad_dtype(self, tmp_path):
+        with pytest.raises(ValueError):
+            open_wav(str(tmp_path / "tone.wav"), 10, dtype="int32")